@@ -0,0 +1 @@
+"""Offline benchmarks; run from the repository root, e.g. python -m benchmarks.bench_throughput"""
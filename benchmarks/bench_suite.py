@@ -0,0 +1,369 @@
+"""Offline benchmark suite: metadata latency, throughput per concurrency, hook overhead, post-processing, memory
+
+Everything runs through grabyt's own code (`fetch_metadata`, `DownloadTask`,
+`PostProcessPool`) against `benchmarks.local_server` and the
+`benchmarks.fake_extractor` extractor, so no internet access is needed.
+Post-processing is only measured when ffmpeg is installed. Run from the
+repository root and compare two versions with:
+
+    python -m benchmarks.bench_suite --json before.json
+    python -m benchmarks.bench_suite --json after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fake_extractor
+from benchmarks.local_server import start_server
+from grabyt.cache import MetadataCache
+from grabyt.core import DownloadTask, build_download_options, fetch_metadata, format_size
+from grabyt.metrics import JobMetrics, PHASE_POSTPROCESS
+from grabyt.postprocess import PostProcessPool
+from grabyt.progress import ProgressTracker
+from grabyt.settings import PerformanceSettings
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# DASH streams are separate video and audio; merging needs ffmpeg, so throughput takes the video only
+STREAM_FORMATS = {'progressive': None, 'hls': None, 'dash': 'bestvideo'}
+
+
+def parse_list(value, convert=int):
+    return [convert(item) for item in value.split(',') if item]
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def timing_summary(seconds):
+    return {
+        'runs': len(seconds),
+        'mean_ms': round(statistics.mean(seconds) * 1000, 2),
+        'p50_ms': round(percentile(seconds, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(seconds, 0.95) * 1000, 2),
+    }
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def video_url(server, video_id):
+    return f'{server.base_url}/watch/{video_id}'
+
+
+def stream_id(stream, args, n=0):
+    """Return a fake-extractor video ID; `n` makes otherwise identical videos distinct"""
+    if stream == 'progressive':
+        return f'progressive-{args.size * 1024 ** 2 + n}'
+    return f'{stream}-{args.segments}x{args.segment_size * 1024 + n}'
+
+
+def bench_metadata(server, args, scratch):
+    """Time `fetch_metadata` uncached, from the metadata cache, and for a playlist"""
+    results = {}
+    cold = []
+    for n in range(args.runs):
+        started = time.perf_counter()
+        fetch_metadata(video_url(server, stream_id('dash', args, n)))
+        cold.append(time.perf_counter() - started)
+    results['uncached'] = timing_summary(cold)
+
+    cache = MetadataCache(os.path.join(scratch, 'metadata.sqlite3'))
+    try:
+        url = video_url(server, stream_id('dash', args))
+        fetch_metadata(url, cache)
+        cached = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            fetch_metadata(url, cache)
+            cached.append(time.perf_counter() - started)
+        results['cached'] = timing_summary(cached)
+    finally:
+        cache.close()
+
+    listed = []
+    for n in range(max(1, args.runs // 4)):
+        entries = []
+        started = time.perf_counter()
+        fetch_metadata(video_url(server, f'playlist-{args.playlist_size}-progressive-{n + 1}'),
+                       on_entries=entries.extend)
+        listed.append(time.perf_counter() - started)
+    results['playlist'] = timing_summary(listed)
+    results['playlist']['entries'] = args.playlist_size
+    return results
+
+
+def download_batch(urls, folder, download_options, jobs=1, postprocess_pool=None, metrics=None):
+    """Download `urls` into `folder`, `jobs` at a time, and return (seconds, bytes on disk)"""
+    tasks = [DownloadTask(url, download_options, postprocess_pool=postprocess_pool, metrics=metrics)
+             for url in urls]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for future in [executor.submit(task.run) for task in tasks]:
+            future.result()
+    for task in tasks:
+        if task.postprocess_future:
+            task.postprocess_future.result()
+    elapsed = time.perf_counter() - started
+    size = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+    return elapsed, size
+
+
+def bench_throughput(server, args, scratch):
+    """Download `--count` videos of each stream type at each concurrency level"""
+    performance = PerformanceSettings(concurrent_fragments=args.fragments)
+    results = {}
+    for stream in parse_list(args.streams, str):
+        for jobs in parse_list(args.jobs):
+            folder = tempfile.mkdtemp(dir=scratch)
+            download_options = build_download_options(
+                folder, quiet=True, performance=performance, format_spec=STREAM_FORMATS[stream])
+            urls = [video_url(server, stream_id(stream, args, n)) for n in range(args.count)]
+            elapsed, size = download_batch(urls, folder, download_options, jobs)
+            shutil.rmtree(folder)
+            results[f'{stream}@{jobs}'] = {
+                'stream': stream,
+                'jobs': jobs,
+                'videos': args.count,
+                'seconds': round(elapsed, 3),
+                'bytes': size,
+                'bytes_per_second': round(size / elapsed),
+            }
+            log(f"  {stream:<12}{jobs:>3} at once {elapsed:>8.2f}s {format_size(int(size / elapsed)):>12}/s")
+    return results
+
+
+def bench_progress_hooks(server, args, scratch):
+    """Cost of one progress hook call, and its share of a real download"""
+    tracker = ProgressTracker()
+    task = DownloadTask('bench', {}, on_progress=lambda d: tracker.update(0, d),
+                        metrics=JobMetrics('bench'))
+    d = {'status': 'downloading', 'filename': 'video.mp4', 'downloaded_bytes': 0,
+         'total_bytes': 100 * 1024 ** 2, 'speed': 4 * 1024 ** 2, 'eta': 20}
+    calls = 100_000
+    started = time.perf_counter()
+    for n in range(calls):
+        d['downloaded_bytes'] = n * 1024
+        task._progress_hook(d)
+    per_call = (time.perf_counter() - started) / calls
+
+    hook_calls = []
+    folder = tempfile.mkdtemp(dir=scratch)
+    download_options = build_download_options(
+        folder, quiet=True, performance=PerformanceSettings(concurrent_fragments=args.fragments))
+    task = DownloadTask(video_url(server, stream_id('hls', args, 1000)), download_options,
+                        on_progress=hook_calls.append)
+    started = time.perf_counter()
+    task.run()
+    elapsed = time.perf_counter() - started
+    shutil.rmtree(folder)
+    return {
+        'ns_per_call': round(per_call * 1e9),
+        'calls_per_download': len(hook_calls),
+        'share_of_download': round(len(hook_calls) * per_call / elapsed, 6),
+    }
+
+
+def make_media(folder, seconds):
+    """Encode a test video and audio track with ffmpeg for the merge and transcode cases"""
+    commands = (
+        ['-f', 'lavfi', '-i', f'testsrc=duration={seconds}:size=1280x720:rate=30',
+         '-c:v', 'mpeg4', '-q:v', '5', os.path.join(folder, 'video.mp4')],
+        ['-f', 'lavfi', '-i', f'sine=duration={seconds}', '-c:a', 'aac', os.path.join(folder, 'audio.m4a')],
+    )
+    for command in commands:
+        subprocess.run(['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y'] + command, check=True)
+
+
+def bench_postprocess(args, scratch):
+    """Time merging a video with its audio, and transcoding audio to FLAC, on the post-processing pool"""
+    if not shutil.which('ffmpeg'):
+        log("  skipped: ffmpeg not found")
+        return {'skipped': 'ffmpeg not found'}
+
+    media = tempfile.mkdtemp(dir=scratch)
+    make_media(media, args.media_seconds)
+    server = start_server(media_dir=media)
+    pool = PostProcessPool()
+    url = video_url(server, 'merge-video-audio')
+    cases = {
+        'merge': {'format_spec': 'video+audio'},
+        'transcode_flac': {'audio_only': True, 'audio_format': 'flac'},
+    }
+    results = {}
+    try:
+        for name, options in cases.items():
+            seconds = []
+            # One at a time, so each run has the pool to itself
+            for _ in range(max(1, args.runs // 4)):
+                folder = tempfile.mkdtemp(dir=scratch)
+                metrics = JobMetrics(url)
+                download_batch([url], folder, build_download_options(folder, quiet=True, **options),
+                               postprocess_pool=pool, metrics=metrics)
+                seconds.append(metrics.snapshot()['phases'][PHASE_POSTPROCESS])
+                shutil.rmtree(folder)
+            results[name] = timing_summary(seconds)
+            log(f"  {name:<16}{results[name]['mean_ms']:>10.1f} ms")
+    finally:
+        pool.shutdown()
+        server.shutdown()
+    return results
+
+
+def bench_memory(server, args, scratch):
+    """Peak Python heap and process RSS while downloading `--count` videos at the highest concurrency"""
+    jobs = max(parse_list(args.jobs))
+    folder = tempfile.mkdtemp(dir=scratch)
+    download_options = build_download_options(
+        folder, quiet=True, performance=PerformanceSettings(concurrent_fragments=args.fragments))
+    urls = [video_url(server, stream_id('progressive', args, 1000 + n)) for n in range(args.count)]
+    tracemalloc.start()
+    try:
+        download_batch(urls, folder, download_options, jobs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    shutil.rmtree(folder)
+    return {'jobs': jobs, 'python_peak_bytes': peak, 'max_rss_bytes': max_rss_bytes()}
+
+
+# Sizes of the run rather than measurements
+COUNT_FIELDS = ('runs', 'entries', 'jobs', 'videos')
+
+
+def flatten(results, prefix=''):
+    """Return {'throughput.hls@4.seconds': 1.2, ...} for every number in the results"""
+    flat = {}
+    for key, value in results.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(report, baseline):
+    """Print the change of every measurement that is also in `baseline`"""
+    current, previous = flatten(report['results']), flatten(baseline['results'])
+    log(f"\nCompared with {baseline['environment'].get('commit') or 'baseline'}:")
+    for path, value in current.items():
+        before = previous.get(path)
+        if before and path.rsplit('.', 1)[-1] not in COUNT_FIELDS:
+            log(f"  {path:<52}{before:>14g} -> {value:<14g}{(value - before) / before:+.1%}")
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    import yt_dlp
+
+    return {
+        'commit': commit,
+        'yt_dlp': yt_dlp.version.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+BENCHMARKS = ('metadata', 'throughput', 'hooks', 'postprocess', 'memory')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run grabyt's benchmarks against a local server and fake site.")
+    parser.add_argument('--only', default=','.join(BENCHMARKS),
+                        help=f"comma separated benchmarks to run (default: {','.join(BENCHMARKS)})")
+    parser.add_argument('--streams', default='progressive,hls,dash', help="stream types for the throughput run")
+    parser.add_argument('--jobs', default='1,2,4,8', help="parallel download counts (default: 1,2,4,8)")
+    parser.add_argument('--count', type=int, default=8, help="videos per throughput run (default: 8)")
+    parser.add_argument('--size', type=int, default=4, help="progressive video size in MiB (default: 4)")
+    parser.add_argument('--segments', type=int, default=16, help="HLS/DASH segment count (default: 16)")
+    parser.add_argument('--segment-size', type=int, default=256, help="segment size in KiB (default: 256)")
+    parser.add_argument('--fragments', type=int, default=4, help="concurrent fragments per video (default: 4)")
+    parser.add_argument('--rate', type=float, default=4, help="per-request MiB/s after the burst (default: 4)")
+    parser.add_argument('--burst', type=float, default=0.25, help="MiB per request served unthrottled (default: 0.25)")
+    parser.add_argument('--latency', type=float, default=50, help="server latency per request in ms (default: 50)")
+    parser.add_argument('--runs', type=int, default=20, help="repetitions of the timing benchmarks (default: 20)")
+    parser.add_argument('--playlist-size', type=int, default=200, help="entries of the listed playlist (default: 200)")
+    parser.add_argument('--media-seconds', type=int, default=30,
+                        help="length of the ffmpeg test media for post-processing (default: 30)")
+    parser.add_argument('--json', metavar='FILE', help="write the results as JSON ('-' for stdout)")
+    parser.add_argument('--compare', metavar='FILE', help="show the change from an earlier --json report")
+    args = parser.parse_args(argv)
+
+    selected = parse_list(args.only, str)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    fake_extractor.register()
+    server = start_server(rate=args.rate * 1024 ** 2, burst=int(args.burst * 1024 ** 2),
+                          latency=args.latency / 1000)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            for name in selected:
+                log(f"{name}...")
+                if name == 'metadata':
+                    results[name] = bench_metadata(server, args, scratch)
+                elif name == 'throughput':
+                    results[name] = bench_throughput(server, args, scratch)
+                elif name == 'hooks':
+                    results[name] = bench_progress_hooks(server, args, scratch)
+                elif name == 'postprocess':
+                    results[name] = bench_postprocess(args, scratch)
+                elif name == 'memory':
+                    results[name] = bench_memory(server, args, scratch)
+                if name != 'throughput' and 'skipped' not in results[name]:
+                    log('  ' + json.dumps(results[name]))
+    finally:
+        server.shutdown()
+
+    report = {
+        'environment': environment(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('json', 'compare')},
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
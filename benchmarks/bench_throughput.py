@@ -0,0 +1,98 @@
+"""Measure download throughput for fragment concurrency and HTTP chunk sizes
+
+Runs real yt-dlp downloads through `grabyt.core.DownloadTask` against
+`benchmarks.local_server`, which throttles every request after a short burst
+the way YouTube's CDN does. Run from the repository root:
+
+    python -m benchmarks.bench_throughput --json results.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+from benchmarks.local_server import start_server
+from grabyt.core import build_download_options, DownloadTask, format_size
+from grabyt.settings import PerformanceSettings
+
+
+def parse_list(value, convert=int):
+    return [convert(item) for item in value.split(',') if item]
+
+
+def run_download(url, performance):
+    """Download `url` into a scratch folder and return (seconds, bytes)"""
+    downloaded = {}
+
+    def on_progress(progress):
+        downloaded['bytes'] = max(downloaded.get('bytes', 0), progress['downloaded_bytes'])
+
+    with tempfile.TemporaryDirectory() as folder:
+        download_options = build_download_options(folder, quiet=True, performance=performance)
+        task = DownloadTask(url, download_options, on_progress=on_progress)
+        started = time.perf_counter()
+        task.run()
+        elapsed = time.perf_counter() - started
+    return elapsed, downloaded.get('bytes', 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark download settings against a local throttled server.")
+    parser.add_argument('--size', type=int, default=32, help="progressive file size in MiB (default: 32)")
+    parser.add_argument('--segments', type=int, default=32, help="HLS segment count (default: 32)")
+    parser.add_argument('--segment-size', type=int, default=1024, help="HLS segment size in KiB (default: 1024)")
+    parser.add_argument('--rate', type=float, default=4, help="per-request MiB/s after the burst (default: 4)")
+    parser.add_argument('--burst', type=float, default=0.25, help="MiB per request served unthrottled (default: 0.25)")
+    parser.add_argument('--fragments', default='1,2,4,8', help="concurrent fragment counts for HLS")
+    parser.add_argument('--chunk-sizes', default='0,1,4,10',
+                        help="HTTP chunk sizes in MiB for progressive, 0 for none")
+    parser.add_argument('--json', metavar='FILE', help="also write the results as JSON ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    server = start_server(rate=args.rate * 1024 ** 2, burst=int(args.burst * 1024 ** 2))
+    progressive_url = f'{server.base_url}/progressive/{args.size * 1024 ** 2}.mp4'
+    hls_url = f'{server.base_url}/hls/{args.segments}x{args.segment_size * 1024}/index.m3u8'
+
+    cases = []
+    for chunk_size in parse_list(args.chunk_sizes):
+        cases.append(('progressive', progressive_url, PerformanceSettings(
+            concurrent_fragments=1, http_chunk_size=chunk_size * 1024 ** 2)))
+    for fragments in parse_list(args.fragments):
+        cases.append(('hls', hls_url, PerformanceSettings(concurrent_fragments=fragments, http_chunk_size=0)))
+
+    results = []
+    try:
+        print(f"{'stream':<12}{'fragments':>10}{'chunk':>12}{'time':>9}{'throughput':>14}", file=sys.stderr)
+        for stream, url, performance in cases:
+            elapsed, size = run_download(url, performance)
+            results.append({
+                'stream': stream,
+                'concurrent_fragments': performance.concurrent_fragments,
+                'http_chunk_size': performance.http_chunk_size,
+                'seconds': round(elapsed, 3),
+                'bytes': size,
+                'bytes_per_second': round(size / elapsed) if elapsed else None,
+            })
+            chunk = format_size(performance.http_chunk_size) if performance.http_chunk_size else '-'
+            print(f"{stream:<12}{performance.concurrent_fragments:>10}{chunk:>12}{elapsed:>8.2f}s"
+                  f"{format_size(size / elapsed if elapsed else 0):>12}/s", file=sys.stderr)
+    finally:
+        server.shutdown()
+
+    if args.json:
+        report = {
+            'server': {'rate': args.rate * 1024 ** 2, 'burst': int(args.burst * 1024 ** 2)},
+            'results': results,
+        }
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""A yt-dlp extractor for videos on `benchmarks.local_server`, so benchmarks run the normal extraction path offline
+
+    http://127.0.0.1:<port>/watch/<video id>
+
+The page's metadata comes from the server's /api/info/<video id>.json, one
+request per video like a real site's player API; see
+`MediaServer.video_info` for the video IDs it knows.
+"""
+from yt_dlp.extractor.common import InfoExtractor
+
+
+class FakeVideoIE(InfoExtractor):
+    IE_NAME = 'grabyt:bench'
+    _VALID_URL = r'(?P<base>https?://(?:127\.0\.0\.1|localhost):\d+)/watch/(?P<id>[\w-]+)'
+
+    def _real_extract(self, url):
+        base, video_id = self._match_valid_url(url).group('base', 'id')
+        info = self._download_json(f'{base}/api/info/{video_id}.json', video_id)
+
+        if info.get('_type') == 'playlist':
+            entries = [self.url_result(f'{base}/watch/{entry}', FakeVideoIE, entry)
+                       for entry in info['entries']]
+            return self.playlist_result(entries, video_id, info['title'])
+
+        manifest = info.pop('manifest', None)
+        if manifest and manifest.endswith('.m3u8'):
+            info['formats'] = self._extract_m3u8_formats(
+                base + manifest, video_id, 'mp4', entry_protocol='m3u8_native', m3u8_id='hls')
+        elif manifest:
+            info['formats'] = self._extract_mpd_formats(base + manifest, video_id, mpd_id='dash')
+        else:
+            for f in info['formats']:
+                f['url'] = base + f['url']
+        return info
+
+
+def register():
+    """Make every `YoutubeDL` created afterwards try `FakeVideoIE` before the built-in extractors"""
+    from yt_dlp.extractor import import_extractors
+    from yt_dlp.globals import extractors
+
+    # yt-dlp keeps its extractor classes in an ordered dict and uses the first match
+    import_extractors()
+    if FakeVideoIE.__name__ not in extractors.value:
+        extractors.value = {FakeVideoIE.__name__: FakeVideoIE, **extractors.value}
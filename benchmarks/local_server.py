@@ -0,0 +1,249 @@
+"""Local HTTP stand-in for a video site and its CDN, serving synthetic media
+
+Paths:
+    /progressive/<bytes>.mp4                 a single file, with Range support
+    /hls/<segments>x<bytes>/index.m3u8       an HLS media playlist
+    /hls/<segments>x<bytes>/seg<n>.ts        its segments
+    /dash/<segments>x<bytes>/manifest.mpd    a DASH manifest with one video and one audio stream
+    /dash/<segments>x<bytes>/<stream>/...    their init.mp4 and seg<n>.m4s segments
+    /media/<name>                            a file from the server's `media_dir`, with Range support
+    /api/info/<video id>.json                metadata for `benchmarks.fake_extractor`
+
+Like YouTube's CDN, each request gets `burst` bytes at full speed and is then
+throttled to `rate` bytes/s, which is what chunked and concurrent fragment
+downloading work around.
+"""
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BLOCK = bytes(range(256)) * 256
+WRITE_SIZE = 64 * 1024
+SEGMENT_SECONDS = 4
+
+MPD_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" profiles="urn:mpeg:dash:profile:isoff-on-demand:2011"
+     minBufferTime="PT2S" mediaPresentationDuration="PT{duration}S">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" contentType="video">
+      <Representation id="video" codecs="avc1.64001f" width="1280" height="720" frameRate="30"
+                      bandwidth="{video_bandwidth}">
+        <SegmentTemplate timescale="1" duration="{segment_seconds}" startNumber="0"
+                         initialization="video/init.mp4" media="video/seg$Number$.m4s"/>
+      </Representation>
+    </AdaptationSet>
+    <AdaptationSet mimeType="audio/mp4" contentType="audio" lang="en">
+      <Representation id="audio" codecs="mp4a.40.2" audioSamplingRate="44100" bandwidth="{audio_bandwidth}">
+        <SegmentTemplate timescale="1" duration="{segment_seconds}" startNumber="0"
+                         initialization="audio/init.mp4" media="audio/seg$Number$.m4s"/>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+
+def synthetic_bytes(start, end):
+    """Deterministic content for the byte range [start, end)"""
+    offset = start % len(BLOCK)
+    length = end - start
+    data = (BLOCK[offset:] + BLOCK * (length // len(BLOCK) + 1))[:length]
+    return data
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        path = self.path.split('?', 1)[0]
+        time.sleep(self.server.latency)
+
+        match = re.fullmatch(r'/progressive/(\d+)\.mp4', path)
+        if match:
+            return self.send_media(int(match.group(1)), 'video/mp4', send_body)
+
+        match = re.fullmatch(r'/hls/(\d+)x(\d+)/index\.m3u8', path)
+        if match:
+            segments = int(match.group(1))
+            lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:4', '#EXT-X-MEDIA-SEQUENCE:0']
+            for n in range(segments):
+                lines += ['#EXTINF:4.0,', f'seg{n}.ts']
+            lines.append('#EXT-X-ENDLIST')
+            return self.send_bytes(('\n'.join(lines) + '\n').encode(), 'application/vnd.apple.mpegurl', send_body)
+
+        match = re.fullmatch(r'/hls/(\d+)x(\d+)/seg(\d+)\.ts', path)
+        if match and int(match.group(3)) < int(match.group(1)):
+            return self.send_media(int(match.group(2)), 'video/mp2t', send_body)
+
+        match = re.fullmatch(r'/dash/(\d+)x(\d+)/manifest\.mpd', path)
+        if match:
+            segments, size = int(match.group(1)), int(match.group(2))
+            mpd = MPD_TEMPLATE.format(
+                duration=segments * SEGMENT_SECONDS, segment_seconds=SEGMENT_SECONDS,
+                video_bandwidth=size * 8 // SEGMENT_SECONDS, audio_bandwidth=size * 8 // SEGMENT_SECONDS // 8)
+            return self.send_bytes(mpd.encode(), 'application/dash+xml', send_body)
+
+        match = re.fullmatch(r'/dash/(\d+)x(\d+)/(video|audio)/(init\.mp4|seg(\d+)\.m4s)', path)
+        if match and (match.group(5) is None or int(match.group(5)) < int(match.group(1))):
+            if match.group(5) is None:
+                return self.send_media(1024, 'video/mp4', send_body)
+            # Audio segments are an eighth of the video's
+            size = int(match.group(2)) // (8 if match.group(3) == 'audio' else 1)
+            return self.send_media(size, 'video/iso.segment', send_body)
+
+        match = re.fullmatch(r'/media/([\w.-]+)', path)
+        if match and self.server.media_dir:
+            return self.send_file(os.path.join(self.server.media_dir, match.group(1)), send_body)
+
+        match = re.fullmatch(r'/api/info/([\w-]+)\.json', path)
+        if match:
+            info = self.server.video_info(match.group(1))
+            if info is not None:
+                return self.send_bytes(json.dumps(info).encode(), 'application/json', send_body)
+
+        self.send_error(404)
+
+    def send_bytes(self, body, content_type, send_body):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_file(self, path, send_body):
+        if not os.path.isfile(path):
+            return self.send_error(404)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.send_media(len(data), 'application/octet-stream', send_body, content=data)
+
+    def send_media(self, size, content_type, send_body, content=None):
+        start, end = 0, size
+        byte_range = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if byte_range:
+            start = int(byte_range.group(1))
+            end = min(size, int(byte_range.group(2)) + 1) if byte_range.group(2) else size
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if send_body:
+            self.write_throttled(start, end, content)
+
+    def write_throttled(self, start, end, content=None):
+        sent = 0
+        began = None
+        position = start
+        while position < end:
+            chunk_end = min(end, position + WRITE_SIZE)
+            try:
+                self.wfile.write(content[position:chunk_end] if content is not None
+                                 else synthetic_bytes(position, chunk_end))
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            sent += chunk_end - position
+            position = chunk_end
+
+            if self.server.rate and sent > self.server.burst:
+                if began is None:
+                    began = time.monotonic()
+                    throttled_from = sent
+                # Sleep until the throttled part of the response is back on schedule
+                due = began + (sent - throttled_from) / self.server.rate
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, rate=None, burst=1024 ** 2, latency=0.0, media_dir=None):
+        super().__init__(address, MediaHandler)
+        self.rate = rate
+        self.burst = burst
+        self.latency = latency
+        self.media_dir = media_dir
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def video_info(self, video_id):
+        """Return the metadata the fake extractor expects for `video_id`, or None if it is unknown
+
+        Video IDs name the media: 'progressive-<bytes>', 'hls-<segments>x<bytes>',
+        'dash-<segments>x<bytes>', 'merge-<video>-<audio>' for <video>.mp4 and
+        <audio>.m4a in `media_dir`, and 'playlist-<count>-<video id>' for a playlist
+        repeating a video.
+        """
+        kind, _, spec = video_id.partition('-')
+        info = {'id': video_id, 'title': f'{kind} {spec}'}
+        if kind == 'progressive' and spec.isdigit():
+            info.update(duration=int(spec) * 8 // 4_000_000 or 1, formats=[{
+                'format_id': 'progressive', 'url': f'/progressive/{spec}.mp4', 'ext': 'mp4',
+                'width': 1280, 'height': 720, 'vcodec': 'avc1.64001f', 'acodec': 'mp4a.40.2',
+                'filesize': int(spec)}])
+        elif kind in ('hls', 'dash') and re.fullmatch(r'\d+x\d+', spec):
+            segments = int(spec.split('x')[0])
+            manifest = f'/hls/{spec}/index.m3u8' if kind == 'hls' else f'/dash/{spec}/manifest.mpd'
+            info.update(duration=segments * SEGMENT_SECONDS, manifest=manifest)
+        elif kind == 'merge' and self.media_dir and spec.count('-') == 1:
+            video, audio = spec.split('-')
+            info.update(formats=[
+                {'format_id': 'video', 'url': f'/media/{video}.mp4', 'ext': 'mp4', 'height': 720,
+                 'vcodec': 'avc1.64001f', 'acodec': 'none'},
+                {'format_id': 'audio', 'url': f'/media/{audio}.m4a', 'ext': 'm4a',
+                 'vcodec': 'none', 'acodec': 'mp4a.40.2'}])
+        elif kind == 'playlist' and re.fullmatch(r'\d+-[\w-]+', spec):
+            count, entry = spec.split('-', 1)
+            info.update(_type='playlist', entries=[entry] * int(count))
+        else:
+            return None
+        return info
+
+
+def start_server(rate=None, burst=1024 ** 2, latency=0.0, media_dir=None):
+    """Start a MediaServer on a free local port in a background thread"""
+    server = MediaServer(('127.0.0.1', 0), rate=rate, burst=burst, latency=latency, media_dir=media_dir)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve synthetic media for manual testing.")
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--rate', type=int, help="per-request rate after the burst, bytes/s")
+    parser.add_argument('--burst', type=int, default=1024 ** 2)
+    args = parser.parse_args()
+
+    server = MediaServer(('127.0.0.1', args.port), rate=args.rate, burst=args.burst)
+    print(f"Serving on {server.base_url}")
+    server.serve_forever()
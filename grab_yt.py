@@ -1,113 +1,824 @@
 import sys
-import yt_dlp as youtube_dl
-from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLineEdit, 
+import time
+
+# Reference point for --startup-time, taken before the heavy imports
+STARTED = time.perf_counter()
+
+from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLineEdit, QCheckBox,
                              QPushButton, QLabel, QFileDialog, QRadioButton, 
-                             QHBoxLayout, QProgressBar, QComboBox, QButtonGroup)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QRectF
-from PyQt5.QtGui import QFont, QPainter, QColor, QPen, QConicalGradient
+                             QHBoxLayout, QComboBox, QButtonGroup,
+                             QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QAbstractItemView, QMessageBox, QStyledItemDelegate,
+                             QDialog, QDialogButtonBox, QFormLayout, QMenu, QDoubleSpinBox,
+                             QPlainTextEdit)
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, QSignalBlocker, pyqtSignal, QRectF, QSize
+from PyQt5.QtGui import QFont, QPainter, QColor, QPen, QPixmap
+from grabyt.archive import DownloadArchive
+from grabyt.bandwidth import (PRIORITIES, PRIORITY_NAMES, PRIORITY_NORMAL, SHARING_FAIR, SHARING_STRICT,
+                              BandwidthScheduler, parse_schedule)
+from grabyt.cache import MetadataCache
+from grabyt.formats import AUDIO_REMUX_FORMATS, AUDIO_TRANSCODE_FORMATS
+from grabyt.journal import DownloadJournal, partial_bytes, resume_options
+from grabyt.metrics import PHASE_LABELS, MetricsRegistry, StartupTimer
+from grabyt.postprocess import PostProcessPool
+from grabyt.progress import UPDATE_INTERVAL, ProgressTracker, StageMeter, format_eta
+from grabyt.settings import EXTERNAL_DOWNLOADERS, PerformanceSettings, WatchSettings
+from grabyt.watch import QualityRule, WatchSession, parse_rules
+from grabyt.ytdl import warm_up
+from grabyt.core import (STATE_QUEUED, STATE_FETCHING, STATE_DONE, STATE_FAILED, STATE_CANCELLED, STATE_SKIPPED,
+                         ACTIVE_STATES, FINAL_STATES, DownloadTask,
+                         build_download_options, fetch_metadata, format_size, parse_url_list)
+
+
+# Progress ring colors
+TRACK_COLOR = "#45475a"
+PROGRESS_COLOR = "#a6e3a1"
+TEXT_COLOR = "#cdd6f4"
+ACTIVE_COLOR = "#89b4fa"
 
 
 class CircularProgressBar(QWidget):
-    """Custom circular/analog progress bar widget"""
-    def __init__(self, parent=None):
+    """Custom circular/analog progress bar widget
+
+    Pens and fonts are built once, repaints only happen when the displayed
+    percentage changes, and with `cache_background` the track ring is drawn
+    once into a pixmap that is reused until the widget is resized.
+    """
+    def __init__(self, parent=None, cache_background=False):
         super().__init__(parent)
         self.value = 0
+        self.cache_background = cache_background
         self.setMinimumSize(200, 200)
+
+        self._track_pen = QPen(QColor(TRACK_COLOR), 12, Qt.SolidLine, Qt.RoundCap)
+        self._progress_pen = QPen(QColor(PROGRESS_COLOR), 12, Qt.SolidLine, Qt.RoundCap)
+        self._text_color = QColor(TEXT_COLOR)
+        self._downloading_color = QColor(ACTIVE_COLOR)
+        self._complete_color = QColor(PROGRESS_COLOR)
+        self._percent_font = QFont("Inter", 32, QFont.Bold)
+        self._status_font = QFont("Inter", 11)
+        self._rect = QRectF()
+        self._status_rect = QRectF()
+        self._background = None
+        self._update_geometry()
         
     def setValue(self, value):
-        self.value = max(0, min(100, value))
+        value = max(0, min(100, int(value)))
+        if value == self.value:
+            return
+        self.value = value
         self.update()
-    
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
+
+    def resizeEvent(self, event):
+        self._update_geometry()
+        super().resizeEvent(event)
+
+    def _update_geometry(self):
         width = self.width()
         height = self.height()
         size = min(width, height)
-        
+
         # Center the circle
-        rect = QRectF((width - size) / 2 + 20, (height - size) / 2 + 20, size - 40, size - 40)
+        self._rect = QRectF((width - size) / 2 + 20, (height - size) / 2 + 20, size - 40, size - 40)
+        self._status_rect = QRectF(self._rect.x(), self._rect.y() + self._rect.height() / 2 + 25,
+                                   self._rect.width(), 30)
+        self._background = None
+
+    def _background_pixmap(self):
+        """Render the track ring once per size"""
+        if self._background is None:
+            ratio = self.devicePixelRatioF()
+            self._background = QPixmap(self.size() * ratio)
+            self._background.setDevicePixelRatio(ratio)
+            self._background.fill(Qt.transparent)
+            painter = QPainter(self._background)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(self._track_pen)
+            painter.drawArc(self._rect, 90 * 16, -360 * 16)
+            painter.end()
+        return self._background
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self._rect
         
         # Draw background circle
-        painter.setPen(QPen(QColor("#45475a"), 12, Qt.SolidLine, Qt.RoundCap))
-        painter.drawArc(rect, 90 * 16, -360 * 16)
+        if self.cache_background:
+            painter.drawPixmap(0, 0, self._background_pixmap())
+        else:
+            painter.setPen(self._track_pen)
+            painter.drawArc(rect, 90 * 16, -360 * 16)
         
-        # Draw progress arc with gradient
+        # Draw progress arc
         if self.value > 0:
-            gradient = QConicalGradient(rect.center(), 90)
-            gradient.setColorAt(0, QColor("#89b4fa"))
-            gradient.setColorAt(0.5, QColor("#a6e3a1"))
-            gradient.setColorAt(1, QColor("#89b4fa"))
-            
-            pen = QPen(QColor("#a6e3a1"), 12, Qt.SolidLine, Qt.RoundCap)
-            painter.setPen(pen)
-            
+            painter.setPen(self._progress_pen)
             span_angle = -int(self.value * 3.6 * 16)
             painter.drawArc(rect, 90 * 16, span_angle)
         
         # Draw percentage text
-        painter.setPen(QColor("#cdd6f4"))
-        font = QFont("Inter", 32, QFont.Bold)
-        painter.setFont(font)
+        painter.setPen(self._text_color)
+        painter.setFont(self._percent_font)
         painter.drawText(rect, Qt.AlignCenter, f"{self.value}%")
         
         # Draw status text below percentage
         if self.value > 0 and self.value < 100:
-            painter.setPen(QColor("#89b4fa"))
-            font = QFont("Inter", 11)
-            painter.setFont(font)
-            status_rect = QRectF(rect.x(), rect.y() + rect.height() / 2 + 25, rect.width(), 30)
-            painter.drawText(status_rect, Qt.AlignCenter, "Downloading...")
+            painter.setPen(self._downloading_color)
+            painter.setFont(self._status_font)
+            painter.drawText(self._status_rect, Qt.AlignCenter, "Downloading...")
         elif self.value == 100:
-            painter.setPen(QColor("#a6e3a1"))
-            font = QFont("Inter", 11)
-            painter.setFont(font)
-            status_rect = QRectF(rect.x(), rect.y() + rect.height() / 2 + 25, rect.width(), 30)
-            painter.drawText(status_rect, Qt.AlignCenter, "Complete!")
+            painter.setPen(self._complete_color)
+            painter.setFont(self._status_font)
+            painter.drawText(self._status_rect, Qt.AlignCenter, "Complete!")
+
+
+class ProgressRingDelegate(QStyledItemDelegate):
+    """Paints a small progress ring for a percentage stored in an item's data
+
+    One delegate serves every row of a view, so dozens of jobs cost no
+    widgets, and its pens and font are shared by all of them.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._track_pen = QPen(QColor(TRACK_COLOR), 3, Qt.SolidLine, Qt.RoundCap)
+        self._progress_pen = QPen(QColor(PROGRESS_COLOR), 3, Qt.SolidLine, Qt.RoundCap)
+        self._text_color = QColor(TEXT_COLOR)
+        self._font = QFont("Inter", 9)
+
+    def paint(self, painter, option, index):
+        value = index.data(Qt.DisplayRole) or 0
+        cell = option.rect
+        size = min(cell.height(), cell.width()) - 8
+        ring = QRectF(cell.x() + 6, cell.y() + (cell.height() - size) / 2, size, size)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self._track_pen)
+        painter.drawArc(ring, 90 * 16, -360 * 16)
+        if value > 0:
+            painter.setPen(self._progress_pen)
+            painter.drawArc(ring, 90 * 16, -int(value * 3.6 * 16))
+
+        painter.setPen(self._text_color)
+        painter.setFont(self._font)
+        text_rect = QRectF(ring.right() + 8, cell.y(), cell.right() - ring.right() - 8, cell.height())
+        painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignLeft, f"{value}%")
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(90, 30)
+
+
+class WarmUpThread(QThread):
+    """Imports yt-dlp and prepares its extractors while the window is already usable"""
+    ready = pyqtSignal()
+
+    def run(self):
+        try:
+            warm_up()
+        finally:
+            self.ready.emit()
 
 
 class QualityFetchThread(QThread):
     """Separate thread for fetching video qualities to prevent UI freezing"""
-    finished = pyqtSignal(list)
+    finished = pyqtSignal(list, dict)
+    playlist_found = pyqtSignal(str)
+    entries_found = pyqtSignal(list)
     error = pyqtSignal(str)
     
-    def __init__(self, url):
+    def __init__(self, url, metadata_cache=None):
         super().__init__()
         self.url = url
+        self.metadata_cache = metadata_cache
     
     def run(self):
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False
-            }
-            with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(self.url, download=False)
-                formats = info_dict.get('formats', [])
-                
-                # Get unique heights and sort them
-                heights = set()
-                for f in formats:
-                    if 'height' in f and f['height']:
-                        heights.add(f['height'])
-                
-                available_qualities = sorted(list(heights), reverse=True)
-                self.finished.emit(available_qualities)
+            available_qualities, info_dict = fetch_metadata(
+                self.url, self.metadata_cache,
+                on_playlist=self.playlist_found.emit,
+                on_entries=self.entries_found.emit)
+            # Hand over the full info dict so the download can skip re-extraction
+            self.finished.emit(available_qualities, info_dict)
         except Exception as e:
             self.error.emit(str(e))
 
 
+class UrlWatcher(QObject):
+    """Runs a `grabyt.watch.WatchSession` and delivers its callbacks as signals on the GUI thread"""
+    url_ready = pyqtSignal(str, object, str)
+    url_ignored = pyqtSignal(str, str)
+    batch_collected = pyqtSignal(list)
+
+    def __init__(self, settings, metadata_cache=None, parent=None):
+        super().__init__(parent)
+        self.folder = None
+        self.session = WatchSession(self.url_ready.emit, self.url_ignored.emit, self.batch_collected.emit,
+                                    rules=parse_rules(settings.rules), metadata_cache=metadata_cache,
+                                    debounce=settings.debounce)
+        self.session.start()
+
+    def apply_settings(self, settings):
+        self.session.rules = parse_rules(settings.rules)
+        self.session.batcher.debounce = settings.debounce
+
+    def add_text(self, text):
+        return self.session.add_text(text)
+
+    def watch_folder(self, folder):
+        self.folder = folder
+        self.session.watch_folder(folder)
+
+    def stop(self):
+        self.session.stop()
+
+
+class DownloadThread(QThread):
+    """Separate thread for downloading so the UI keeps repainting during transfers
+
+    Byte progress goes to `on_progress`, called on this thread, instead of a
+    signal per chunk; the UI polls it at a fixed rate. With a post-processing
+    pool the thread ends after `handed_off`, and `finished`, `error` or
+    `cancelled` follow from the pool once the file is done.
+    """
+    state = pyqtSignal(str)
+    status = pyqtSignal(str)
+    entries_found = pyqtSignal(list)
+    handed_off = pyqtSignal()
+    error = pyqtSignal(str)
+    finished = pyqtSignal(str)
+    skipped = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, url, download_options, info_dict=None, metadata_cache=None,
+                 journal=None, journal_id=None, on_progress=None, postprocess_pool=None,
+                 archive=None, skip_archived=True, metrics=None, bandwidth=None):
+        super().__init__()
+        self.task = DownloadTask(
+            url, download_options, info_dict, metadata_cache,
+            on_state=self.state.emit,
+            on_title=self.status.emit,
+            on_progress=on_progress,
+            on_entries=self.entries_found.emit,
+            journal=journal, journal_id=journal_id,
+            postprocess_pool=postprocess_pool,
+            archive=archive, skip_archived=skip_archived,
+            metrics=metrics, bandwidth=bandwidth)
+
+    def cancel(self):
+        self.task.cancel()
+
+    def pause(self):
+        self.task.pause()
+
+    def resume(self):
+        self.task.resume()
+
+    def is_paused(self):
+        return self.task.is_paused()
+
+    def _on_postprocessed(self, future, video_title):
+        if future.cancelled():
+            self.cancelled.emit()
+        elif future.exception():
+            self.error.emit(str(future.exception()))
+        else:
+            self.finished.emit(video_title)
+
+    def run(self):
+        try:
+            video_title = self.task.run()
+            future = self.task.postprocess_future
+            if self.task.archived:
+                self.skipped.emit(video_title)
+            elif future is None:
+                self.finished.emit(video_title)
+            else:
+                self.handed_off.emit()
+                future.add_done_callback(lambda future: self._on_postprocessed(future, video_title))
+        except Exception as e:
+            # Cancelling surfaces as yt-dlp's DownloadCancelled or whatever the interrupted transfer raised
+            if self.task.is_cancelled():
+                self.cancelled.emit()
+            else:
+                self.error.emit(str(e))
+
+
+class DownloadJob:
+    """A single URL in the download queue and its latest known progress"""
+    def __init__(self, job_id, url, download_options, info_dict=None):
+        self.job_id = job_id
+        self.url = url
+        self.download_options = download_options
+        self.info_dict = info_dict
+        self.title = url
+        self.state = STATE_QUEUED
+        self.percent = 0
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.speed = None
+        self.eta = None
+        self.error = ''
+        self.thread = None
+        self.paused = False
+        self.journal_id = None
+        # `grabyt.metrics.JobMetrics`, set by the queue
+        self.metrics = None
+        self.priority = PRIORITY_NORMAL
+        # `grabyt.bandwidth.BandwidthShare` while the job is downloading
+        self.bandwidth_share = None
+        # Paused by the queue to give its slot to a higher priority job
+        self.preempted = False
+        # Set once the download slot is free and only post-processing is left
+        self.handed_off = False
+        # A playlist or channel whose videos were queued as jobs of their own
+        self.is_playlist = False
+
+
+class DownloadQueue(QObject):
+    """Runs queued download jobs with at most `max_workers` downloads at once
+
+    Jobs leave their download slot when they hand their files to the
+    post-processing pool, so merging one video overlaps fetching the next.
+    Higher priority jobs start first and, with `preemptive`, pause a lower
+    priority download when every slot is taken; `bandwidth` splits the
+    total rate between the running ones by priority.
+    """
+    job_added = pyqtSignal(object)
+    job_updated = pyqtSignal(object)
+    progress_updated = pyqtSignal(list)
+    queue_finished = pyqtSignal()
+
+    def __init__(self, max_workers=3, metadata_cache=None, journal=None, postprocess_pool=None,
+                 archive=None, bandwidth=None, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers
+        self.bandwidth = bandwidth
+        self.preemptive = True
+        self.metadata_cache = metadata_cache
+        self.journal = journal
+        self.postprocess_pool = postprocess_pool
+        self.archive = archive
+        # Archived videos finish as skipped without touching the network
+        self.skip_archived = True
+        self.download_meter = StageMeter(max_workers)
+        stages = {'download': self.download_meter}
+        if postprocess_pool:
+            stages['postprocess'] = postprocess_pool.meter
+        self.metrics = MetricsRegistry(stages)
+        self.jobs = []
+        self.progress_tracker = ProgressTracker()
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(int(UPDATE_INTERVAL * 1000))
+        self.progress_timer.timeout.connect(self.poll_progress)
+        # While shutting down, cancelled jobs stay in the journal to be resumed later
+        self.shutting_down = False
+
+    def add(self, url, download_options, info_dict=None, title=None, journal_id=None,
+            priority=PRIORITY_NORMAL):
+        """Queue a URL and start it as soon as a worker slot is free"""
+        if not self.pending_jobs():
+            # Utilization is reported per batch
+            self.download_meter.reset()
+            if self.postprocess_pool:
+                self.postprocess_pool.meter.reset()
+        job = DownloadJob(len(self.jobs), url, download_options, info_dict)
+        job.priority = priority
+        if title:
+            job.title = title
+        job.metrics = self.metrics.new_job(url, title)
+        if self.journal:
+            job.journal_id = journal_id or self.journal.add(url, download_options, title)
+        self.jobs.append(job)
+        self.job_added.emit(job)
+        self._schedule()
+        return job
+
+    def set_max_workers(self, max_workers):
+        self.max_workers = max(1, max_workers)
+        self.download_meter.set_capacity(self.max_workers)
+        self._schedule()
+
+    def video_jobs(self):
+        """Return the jobs that download a video, leaving out playlists expanded into other jobs"""
+        return [job for job in self.jobs if not job.is_playlist]
+
+    def active_jobs(self):
+        return [job for job in self.jobs if job.state in ACTIVE_STATES]
+
+    def pending_jobs(self):
+        return [job for job in self.jobs if job.state not in FINAL_STATES]
+
+    def downloading_jobs(self):
+        """Return the active jobs that still hold a download slot"""
+        return [job for job in self.active_jobs() if not job.handed_off and not job.preempted]
+
+    def utilization(self):
+        """Return `StageMeter` snapshots of the download and post-processing stages"""
+        download = self.download_meter.snapshot()
+        download['waiting'] = sum(1 for job in self.jobs if job.state == STATE_QUEUED)
+        postprocess = self.postprocess_pool.meter.snapshot() if self.postprocess_pool else None
+        return download, postprocess
+
+    def is_paused(self):
+        active = self.downloading_jobs()
+        return bool(active) and all(job.paused for job in active)
+
+    def pause_all(self):
+        for job in self.downloading_jobs():
+            job.paused = True
+            job.thread.pause()
+            self.job_updated.emit(job)
+
+    def resume_all(self):
+        for job in self.downloading_jobs():
+            job.paused = False
+            job.thread.resume()
+            self.job_updated.emit(job)
+
+    def pause_job(self, job):
+        if job.thread and job.state in ACTIVE_STATES and not job.paused:
+            job.paused = True
+            job.thread.pause()
+            self.job_updated.emit(job)
+
+    def resume_job(self, job):
+        if job.paused:
+            job.paused = False
+            if not job.preempted:
+                job.thread.resume()
+            self.job_updated.emit(job)
+
+    def set_priority(self, job, priority):
+        """Change a job's priority, which may start, preempt or resume downloads"""
+        job.priority = priority
+        if job.bandwidth_share:
+            job.bandwidth_share.set_priority(priority)
+        self.job_updated.emit(job)
+        self._schedule()
+
+    def cancel_all(self):
+        """Cancel running jobs and drop the ones still waiting"""
+        for job in self.jobs:
+            if job.state == STATE_QUEUED:
+                self._set_state(job, STATE_CANCELLED)
+                self._forget(job)
+            elif job.state in ACTIVE_STATES:
+                job.thread.cancel()
+        # Closing the window isn't the queue finishing; the status line is left as it was
+        if not self.pending_jobs() and not self.shutting_down:
+            self.queue_finished.emit()
+
+    def shutdown(self):
+        """Stop every job but keep them journaled so the next start can resume them"""
+        self.shutting_down = True
+        self.cancel_all()
+        self.wait_all()
+
+    def wait_all(self):
+        for job in self.jobs:
+            if job.thread:
+                job.thread.wait()
+
+    def _schedule(self):
+        """Start queued jobs until every worker slot is busy"""
+        for job in self.jobs:
+            # Release threads that have fully stopped
+            if job.thread and job.state in FINAL_STATES and job.thread.isFinished():
+                job.thread = None
+
+        running = self.downloading_jobs()
+        waiting = [job for job in self.jobs if job.state == STATE_QUEUED or job.preempted]
+        # Highest priority first, then preempted jobs, then in the order they were added
+        waiting.sort(key=lambda job: (-job.priority, not job.preempted, job.job_id))
+        for job in waiting:
+            if len(running) >= self.max_workers:
+                victims = [other for other in running if other.priority < job.priority and not other.paused]
+                if not self.preemptive or not victims:
+                    break
+                victim = min(victims, key=lambda other: (other.priority, -other.job_id))
+                self._preempt(victim)
+                running.remove(victim)
+            if job.preempted:
+                self._resume_preempted(job)
+            else:
+                self._start(job)
+            running.append(job)
+
+    def _preempt(self, job):
+        """Hold a running download so a higher priority job can have its slot"""
+        job.preempted = True
+        job.thread.pause()
+        self.download_meter.stop()
+        self.job_updated.emit(job)
+
+    def _resume_preempted(self, job):
+        job.preempted = False
+        if not job.paused:
+            job.thread.resume()
+        self.download_meter.start()
+        self.job_updated.emit(job)
+
+    def _start(self, job):
+        job.bandwidth_share = self.bandwidth.register(job.priority) if self.bandwidth else None
+        thread = DownloadThread(job.url, job.download_options, job.info_dict, self.metadata_cache,
+                                self.journal, job.journal_id,
+                                on_progress=lambda d, key=job.job_id: self.progress_tracker.update(key, d),
+                                postprocess_pool=self.postprocess_pool,
+                                archive=self.archive, skip_archived=self.skip_archived,
+                                metrics=job.metrics, bandwidth=job.bandwidth_share)
+        thread.state.connect(lambda state, job=job: self._set_state(job, state))
+        thread.status.connect(lambda title, job=job: self._on_title(job, title))
+        thread.entries_found.connect(lambda entries, job=job: self._on_entries(job, entries))
+        thread.handed_off.connect(lambda job=job: self._on_handed_off(job))
+        thread.finished.connect(lambda title, job=job: self._on_done(job, STATE_DONE, title))
+        thread.skipped.connect(lambda title, job=job: self._on_done(job, STATE_SKIPPED, title))
+        thread.cancelled.connect(lambda job=job: self._on_done(job, STATE_CANCELLED))
+        thread.error.connect(lambda msg, job=job: self._on_error(job, msg))
+        job.thread = thread
+        job.info_dict = None
+        job.state = STATE_FETCHING
+        self.download_meter.start()
+        thread.start()
+        if not self.progress_timer.isActive():
+            self.progress_timer.start()
+
+    def poll_progress(self):
+        """Apply progress collected since the last tick and report the jobs that moved"""
+        changed = self.progress_tracker.changed()
+        jobs = []
+        for job_id, d in changed.items():
+            job = self.jobs[job_id]
+            if job.state in FINAL_STATES:
+                continue
+            job.downloaded_bytes = d['downloaded_bytes']
+            job.total_bytes = d['total_bytes']
+            job.percent = d['percent']
+            job.speed = d['speed']
+            job.eta = d['eta']
+            jobs.append(job)
+
+        if jobs:
+            self.progress_updated.emit(jobs)
+        if not self.active_jobs():
+            self.progress_timer.stop()
+
+    def _set_state(self, job, state):
+        # Late signals from a worker must not overwrite a final state
+        if job.state in FINAL_STATES:
+            return
+        job.state = state
+        if state in FINAL_STATES:
+            job.metrics.finish(state)
+        self.job_updated.emit(job)
+
+    def _on_title(self, job, title):
+        job.title = title
+        self.job_updated.emit(job)
+
+    def _on_entries(self, job, entries):
+        """Queue the videos of a playlist job with the playlist's options"""
+        job.is_playlist = True
+        # Entries resumed from the journal next to their half-listed playlist are queued already
+        queued = {other.url for other in self.jobs if other.state not in (STATE_FAILED, STATE_CANCELLED)}
+        for entry in entries:
+            if entry['url'] not in queued:
+                queued.add(entry['url'])
+                self.add(entry['url'], job.download_options, title=entry['title'], priority=job.priority)
+
+    def _on_handed_off(self, job):
+        """Free the job's download slot while the post-processing pool finishes it"""
+        job.handed_off = True
+        self.download_meter.stop()
+        self._schedule()
+
+    def _forget(self, job):
+        """Drop a finished job from the journal"""
+        if self.journal and job.journal_id and not self.shutting_down:
+            self.journal.remove(job.journal_id)
+
+    def _on_error(self, job, error_msg):
+        job.error = error_msg
+        self._on_done(job, STATE_FAILED)
+
+    def _on_done(self, job, state, title=None):
+        if title:
+            job.title = title
+        if state in (STATE_DONE, STATE_SKIPPED):
+            job.percent = 100
+        job.speed = None
+        job.eta = None
+        job.paused = False
+        if not job.handed_off and not job.preempted:
+            self.download_meter.stop()
+        job.preempted = False
+        self.progress_tracker.remove(job.job_id)
+        self._set_state(job, state)
+        self._forget(job)
+        self._schedule()
+        if not self.pending_jobs() and not self.shutting_down:
+            self.queue_finished.emit()
+
+
+class PerformanceDialog(QDialog):
+    """Edit the network performance settings used for new downloads and the shared bandwidth limits"""
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance Settings")
+        self.setMinimumWidth(420)
+
+        layout = QFormLayout(self)
+        layout.setSpacing(12)
+
+        self.fragments_spinbox = QSpinBox(self)
+        self.fragments_spinbox.setRange(1, 32)
+        self.fragments_spinbox.setValue(settings.concurrent_fragments)
+        layout.addRow("Concurrent fragments:", self.fragments_spinbox)
+
+        self.chunk_spinbox = QSpinBox(self)
+        # In KB, so sub-MB sizes set with the CLI's --http-chunk-size survive a round trip
+        self.chunk_spinbox.setRange(0, 1024 ** 2)
+        self.chunk_spinbox.setSingleStep(1024)
+        self.chunk_spinbox.setSuffix(" KB")
+        self.chunk_spinbox.setSpecialValueText("Off")
+        self.chunk_spinbox.setValue((settings.http_chunk_size or 0) // 1024)
+        layout.addRow("HTTP chunk size:", self.chunk_spinbox)
+
+        self.buffer_spinbox = QSpinBox(self)
+        self.buffer_spinbox.setRange(0, 16 * 1024)
+        self.buffer_spinbox.setSuffix(" KB")
+        self.buffer_spinbox.setSpecialValueText("Automatic")
+        self.buffer_spinbox.setValue((settings.buffer_size or 0) // 1024)
+        layout.addRow("Buffer size:", self.buffer_spinbox)
+
+        self.rate_spinbox = QSpinBox(self)
+        self.rate_spinbox.setRange(0, 10 * 1024 ** 2)
+        self.rate_spinbox.setSuffix(" KB/s")
+        self.rate_spinbox.setSpecialValueText("Unlimited")
+        self.rate_spinbox.setValue((settings.rate_limit or 0) // 1024)
+        layout.addRow("Rate limit per download:", self.rate_spinbox)
+
+        self.total_rate_spinbox = QSpinBox(self)
+        self.total_rate_spinbox.setRange(0, 10 * 1024 ** 2)
+        self.total_rate_spinbox.setSuffix(" KB/s")
+        self.total_rate_spinbox.setSpecialValueText("Unlimited")
+        self.total_rate_spinbox.setValue((settings.total_rate_limit or 0) // 1024)
+        layout.addRow("Total rate limit:", self.total_rate_spinbox)
+
+        self.schedule_input = QLineEdit(", ".join(settings.rate_schedule), self)
+        self.schedule_input.setPlaceholderText("e.g. 09:00-18:00=2M, 22:00-06:00=0")
+        self.schedule_input.setToolTip("Total rate limits for times of day; 0 means unlimited")
+        layout.addRow("Time-of-day limits:", self.schedule_input)
+
+        self.sharing_combobox = QComboBox(self)
+        self.sharing_combobox.addItem("Weighted by priority", SHARING_FAIR)
+        self.sharing_combobox.addItem("Highest priority first", SHARING_STRICT)
+        self.sharing_combobox.setCurrentIndex(max(0, self.sharing_combobox.findData(settings.bandwidth_sharing)))
+        layout.addRow("Bandwidth sharing:", self.sharing_combobox)
+
+        self.downloader_combobox = QComboBox(self)
+        self.downloader_combobox.addItem("Built-in (yt-dlp)", None)
+        for name in EXTERNAL_DOWNLOADERS:
+            self.downloader_combobox.addItem(name, name)
+        self.downloader_combobox.setCurrentIndex(max(0, self.downloader_combobox.findData(settings.external_downloader)))
+        layout.addRow("Downloader:", self.downloader_combobox)
+
+        self.connections_spinbox = QSpinBox(self)
+        self.connections_spinbox.setRange(1, 16)
+        self.connections_spinbox.setValue(settings.connections)
+        layout.addRow("Connections (aria2c):", self.connections_spinbox)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def rate_schedule(self):
+        return [window.strip() for window in self.schedule_input.text().split(',') if window.strip()]
+
+    def accept(self):
+        try:
+            parse_schedule(self.rate_schedule())
+        except ValueError as e:
+            QMessageBox.warning(self, "Performance Settings", str(e))
+            return
+        super().accept()
+
+    def settings(self):
+        """Return the settings as edited"""
+        return PerformanceSettings(
+            concurrent_fragments=self.fragments_spinbox.value(),
+            http_chunk_size=self.chunk_spinbox.value() * 1024 or None,
+            buffer_size=self.buffer_spinbox.value() * 1024 or None,
+            rate_limit=self.rate_spinbox.value() * 1024 or None,
+            external_downloader=self.downloader_combobox.currentData(),
+            connections=self.connections_spinbox.value(),
+            total_rate_limit=self.total_rate_spinbox.value() * 1024 or None,
+            rate_schedule=self.rate_schedule(),
+            bandwidth_sharing=self.sharing_combobox.currentData())
+
+
+class WatchRulesDialog(QDialog):
+    """Edit the quality rules and debounce window of watch mode"""
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Watch Rules")
+        self.setMinimumWidth(480)
+        self.folder = settings.folder
+
+        layout = QFormLayout(self)
+        layout.setSpacing(12)
+
+        self.rules_input = QPlainTextEdit("\n".join(settings.rules), self)
+        self.rules_input.setPlaceholderText("music.youtube.com=audio:opus\n*.twitch.tv=720@low\n*=1080")
+        self.rules_input.setToolTip("One rule per line, PATTERN=QUALITY[@PRIORITY]; the first match wins.\n"
+                                    "PATTERN is a host like *.youtube.com, QUALITY is best, a height like 1080,\n"
+                                    "audio or audio:FORMAT, PRIORITY is low, normal or high.\n"
+                                    "URLs no rule matches use the type and priority selected in the window.")
+        layout.addRow("Quality rules:", self.rules_input)
+
+        self.debounce_spinbox = QDoubleSpinBox(self)
+        self.debounce_spinbox.setRange(0, 60)
+        self.debounce_spinbox.setSingleStep(0.5)
+        self.debounce_spinbox.setSuffix(" s")
+        self.debounce_spinbox.setValue(settings.debounce)
+        self.debounce_spinbox.setToolTip("Queue collected URLs once none arrived for this long")
+        layout.addRow("Batch after:", self.debounce_spinbox)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def rules(self):
+        return [rule.strip() for rule in self.rules_input.toPlainText().splitlines() if rule.strip()]
+
+    def accept(self):
+        try:
+            parse_rules(self.rules())
+        except ValueError as e:
+            QMessageBox.warning(self, "Watch Rules", str(e))
+            return
+        super().accept()
+
+    def settings(self):
+        """Return the settings as edited"""
+        return WatchSettings(folder=self.folder, debounce=self.debounce_spinbox.value(), rules=self.rules())
+
+
 class VideoDownloaderApp(QWidget):
-    def __init__(self):
+    def __init__(self, startup=None):
         super().__init__()
+        # `StartupTimer` for --startup-time, which exits once yt-dlp is ready
+        self.startup = startup
+        self.warm_up_thread = None
         self.download_folder = None
+        self.metadata_cache = MetadataCache()
+        self.journal = DownloadJournal()
+        self.archive = DownloadArchive()
+        self.performance_settings = PerformanceSettings.load()
+        self.bandwidth = BandwidthScheduler.from_settings(self.performance_settings)
+        self.watch_settings = WatchSettings.load()
+        # `UrlWatcher`, created when watching is first switched on
+        self.watcher = None
+        self.watching_clipboard = False
+        # Audio transcodes run here, not in the download slots
+        self.postprocess_pool = PostProcessPool()
+        # Entries of the last fetched playlist, streamed in while it is listed
+        self.playlist = None
+        self.queue = DownloadQueue(max_workers=3, metadata_cache=self.metadata_cache,
+                                   journal=self.journal, postprocess_pool=self.postprocess_pool,
+                                   archive=self.archive, bandwidth=self.bandwidth, parent=self)
+        self.queue.job_added.connect(self.on_job_added)
+        self.queue.job_updated.connect(self.show_progress)
+        self.queue.progress_updated.connect(self.on_progress_updated)
+        self.queue.queue_finished.connect(self.on_queue_finished)
         self.initUI()
+        if self.startup:
+            self.startup.mark("window built")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startup:
+            self.startup.mark("first paint")
+
+    def finish_startup(self):
+        """Runs once the window is up: load yt-dlp in the background and offer to resume"""
+        self.warm_up_thread = WarmUpThread(self)
+        self.warm_up_thread.ready.connect(self.on_warmed_up)
+        self.warm_up_thread.start()
+        if not self.startup:
+            self.offer_resume()
+
+    def on_warmed_up(self):
+        if self.startup:
+            self.startup.mark("yt-dlp ready")
+            print(f"startup: {self.startup.report()}", file=sys.stderr)
+            self.close()
 
     def initUI(self):
         self.setWindowTitle("Video Downloader")
-        self.setGeometry(100, 100, 750, 650)
+        self.setGeometry(100, 100, 750, 900)
         
         # Set default font for the application
         app_font = QFont("Inter", 10)
@@ -209,6 +920,28 @@ class VideoDownloaderApp(QWidget):
                 height: 8px;
                 border-radius: 4px;
             }
+            QSpinBox {
+                background-color: #313244;
+                border: 2px solid #45475a;
+                border-radius: 8px;
+                padding: 6px;
+                color: #cdd6f4;
+                font-size: 14px;
+            }
+            QTableWidget {
+                background-color: #181825;
+                border: 2px solid #45475a;
+                border-radius: 8px;
+                gridline-color: #313244;
+                font-size: 13px;
+            }
+            QHeaderView::section {
+                background-color: #313244;
+                color: #cdd6f4;
+                border: none;
+                padding: 6px;
+                font-weight: 600;
+            }
         """)
 
         layout = QVBoxLayout()
@@ -231,13 +964,18 @@ class VideoDownloaderApp(QWidget):
         layout.addWidget(self.url_label)
 
         self.url_input = QLineEdit(self)
-        self.url_input.setPlaceholderText("Paste YouTube or video URL here...")
+        self.url_input.setPlaceholderText("Paste one or more YouTube or video URLs here...")
         layout.addWidget(self.url_input)
 
-        # Fetch Quality Button
+        # Fetch Quality / Load List Buttons
+        fetch_layout = QHBoxLayout()
         self.fetch_quality_button = QPushButton('🔍 Fetch Available Qualities', self)
         self.fetch_quality_button.clicked.connect(self.fetch_qualities)
-        layout.addWidget(self.fetch_quality_button)
+        self.load_list_button = QPushButton('📄 Load URL List', self)
+        self.load_list_button.clicked.connect(self.load_url_list)
+        fetch_layout.addWidget(self.fetch_quality_button, 1)
+        fetch_layout.addWidget(self.load_list_button)
+        layout.addLayout(fetch_layout)
 
         # Download Type Selection
         type_label = QLabel("Download Type:")
@@ -256,10 +994,20 @@ class VideoDownloaderApp(QWidget):
         
         self.sound_only_radio.toggled.connect(self.on_type_changed)
 
+        # Remux formats keep the source audio, transcode formats re-encode it
+        self.audio_format_combobox = QComboBox(self)
+        self.audio_format_combobox.addItem("Original audio (no re-encode)", 'best')
+        for audio_format in AUDIO_REMUX_FORMATS[1:]:
+            self.audio_format_combobox.addItem(f"{audio_format.upper()} (no re-encode)", audio_format)
+        for audio_format in AUDIO_TRANSCODE_FORMATS:
+            self.audio_format_combobox.addItem(f"{audio_format.upper()} (re-encode)", audio_format)
+        self.audio_format_combobox.setEnabled(False)
+
         type_layout = QHBoxLayout()
         type_layout.addWidget(self.video_and_audio_radio)
         type_layout.addWidget(self.sound_only_radio)
         type_layout.addStretch()
+        type_layout.addWidget(self.audio_format_combobox)
         layout.addLayout(type_layout)
 
         # Video Quality Selection
@@ -301,6 +1049,54 @@ class VideoDownloaderApp(QWidget):
         location_layout.addWidget(self.download_location_button)
         layout.addLayout(location_layout)
 
+        # Parallel Downloads
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Parallel downloads:")
+        self.workers_spinbox = QSpinBox(self)
+        self.workers_spinbox.setRange(1, 16)
+        self.workers_spinbox.setValue(self.queue.max_workers)
+        self.workers_spinbox.valueChanged.connect(self.queue.set_max_workers)
+        self.performance_button = QPushButton('⚙️  Performance', self)
+        self.performance_button.clicked.connect(self.edit_performance_settings)
+        self.skip_archived_checkbox = QCheckBox("Skip already downloaded", self)
+        self.skip_archived_checkbox.setChecked(self.queue.skip_archived)
+        self.skip_archived_checkbox.toggled.connect(self.set_skip_archived)
+        priority_label = QLabel("Priority:")
+        self.priority_combobox = QComboBox(self)
+        for name, priority in PRIORITIES.items():
+            self.priority_combobox.addItem(name.capitalize(), priority)
+        self.priority_combobox.setCurrentIndex(self.priority_combobox.findData(PRIORITY_NORMAL))
+        self.priority_combobox.setToolTip("Priority of new downloads: higher ones start first and get more bandwidth")
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_spinbox)
+        workers_layout.addSpacing(16)
+        workers_layout.addWidget(priority_label)
+        workers_layout.addWidget(self.priority_combobox)
+        workers_layout.addSpacing(16)
+        workers_layout.addWidget(self.skip_archived_checkbox)
+        workers_layout.addStretch()
+        workers_layout.addWidget(self.performance_button)
+        layout.addLayout(workers_layout)
+
+        # Watch mode: queue URLs copied to the clipboard or dropped into a folder
+        watch_layout = QHBoxLayout()
+        watch_label = QLabel("Watch:")
+        self.watch_clipboard_checkbox = QCheckBox("Clipboard", self)
+        self.watch_clipboard_checkbox.setToolTip("Queue video URLs as they are copied")
+        self.watch_clipboard_checkbox.toggled.connect(self.set_watch_clipboard)
+        self.watch_folder_button = QPushButton('📥 Watch Folder', self)
+        self.watch_folder_button.setToolTip("Queue the URLs in .txt and .url files dropped into a folder")
+        self.watch_folder_button.clicked.connect(self.toggle_watch_folder)
+        self.watch_rules_button = QPushButton('📋 Rules', self)
+        self.watch_rules_button.setToolTip("Quality and priority for watched URLs by site")
+        self.watch_rules_button.clicked.connect(self.edit_watch_rules)
+        watch_layout.addWidget(watch_label)
+        watch_layout.addWidget(self.watch_clipboard_checkbox)
+        watch_layout.addStretch()
+        watch_layout.addWidget(self.watch_folder_button)
+        watch_layout.addWidget(self.watch_rules_button)
+        layout.addLayout(watch_layout)
+
         # Status and File Size
         self.status_label = QLabel('')
         self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa; margin-top: 12px;")
@@ -310,10 +1106,14 @@ class VideoDownloaderApp(QWidget):
         self.file_size_label.setStyleSheet("font-size: 13px; color: #a6e3a1;")
         layout.addWidget(self.file_size_label)
 
+        self.pipeline_label = QLabel('')
+        self.pipeline_label.setStyleSheet("font-size: 12px; color: #6c7086;")
+        layout.addWidget(self.pipeline_label)
+
         # Circular Progress Bar
         progress_container = QHBoxLayout()
         progress_container.addStretch()
-        self.progress_bar = CircularProgressBar(self)
+        self.progress_bar = CircularProgressBar(self, cache_background=True)
         progress_container.addWidget(self.progress_bar)
         progress_container.addStretch()
         layout.addLayout(progress_container)
@@ -341,11 +1141,66 @@ class VideoDownloaderApp(QWidget):
         self.download_button.clicked.connect(self.download_video)
         layout.addWidget(self.download_button)
 
+        # Download Queue
+        self.job_table = QTableWidget(0, 4, self)
+        self.job_table.setHorizontalHeaderLabels(["Title", "Status", "Progress", "Speed"])
+        self.job_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.job_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.job_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        self.job_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Fixed)
+        self.job_table.setColumnWidth(2, 90)
+        self.job_table.setItemDelegateForColumn(2, ProgressRingDelegate(self.job_table))
+        self.job_table.verticalHeader().setVisible(False)
+        self.job_table.verticalHeader().setDefaultSectionSize(30)
+        self.job_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.job_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.job_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.job_table.setMinimumHeight(160)
+        self.job_table.itemSelectionChanged.connect(self.update_metrics_label)
+        self.job_table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.job_table.customContextMenuRequested.connect(self.show_job_menu)
+        layout.addWidget(self.job_table)
+
+        # Timing breakdown of the selected job
+        self.metrics_label = QLabel('Select a download to see where its time went')
+        self.metrics_label.setStyleSheet("font-size: 12px; color: #6c7086;")
+        self.metrics_label.setWordWrap(True)
+        layout.addWidget(self.metrics_label)
+
+        # Pause / Cancel Buttons
+        control_layout = QHBoxLayout()
+        self.pause_button = QPushButton('⏸  Pause', self)
+        self.pause_button.setEnabled(False)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.cancel_button = QPushButton('🛑 Cancel', self)
+        self.cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #f38ba8;
+                color: #1e1e2e;
+            }
+            QPushButton:hover {
+                background-color: #eba0ac;
+            }
+            QPushButton:disabled {
+                background-color: #45475a;
+                color: #6c7086;
+            }
+        """)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_download)
+        self.export_metrics_button = QPushButton('📊 Export Metrics', self)
+        self.export_metrics_button.clicked.connect(self.export_metrics)
+        control_layout.addWidget(self.pause_button)
+        control_layout.addWidget(self.cancel_button)
+        control_layout.addWidget(self.export_metrics_button)
+        layout.addLayout(control_layout)
+
         layout.addStretch()
         self.setLayout(layout)
 
     def on_type_changed(self):
         """Enable/disable quality selection based on download type"""
+        self.audio_format_combobox.setEnabled(self.sound_only_radio.isChecked())
         if self.sound_only_radio.isChecked():
             self.quality_combobox.setEnabled(False)
             self.quality_label.setStyleSheet("font-size: 15px; font-weight: 600; margin-top: 10px; color: #6c7086;")
@@ -369,12 +1224,15 @@ class VideoDownloaderApp(QWidget):
         self.fetch_quality_button.setText("⏳ Fetching...")
         
         # Start quality fetch in separate thread
-        self.fetch_thread = QualityFetchThread(url)
+        self.playlist = None
+        self.fetch_thread = QualityFetchThread(url, self.metadata_cache)
         self.fetch_thread.finished.connect(self.on_qualities_fetched)
+        self.fetch_thread.playlist_found.connect(self.on_playlist_found)
+        self.fetch_thread.entries_found.connect(self.on_entries_found)
         self.fetch_thread.error.connect(self.on_fetch_error)
         self.fetch_thread.start()
 
-    def on_qualities_fetched(self, qualities):
+    def on_qualities_fetched(self, qualities, info_dict):
         """Handle successfully fetched qualities"""
         self.fetch_quality_button.setEnabled(True)
         self.fetch_quality_button.setText("🔍 Fetch Available Qualities")
@@ -383,19 +1241,43 @@ class VideoDownloaderApp(QWidget):
         
         if qualities:
             self.quality_combobox.addItem("Select Quality")
-            for quality in qualities:
-                self.quality_combobox.addItem(f"{quality}p")
+            for choice in qualities:
+                label = choice.describe()
+                if choice.size:
+                    label += f"  ~{format_size(choice.size)}"
+                self.quality_combobox.addItem(label, choice)
             
             if not self.sound_only_radio.isChecked():
                 self.quality_combobox.setEnabled(True)
             
-            self.status_label.setText(f"✅ Found {len(qualities)} quality options")
+            if info_dict.get('_type') == 'playlist':
+                self.status_label.setText(f"✅ Found {info_dict['playlist_count']} videos in {info_dict['title']}")
+            else:
+                self.status_label.setText(f"✅ Found {len(qualities)} quality options for {info_dict.get('title', 'Unknown')}")
             self.status_label.setStyleSheet("font-size: 14px; color: #a6e3a1;")
         else:
             self.quality_combobox.addItem("No qualities found")
             self.status_label.setText("⚠️  No video qualities found")
             self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
 
+    def on_playlist_found(self, title):
+        """Start collecting the entries of a playlist or channel"""
+        self.playlist = {'url': self.fetch_thread.url, 'title': title, 'entries': [], 'download_options': None,
+                         'priority': PRIORITY_NORMAL}
+        self.fetch_quality_button.setText("⏳ Listing...")
+        self.status_label.setText(f"📃 Listing {title}...")
+        self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa;")
+
+    def on_entries_found(self, entries):
+        """Collect streamed playlist entries, queueing them if a download was requested"""
+        self.playlist['entries'].extend(entries)
+        if self.playlist['download_options'] is not None:
+            for entry in entries:
+                self.queue.add(entry['url'], self.playlist['download_options'], title=entry['title'],
+                               priority=self.playlist['priority'])
+        elif not self.queue.active_jobs():
+            self.status_label.setText(f"📃 Found {len(self.playlist['entries'])} videos in {self.playlist['title']}...")
+
     def on_fetch_error(self, error_msg):
         """Handle quality fetch errors"""
         self.fetch_quality_button.setEnabled(True)
@@ -410,116 +1292,436 @@ class VideoDownloaderApp(QWidget):
             self.download_folder = folder
             self.folder_path_label.setText(f"📂 {folder}")
             self.folder_path_label.setStyleSheet("font-size: 13px; color: #a6e3a1;")
+            # Deleted files should be downloaded again rather than skipped
+            self.archive.reconcile(folder)
         else:
             self.download_folder = None
             self.folder_path_label.setText("No folder selected")
             self.folder_path_label.setStyleSheet("font-size: 13px; color: #f38ba8; font-style: italic;")
 
-    def download_video(self):
-        """Start video download"""
-        url = self.url_input.text().strip()
-
-        self.status_label.setText('')
-        self.file_size_label.setText('')
-        self.progress_bar.setValue(0)
+    def load_url_list(self):
+        """Queue every URL from a text file, one per line"""
+        path, _ = QFileDialog.getOpenFileName(self, "Load URL List", "", "Text Files (*.txt);;All Files (*)")
+        if not path:
+            return
 
-        if not url:
-            self.status_label.setText("⚠️  Please enter a valid URL")
+        try:
+            with open(path, encoding='utf-8') as f:
+                urls = parse_url_list(f)
+        except OSError as e:
+            self.status_label.setText(f"❌ Error: {str(e)}")
             self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
             return
 
+        self.enqueue_urls(urls)
+
+    def download_video(self):
+        """Queue every URL in the input box for download"""
+        self.enqueue_urls(self.url_input.text().split())
+
+    def build_download_options(self):
+        """Build yt-dlp options from the current UI selection, or None if incomplete"""
         if not self.download_folder:
             self.status_label.setText("⚠️  Please select a download location")
             self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
+            return None
+
+        audio_only = self.sound_only_radio.isChecked()
+        format_spec = None
+        if not audio_only and self.quality_combobox.isEnabled():
+            if self.quality_combobox.currentIndex() == 0:
+                self.status_label.setText("⚠️  Please select a quality option")
+                self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
+                return None
+            format_spec = self.quality_combobox.currentData().format_spec
+        # Without fetched qualities (e.g. a loaded URL list) the best available is taken
+
+        return build_download_options(self.download_folder, audio_only, format_spec=format_spec,
+                                      audio_format=self.audio_format_combobox.currentData(),
+                                      performance=self.performance_settings)
+
+    def set_skip_archived(self, skip):
+        """Choose whether archived videos are skipped by downloads queued from now on"""
+        self.queue.skip_archived = skip
+
+    def edit_performance_settings(self):
+        """Edit and save the settings applied to downloads queued from now on"""
+        dialog = PerformanceDialog(self.performance_settings, self)
+        if dialog.exec_() != QDialog.Accepted:
             return
 
-        if not self.sound_only_radio.isChecked() and self.quality_combobox.currentIndex() == 0:
-            self.status_label.setText("⚠️  Please select a quality option")
+        self.performance_settings = dialog.settings()
+        # Unlike the per-download settings, the bandwidth limits apply to running jobs too
+        self.bandwidth.apply_settings(self.performance_settings)
+        self.update_pipeline_label()
+        try:
+            self.performance_settings.save()
+        except OSError as e:
+            self.status_label.setText(f"❌ Error: {str(e)}")
+            self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
+
+    def start_watcher(self):
+        """Return the running `UrlWatcher`, or None without a download folder to save into"""
+        if not self.download_folder:
+            self.status_label.setText("⚠️  Please select a download location before watching")
             self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
+            return None
+        if self.watcher is None:
+            self.watcher = UrlWatcher(self.watch_settings, self.metadata_cache, self)
+            self.watcher.url_ready.connect(self.on_watched_url)
+            self.watcher.url_ignored.connect(self.on_watched_url_ignored)
+            self.watcher.batch_collected.connect(self.on_watch_batch)
+        return self.watcher
+
+    def set_watch_clipboard(self, watching):
+        """Start or stop queueing URLs copied to the clipboard"""
+        clipboard = QApplication.clipboard()
+        if not watching:
+            if self.watching_clipboard:
+                clipboard.dataChanged.disconnect(self.on_clipboard_changed)
+                self.watching_clipboard = False
+            return
+        if self.start_watcher() is None:
+            with QSignalBlocker(self.watch_clipboard_checkbox):
+                self.watch_clipboard_checkbox.setChecked(False)
+            return
+        # Only what is copied from now on; the current contents are old news
+        if not self.watching_clipboard:
+            clipboard.dataChanged.connect(self.on_clipboard_changed)
+            self.watching_clipboard = True
+        self.status_label.setText("👀 Watching the clipboard for video URLs")
+        self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa;")
+
+    def on_clipboard_changed(self):
+        self.watcher.add_text(QApplication.clipboard().text())
+
+    def toggle_watch_folder(self):
+        """Pick a folder to watch for drop files, or stop watching it"""
+        if self.watcher and self.watcher.folder:
+            self.watcher.watch_folder(None)
+            self.watch_folder_button.setText('📥 Watch Folder')
+            self.status_label.setText("⏹  Stopped watching the folder")
+            self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa;")
+            return
+        if self.start_watcher() is None:
             return
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder to Watch", self.watch_settings.folder or "")
+        if not folder:
+            return
+
+        self.watcher.watch_folder(folder)
+        self.watch_folder_button.setText('⏹  Stop Watching')
+        self.status_label.setText(f"👀 Watching {folder} for .txt and .url files")
+        self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa;")
+        self.watch_settings.folder = folder
+        self.save_watch_settings()
+
+    def edit_watch_rules(self):
+        """Edit the quality rules applied to watched URLs from now on"""
+        dialog = WatchRulesDialog(self.watch_settings, self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+
+        self.watch_settings = dialog.settings()
+        if self.watcher:
+            self.watcher.apply_settings(self.watch_settings)
+        self.save_watch_settings()
 
+    def save_watch_settings(self):
         try:
-            download_options = {
-                'outtmpl': f'{self.download_folder}/%(title)s.%(ext)s',
-                'progress_hooks': [self.show_progress],
-                'quiet': False,
-                'no_warnings': False,
-            }
+            self.watch_settings.save()
+        except OSError as e:
+            self.status_label.setText(f"❌ Error: {str(e)}")
+            self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
+
+    def on_watch_batch(self, urls):
+        self.status_label.setText(f"👀 Fetching details of {len(urls)} new URL(s)...")
+        self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa;")
+
+    def on_watched_url(self, url, rule, title):
+        """Queue a watched video with its rule, or the type and priority selected in the window"""
+        if not self.download_folder:
+            return
+        if rule is None:
+            rule = QualityRule(audio_only=self.sound_only_radio.isChecked(),
+                               audio_format=self.audio_format_combobox.currentData(),
+                               priority=self.priority_combobox.currentData())
+        download_options = rule.download_options(self.download_folder, self.performance_settings, quiet=False)
+        self.queue.add(url, download_options, title=title, priority=rule.priority)
+        self.set_downloading(True)
+        self.update_overall_progress()
 
-            if self.sound_only_radio.isChecked():
-                download_options['format'] = 'bestaudio/best'
-                download_options['postprocessors'] = [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                }]
+    def on_watched_url_ignored(self, url, reason):
+        self.status_label.setText(f"👀 Skipped {url}: {reason}")
+        self.status_label.setStyleSheet("font-size: 14px; color: #f9e2af;")
+
+    def enqueue_urls(self, urls):
+        """Add URLs to the download queue with the current options"""
+        if not urls:
+            self.status_label.setText("⚠️  Please enter a valid URL")
+            self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
+            return
+
+        download_options = self.build_download_options()
+        if download_options is None:
+            return
+
+        priority = self.priority_combobox.currentData()
+        for url in urls:
+            if self.playlist and url == self.playlist['url']:
+                # Queue what was listed so far; entries still streaming in follow
+                self.playlist['download_options'] = download_options
+                self.playlist['priority'] = priority
+                for entry in self.playlist['entries']:
+                    self.queue.add(entry['url'], download_options, title=entry['title'], priority=priority)
             else:
-                selected_quality = self.quality_combobox.currentText().replace("p", "")
-                download_options['format'] = f'bestvideo[height<={selected_quality}]+bestaudio/best[height<={selected_quality}]'
-
-            with youtube_dl.YoutubeDL(download_options) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                video_title = info_dict.get('title', 'Unknown')
-                
-                self.status_label.setText(f"🎬 {video_title}")
-                self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa;")
-                
-                ydl.download([url])
-                
-                self.status_label.setText(f"✅ Downloaded: {video_title}")
-                self.status_label.setStyleSheet("font-size: 14px; color: #a6e3a1;")
+                self.queue.add(url, download_options, priority=priority)
 
-        except Exception as e:
-            self.status_label.setText(f"❌ Error: {str(e)}")
+        self.url_input.clear()
+        self.set_downloading(True)
+        self.update_overall_progress()
+
+    def set_downloading(self, downloading):
+        """Toggle controls between idle and downloading states"""
+        self.pause_button.setEnabled(downloading)
+        self.cancel_button.setEnabled(downloading)
+        self.pause_button.setText("⏸  Pause")
+
+    def toggle_pause(self):
+        """Pause or resume all running downloads"""
+        if self.queue.is_paused():
+            self.queue.resume_all()
+            self.pause_button.setText("⏸  Pause")
+            self.update_overall_progress()
+        else:
+            self.queue.pause_all()
+            self.pause_button.setText("▶️  Resume")
+            self.status_label.setText("⏸  Paused")
+            self.status_label.setStyleSheet("font-size: 14px; color: #f9e2af;")
+
+    def cancel_download(self):
+        """Cancel running downloads and clear the queue"""
+        self.cancel_button.setEnabled(False)
+        self.pause_button.setEnabled(False)
+        self.status_label.setText("🛑 Cancelling...")
+        self.status_label.setStyleSheet("font-size: 14px; color: #f9e2af;")
+        self.queue.cancel_all()
+
+    def on_job_added(self, job):
+        """Add a row for a newly queued job"""
+        row = self.job_table.rowCount()
+        self.job_table.insertRow(row)
+        self.job_table.setItem(row, 0, QTableWidgetItem(job.title))
+        self.job_table.setItem(row, 1, QTableWidgetItem(job.state))
+        progress = QTableWidgetItem()
+        progress.setData(Qt.DisplayRole, 0)
+        self.job_table.setItem(row, 2, progress)
+        self.job_table.setItem(row, 3, QTableWidgetItem(''))
+
+    def on_queue_finished(self):
+        """Handle the queue running dry"""
+        self.set_downloading(False)
+        jobs = self.queue.video_jobs()
+        done = sum(1 for job in jobs if job.state == STATE_DONE)
+        skipped = sum(1 for job in jobs if job.state == STATE_SKIPPED)
+        failed = [job for job in jobs if job.state == STATE_FAILED]
+        self.file_size_label.setText('')
+        self.update_pipeline_label()
+
+        if failed and not done:
+            self.status_label.setText(f"❌ Error: {failed[-1].error}")
             self.status_label.setStyleSheet("font-size: 14px; color: #f38ba8;")
-            self.progress_bar.setValue(0)
-
-    def show_progress(self, d):
-        """Update progress bar during download"""
-        if d['status'] == 'downloading':
-            # Try to get percentage directly first
-            if '_percent_str' in d:
-                # Parse percentage string like "50.0%"
-                percent_str = d['_percent_str'].strip().replace('%', '')
-                try:
-                    percent = float(percent_str)
-                    self.progress_bar.setValue(int(percent))
-                except:
-                    pass
-            
-            # Show download info
-            downloaded = d.get('downloaded_bytes', 0)
-            total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-            speed = d.get('speed')
-            
-            if total > 0:
-                percent = int((downloaded / total) * 100)
-                self.progress_bar.setValue(percent)
-                
-                speed_text = f" at {self.format_size(speed)}/s" if speed else ""
-                self.file_size_label.setText(f"📊 {self.format_size(downloaded)} / {self.format_size(total)}{speed_text}")
-            elif downloaded > 0:
-                # If we don't have total, just show downloaded amount
-                speed_text = f" at {self.format_size(speed)}/s" if speed else ""
-                self.file_size_label.setText(f"📊 {self.format_size(downloaded)}{speed_text}")
-                
-        elif d['status'] == 'finished':
-            self.progress_bar.setValue(100)
-            self.file_size_label.setText("✅ Merging video and audio...")
-
-    def format_size(self, size):
-        """Convert bytes to human-readable format"""
-        if size < 1024:
-            return f"{size} B"
-        elif size < 1024 ** 2:
-            return f"{size / 1024:.2f} KB"
-        elif size < 1024 ** 3:
-            return f"{size / (1024 ** 2):.2f} MB"
+        elif failed:
+            self.status_label.setText(f"⚠️  Downloaded {done}, {len(failed)} failed")
+            self.status_label.setStyleSheet("font-size: 14px; color: #f9e2af;")
+        elif done or skipped:
+            skipped_text = f", {skipped} already downloaded" if skipped else ""
+            self.status_label.setText(f"✅ Downloaded {done} of {len(jobs)}{skipped_text}")
+            self.status_label.setStyleSheet("font-size: 14px; color: #a6e3a1;")
+        else:
+            self.status_label.setText("🛑 Download cancelled")
+            self.status_label.setStyleSheet("font-size: 14px; color: #f9e2af;")
+
+    def show_progress(self, job):
+        """Update a job's row and the overall progress after a state change"""
+        self.update_job_row(job)
+        self.update_overall_progress()
+        self.update_metrics_label()
+
+    def on_progress_updated(self, jobs):
+        """Repaint the rows that moved since the last progress tick"""
+        for job in jobs:
+            self.update_job_row(job)
+        self.update_overall_progress()
+        self.update_metrics_label()
+
+    def show_job_menu(self, position):
+        """Offer priority changes and pause/resume for the job under the cursor"""
+        row = self.job_table.rowAt(position.y())
+        if row < 0:
+            return
+        job = self.queue.jobs[row]
+        if job.state in FINAL_STATES:
+            return
+
+        menu = QMenu(self)
+        priority_menu = menu.addMenu("Priority")
+        for name, priority in PRIORITIES.items():
+            action = priority_menu.addAction(name.capitalize())
+            action.setCheckable(True)
+            action.setChecked(job.priority == priority)
+            action.triggered.connect(lambda checked, priority=priority: self.queue.set_priority(job, priority))
+        if job.thread and not job.handed_off:
+            if job.paused:
+                menu.addAction("▶️  Resume", lambda: self.queue.resume_job(job))
+            else:
+                menu.addAction("⏸  Pause", lambda: self.queue.pause_job(job))
+        menu.exec_(self.job_table.viewport().mapToGlobal(position))
+
+    def update_metrics_label(self):
+        """Show the phase timings, bytes and throughput of the selected job"""
+        rows = self.job_table.selectionModel().selectedRows()
+        if not rows:
+            return
+        snapshot = self.queue.jobs[rows[0].row()].metrics.snapshot()
+        phases = [f"{PHASE_LABELS[phase]} {seconds:.1f}s"
+                  for phase, seconds in snapshot['phases'].items() if seconds >= 0.05]
+        text = f"⏱ {snapshot['total_seconds']:.1f}s total"
+        if phases:
+            text += ": " + " · ".join(phases)
+        if snapshot['bytes']:
+            text += (f"\n📦 {format_size(snapshot['bytes'])}, "
+                     f"average {format_size(int(snapshot['avg_bytes_per_second']))}/s, "
+                     f"peak {format_size(int(snapshot['peak_bytes_per_second']))}/s")
+        self.metrics_label.setText(text)
+
+    def export_metrics(self):
+        """Save the timings of every job in this session as JSON or CSV"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Metrics", "grabyt-metrics.json", "JSON (*.json);;CSV (*.csv)")
+        if not path:
+            return
+        try:
+            self.queue.metrics.export(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Metrics", f"Could not save metrics: {e}")
+
+    def update_job_row(self, job):
+        row = job.job_id
+        self.job_table.item(row, 0).setText(job.title)
+        if job.paused:
+            state_text = "paused"
+        elif job.preempted:
+            state_text = "waiting (preempted)"
         else:
-            return f"{size / (1024 ** 3):.2f} GB"
+            state_text = job.state
+        if job.priority != PRIORITY_NORMAL and job.state not in FINAL_STATES:
+            state_text += f" · {PRIORITY_NAMES[job.priority]}"
+        self.job_table.item(row, 1).setText(state_text)
+        progress = self.job_table.item(row, 2)
+        # Only touch the model when the ring would look different
+        if progress.data(Qt.DisplayRole) != job.percent:
+            progress.setData(Qt.DisplayRole, job.percent)
+        speed_text = f"{format_size(job.speed)}/s" if job.speed else ''
+        if job.speed and job.eta is not None:
+            speed_text += f" · {format_eta(job.eta)}"
+        self.job_table.item(row, 3).setText(speed_text)
+        if job.state == STATE_FAILED:
+            self.job_table.item(row, 1).setToolTip(job.error)
+        elif job.state == STATE_SKIPPED:
+            self.job_table.item(row, 1).setToolTip("Already downloaded (in the download archive)")
+
+    def update_overall_progress(self):
+        """Show combined progress of the unfinished batch on the circular bar"""
+        jobs = [job for job in self.queue.video_jobs() if job.state not in (STATE_FAILED, STATE_CANCELLED)]
+        if not jobs:
+            return
+
+        self.progress_bar.setValue(int(sum(job.percent for job in jobs) / len(jobs)))
+        self.update_pipeline_label()
+
+        active = self.queue.active_jobs()
+        if not active or self.queue.is_paused():
+            return
+
+        done = sum(1 for job in jobs if job.state in (STATE_DONE, STATE_SKIPPED))
+        downloading = len(self.queue.downloading_jobs())
+        status_text = f"⬇️  Downloading {downloading} of {len(jobs) - done} remaining"
+        if len(active) > downloading:
+            status_text += f", {len(active) - downloading} post-processing"
+        self.status_label.setText(status_text)
+        self.status_label.setStyleSheet("font-size: 14px; color: #89b4fa;")
+
+        downloaded = sum(job.downloaded_bytes for job in active)
+        total = sum(job.total_bytes for job in active)
+        speed = sum(job.speed or 0 for job in active)
+        speed_text = f" at {format_size(speed)}/s" if speed else ""
+        if speed and total > downloaded:
+            speed_text += f", {format_eta((total - downloaded) / speed)} left"
+        if total > 0:
+            self.file_size_label.setText(f"📊 {format_size(downloaded)} / {format_size(total)}{speed_text}")
+        elif downloaded > 0:
+            self.file_size_label.setText(f"📊 {format_size(downloaded)}{speed_text}")
+
+    def update_pipeline_label(self):
+        """Show how busy the download and post-processing stages are"""
+        download, postprocess = self.queue.utilization()
+        text = (f"Downloads {download['busy']}/{download['capacity']} busy, {download['waiting']} waiting "
+                f"({download['utilization']:.0%} used)")
+        if postprocess:
+            text += (f" · Post-processing {postprocess['busy']}/{postprocess['capacity']} busy, "
+                     f"{postprocess['waiting']} waiting ({postprocess['utilization']:.0%} used)")
+        limit = self.bandwidth.current_limit()
+        if limit:
+            text += f" · Total limit {format_size(limit)}/s"
+        self.pipeline_label.setText(text)
+
+    def offer_resume(self):
+        """Ask to resume downloads left unfinished by the last session"""
+        entries = self.journal.unfinished()
+        if not entries:
+            return
+
+        on_disk = sum(partial_bytes(entry) for entry in entries)
+        answer = QMessageBox.question(
+            self, "Resume Downloads",
+            f"{len(entries)} download(s) from the last session did not finish "
+            f"({format_size(on_disk)} already on disk).\n\nResume them now?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+
+        if answer != QMessageBox.Yes:
+            self.journal.clear()
+            return
+
+        for entry in entries:
+            self.queue.add(entry['url'], resume_options(entry), title=entry['title'],
+                           journal_id=entry['journal_id'])
+        self.set_downloading(True)
+        self.update_overall_progress()
+
+    def closeEvent(self, event):
+        """Stop running downloads before the window closes, keeping them resumable"""
+        if self.warm_up_thread:
+            self.warm_up_thread.wait()
+        if self.watcher:
+            self.watcher.stop()
+        self.queue.shutdown()
+        self.postprocess_pool.shutdown()
+        self.archive.close()
+        self.metadata_cache.close()
+        self.journal.close()
+        super().closeEvent(event)
 
 
 if __name__ == '__main__':
+    startup = None
+    if '--startup-time' in sys.argv:
+        # Print how long each start-up step took, then exit
+        sys.argv.remove('--startup-time')
+        startup = StartupTimer(STARTED)
+        startup.mark("imports")
     app = QApplication(sys.argv)
-    ex = VideoDownloaderApp()
+    ex = VideoDownloaderApp(startup)
     ex.show()
+    QTimer.singleShot(0, ex.finish_startup)
     sys.exit(app.exec_())
\ No newline at end of file
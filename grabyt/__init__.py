@@ -0,0 +1 @@
+"""Download engine shared by the GrabYt GUI"""
@@ -0,0 +1,5 @@
+import sys
+
+from grabyt.cli import main
+
+sys.exit(main())
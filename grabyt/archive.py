@@ -0,0 +1,112 @@
+"""Persistent index of finished downloads, so known videos are skipped before any network access"""
+import os
+import sqlite3
+import threading
+import time
+
+from grabyt.cache import canonical_key, url_key
+from grabyt.paths import user_data_dir
+
+
+class DownloadArchive:
+    """SQLite record of every downloaded video, keyed like the metadata cache
+
+    All keys and URL aliases are also held in memory, so `lookup()` is a set
+    or dict access for any URL seen before, and a local extractor match (no
+    network) for new ones. Like yt-dlp's --download-archive, a video counts
+    as downloaded regardless of the quality or folder it was saved in.
+    """
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(user_data_dir(), 'archive.sqlite3')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS downloads (
+                    key TEXT PRIMARY KEY,
+                    title TEXT,
+                    filepath TEXT,
+                    downloaded_at REAL NOT NULL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS aliases (
+                    url TEXT PRIMARY KEY,
+                    key TEXT NOT NULL
+                )""")
+        self._keys = {key for key, in self._conn.execute("SELECT key FROM downloads")}
+        self._aliases = dict(self._conn.execute("SELECT url, key FROM aliases"))
+
+    def key_for(self, url, info_dict=None):
+        """Return the extractor:id key of a URL without network access, or None if unknown"""
+        if info_dict:
+            key = canonical_key(info_dict)
+            if key:
+                return key
+        with self._lock:
+            key = self._aliases.get(url)
+        if key is None:
+            key = url_key(url)
+            if key is not None:
+                with self._lock:
+                    self._aliases[url] = key
+        return key
+
+    def lookup(self, url, info_dict=None):
+        """Return the archived `{'key', 'title', 'filepath'}` for a URL, or None"""
+        key = self.key_for(url, info_dict)
+        with self._lock:
+            if key not in self._keys:
+                return None
+            row = self._conn.execute(
+                "SELECT title, filepath FROM downloads WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {'key': key, 'title': row[0], 'filepath': row[1]}
+
+    def add(self, info_dict, url=None):
+        """Record a finished download from its final info dict"""
+        key = canonical_key(info_dict)
+        if key is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO downloads (key, title, filepath, downloaded_at) VALUES (?, ?, ?, ?)",
+                (key, info_dict.get('title'), info_dict.get('filepath'), time.time()))
+            self._keys.add(key)
+            for alias in {url, info_dict.get('webpage_url'), info_dict.get('original_url')}:
+                if alias:
+                    self._conn.execute("INSERT OR REPLACE INTO aliases (url, key) VALUES (?, ?)", (alias, key))
+                    self._aliases[alias] = key
+
+    def remove(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM downloads WHERE key = ?", (key,))
+            self._keys.discard(key)
+
+    def reconcile(self, folder):
+        """Forget downloads saved in `folder` whose file is gone, and return how many"""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, filepath FROM downloads WHERE filepath IS NOT NULL").fetchall()
+        missing = [key for key, filepath in rows
+                   if os.path.dirname(os.path.abspath(filepath)) == folder and not os.path.exists(filepath)]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM downloads WHERE key = ?", [(key,) for key in missing])
+            self._keys.difference_update(missing)
+        return len(missing)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM downloads")
+            self._conn.execute("DELETE FROM aliases")
+            self._keys.clear()
+            self._aliases.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
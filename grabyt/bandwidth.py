@@ -0,0 +1,231 @@
+"""Global bandwidth cap, time-of-day limits and priority-weighted sharing between running downloads"""
+import re
+import threading
+import time
+
+# Priorities double as fair-share weights: a high priority job gets four times a low one's bandwidth
+PRIORITY_LOW = 1
+PRIORITY_NORMAL = 2
+PRIORITY_HIGH = 4
+PRIORITIES = {'low': PRIORITY_LOW, 'normal': PRIORITY_NORMAL, 'high': PRIORITY_HIGH}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+# Weighted fair share, or all bandwidth to the highest priority jobs that are transferring
+SHARING_FAIR = 'fair'
+SHARING_STRICT = 'strict'
+SHARING_MODES = (SHARING_FAIR, SHARING_STRICT)
+
+# A job that hasn't transferred for this long (paused, extracting, post-processing) gets no share
+ACTIVE_WINDOW = 2.0
+# Unused allowance a job may save up, in seconds of its share
+BURST_SECONDS = 0.5
+# Waiting jobs re-check their share this often, so changes apply quickly
+POLL_INTERVAL = 0.25
+# Read size for throttled downloads; yt-dlp otherwise grows reads to 4 MiB on fast links,
+# which would make the pacing come in multi-second bursts
+THROTTLE_BLOCK_SIZE = 64 * 1024
+
+
+def parse_rate(value):
+    """Return bytes/s for a rate like '2M' or '500K', or None for '0'/''"""
+    from yt_dlp.utils import parse_bytes
+
+    value = value.strip()
+    if value in ('', '0'):
+        return None
+    rate = parse_bytes(value)
+    if rate is None:
+        raise ValueError(f"invalid rate: {value!r}")
+    return rate
+
+
+class RateWindow:
+    """A daily time range with its own total rate limit, e.g. '09:00-18:00=2M'
+
+    Ranges may wrap around midnight, like '22:00-06:00=10M'.
+    """
+    def __init__(self, start, end, rate):
+        # Minutes since midnight
+        self.start = start
+        self.end = end
+        self.rate = rate
+
+    @classmethod
+    def parse(cls, text):
+        match = re.fullmatch(r'\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(\S+)\s*', text)
+        if not match:
+            raise ValueError(f"invalid time window {text!r}, expected e.g. 09:00-18:00=2M")
+        start_h, start_m, end_h, end_m = (int(group) for group in match.groups()[:4])
+        start, end = start_h * 60 + start_m, end_h * 60 + end_m
+        # 24:00 is the only valid time past 23:59
+        if max(start_m, end_m) > 59 or max(start, end) > 24 * 60:
+            raise ValueError(f"invalid time in {text!r}")
+        return cls(start, end, parse_rate(match.group(5)))
+
+    def contains(self, minute):
+        if self.start <= self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+
+    def __str__(self):
+        return (f"{self.start // 60:02d}:{self.start % 60:02d}-{self.end // 60:02d}:{self.end % 60:02d}"
+                f"={self.rate or 0}")
+
+
+def parse_schedule(windows):
+    """Parse a list of '09:00-18:00=2M' strings into `RateWindow`s"""
+    return [RateWindow.parse(window) for window in windows if window.strip()]
+
+
+class BandwidthShare:
+    """One job's claim on the scheduler's bandwidth; its download calls `consume()` as bytes arrive"""
+    def __init__(self, scheduler, priority):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.released = False
+        self.last_active = None
+        # Bytes the job may still transfer; negative while it is over its share
+        self._credit = 0.0
+        self._refilled_at = time.monotonic()
+        self._wake = threading.Event()
+
+    def consume(self, nbytes):
+        """Account for `nbytes` just transferred, sleeping until they fit this job's share"""
+        self.scheduler._consume(self, nbytes)
+
+    def set_priority(self, priority):
+        self.priority = priority
+        self.scheduler.wake_all()
+
+    def wake(self):
+        """Make a sleeping `consume()` re-check its share now"""
+        self._wake.set()
+
+    def release(self):
+        """Give up the share; a sleeping `consume()` returns at once"""
+        self.scheduler._release(self)
+
+    def throttled(self):
+        """Whether the job can be held back at all, see `BandwidthScheduler.throttles()`"""
+        return self.scheduler.throttles(self)
+
+
+class BandwidthScheduler:
+    """Splits a total rate limit between the jobs that are transferring
+
+    Each job gets `limit * priority / sum of active priorities`, paced with a
+    small token bucket in its progress hook, so the download thread simply
+    reads from its socket more slowly. With `SHARING_STRICT`, lower priority
+    jobs wait while any higher priority job is transferring, even without a
+    limit. The limit is the lowest of `rate_limit` and the `RateWindow`s
+    covering the current time of day.
+    """
+    def __init__(self, rate_limit=None, schedule=None, sharing=SHARING_FAIR):
+        self.rate_limit = rate_limit
+        self.schedule = list(schedule or [])
+        self.sharing = sharing
+        self._lock = threading.Lock()
+        self._shares = []
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build a scheduler from `grabyt.settings.PerformanceSettings`"""
+        scheduler = cls()
+        scheduler.apply_settings(settings)
+        return scheduler
+
+    def configure(self, rate_limit=None, schedule=None, sharing=SHARING_FAIR):
+        """Change the limits; running jobs pick them up within `POLL_INTERVAL`"""
+        with self._lock:
+            self.rate_limit = rate_limit
+            self.schedule = list(schedule or [])
+            self.sharing = sharing
+        self.wake_all()
+
+    def apply_settings(self, settings):
+        self.configure(settings.total_rate_limit, parse_schedule(settings.rate_schedule),
+                       settings.bandwidth_sharing)
+
+    def register(self, priority=PRIORITY_NORMAL):
+        share = BandwidthShare(self, priority)
+        with self._lock:
+            self._shares.append(share)
+        return share
+
+    def _release(self, share):
+        with self._lock:
+            share.released = True
+            if share in self._shares:
+                self._shares.remove(share)
+        share.wake()
+        self.wake_all()
+
+    def wake_all(self):
+        with self._lock:
+            shares = list(self._shares)
+        for share in shares:
+            share.wake()
+
+    def throttles(self, share):
+        """Whether any limit or time window is set, or strict sharing has other jobs to rank `share` against
+
+        Jobs that can't be held back keep yt-dlp's growing read buffer, which
+        is several times faster on quick links than `THROTTLE_BLOCK_SIZE` reads.
+        """
+        with self._lock:
+            if self.rate_limit or any(window.rate for window in self.schedule):
+                return True
+            return self.sharing == SHARING_STRICT and any(s is not share for s in self._shares)
+
+    def current_limit(self, now=None):
+        """Return the total bytes/s allowed right now, or None if unlimited"""
+        now = time.localtime(now)
+        minute = now.tm_hour * 60 + now.tm_min
+        limits = [window.rate for window in self.schedule if window.contains(minute) and window.rate]
+        if self.rate_limit:
+            limits.append(self.rate_limit)
+        return min(limits) if limits else None
+
+    def _share_rate(self, share, now):
+        """Return the job's bytes/s, 0 while it must wait, or None if it is unlimited"""
+        active = [s for s in self._shares
+                  if s is share or (s.last_active is not None and now - s.last_active < ACTIVE_WINDOW)]
+        if self.sharing == SHARING_STRICT:
+            top = max(s.priority for s in active)
+            if share.priority < top:
+                return 0
+            active = [s for s in active if s.priority == top]
+        limit = self.current_limit()
+        if limit is None:
+            return None
+        return limit * share.priority / sum(s.priority for s in active)
+
+    def _consume(self, share, nbytes):
+        share._credit -= nbytes
+        while True:
+            with self._lock:
+                if share.released:
+                    return
+                now = time.monotonic()
+                share.last_active = now
+                rate = self._share_rate(share, now)
+                if rate is None:
+                    share._credit, share._refilled_at = 0.0, now
+                    return
+                # Refill at the current rate, so priority and limit changes apply mid-wait
+                share._credit = min(share._credit + (now - share._refilled_at) * rate, rate * BURST_SECONDS)
+                share._refilled_at = now
+                if share._credit >= 0:
+                    return
+                delay = min(-share._credit / rate, POLL_INTERVAL) if rate else POLL_INTERVAL
+            share._wake.wait(delay)
+            share._wake.clear()
+
+    def snapshot(self):
+        """Return the current limit and how many jobs are transferring"""
+        now = time.monotonic()
+        with self._lock:
+            active = sum(1 for s in self._shares
+                         if s.last_active is not None and now - s.last_active < ACTIVE_WINDOW)
+            return {'limit': self.current_limit(), 'jobs': len(self._shares), 'active': active,
+                    'sharing': self.sharing}
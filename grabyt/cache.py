@@ -0,0 +1,159 @@
+"""Persistent metadata cache so known videos don't need re-extracting"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qs, urlparse
+
+from grabyt.paths import user_cache_dir
+
+# How long title/format metadata is trusted before extracting again
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+# Signed format URLs without an explicit expiry (YouTube's last about six hours)
+DEFAULT_URL_LIFETIME = 5 * 3600
+# Treat format URLs as expired a little early so a download doesn't start on a dying link
+URL_EXPIRY_MARGIN = 10 * 60
+
+
+def canonical_key(info_dict):
+    """Key an info dict by extractor and video ID, e.g. 'Youtube:dQw4w9WgXcQ'"""
+    extractor = info_dict.get('extractor_key') or info_dict.get('ie_key')
+    video_id = info_dict.get('id')
+    if not extractor or not video_id:
+        return None
+    return f"{extractor}:{video_id}"
+
+
+def url_key(url):
+    """Derive the canonical key from a URL alone, without any network access"""
+    from yt_dlp.extractor import gen_extractor_classes
+
+    for ie in gen_extractor_classes():
+        if ie.ie_key() == 'Generic' or not ie.suitable(url):
+            continue
+        temp_id = ie.get_temp_id(url)
+        return f"{ie.ie_key()}:{temp_id}" if temp_id else None
+    return None
+
+
+def formats_expire_at(info_dict, fetched_at):
+    """Return when the earliest format URL in an info dict stops working"""
+    expiries = []
+    for f in info_dict.get('formats') or []:
+        query = parse_qs(urlparse(f.get('url') or '').query)
+        expire = query.get('expire')
+        if expire and expire[0].isdigit():
+            expiries.append(int(expire[0]))
+    return min(expiries) if expiries else fetched_at + DEFAULT_URL_LIFETIME
+
+
+class MetadataCache:
+    """SQLite-backed info dict cache with a TTL and LRU eviction
+
+    Entries are keyed by canonical video ID; every URL an entry was looked up
+    with is remembered as an alias so repeat lookups don't need extractor
+    matching. Metadata stays usable for the whole TTL, but the format URLs in
+    it expire much sooner, so downloads ask for `require_fresh_urls` and fall
+    back to a re-extraction when they are stale.
+    """
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        if path is None:
+            path = os.path.join(user_cache_dir(), 'metadata.sqlite3')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    info BLOB NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    urls_expire_at REAL NOT NULL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS aliases (
+                    url TEXT PRIMARY KEY,
+                    key TEXT NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def get(self, url, require_fresh_urls=False):
+        """Return the cached info dict for a URL, or None on a miss
+
+        With `require_fresh_urls` an entry whose format URLs have expired
+        counts as a miss, which makes the caller re-extract.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT key FROM aliases WHERE url = ?", (url,)).fetchone()
+            key = row[0] if row else None
+        if key is None:
+            key = url_key(url)
+            if key is None:
+                return None
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT info, fetched_at, urls_expire_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            info, fetched_at, urls_expire_at = row
+            if now - fetched_at > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.execute("DELETE FROM aliases WHERE key = ?", (key,))
+                return None
+            if require_fresh_urls and now + URL_EXPIRY_MARGIN >= urls_expire_at:
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.execute("INSERT OR REPLACE INTO aliases (url, key) VALUES (?, ?)", (url, key))
+
+        return json.loads(zlib.decompress(info))
+
+    def put(self, url, info_dict):
+        """Store an info dict under its canonical key and alias it to `url`"""
+        from yt_dlp import YoutubeDL
+
+        key = canonical_key(info_dict)
+        if key is None:
+            return
+
+        now = time.time()
+        info = YoutubeDL.sanitize_info(dict(info_dict), remove_private_keys=True)
+        blob = zlib.compress(json.dumps(info).encode('utf-8'))
+        urls_expire_at = formats_expire_at(info, now)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, info, fetched_at, accessed_at, urls_expire_at) "
+                "VALUES (?, ?, ?, ?, ?)", (key, blob, now, now, urls_expire_at))
+            self._conn.execute("INSERT OR REPLACE INTO aliases (url, key) VALUES (?, ?)", (url, key))
+            webpage_url = info.get('webpage_url')
+            if webpage_url and webpage_url != url:
+                self._conn.execute("INSERT OR REPLACE INTO aliases (url, key) VALUES (?, ?)", (webpage_url, key))
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones over the size cap"""
+        self._conn.execute("DELETE FROM entries WHERE fetched_at < ?", (time.time() - self.ttl,))
+        self._conn.execute("""
+            DELETE FROM entries WHERE key IN (
+                SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )""", (self.max_entries,))
+        self._conn.execute("DELETE FROM aliases WHERE key NOT IN (SELECT key FROM entries)")
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM aliases")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
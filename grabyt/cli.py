@@ -0,0 +1,407 @@
+"""Headless batch downloader sharing the GUI's download engine, without Qt
+
+    python -m grabyt --batch urls.txt --jobs 4 --audio-only --max-height 1080
+    python -m grabyt --watch ~/inbox --rule 'music.youtube.com=audio:opus' -o ~/Videos
+    python -m grabyt --stream - https://www.youtube.com/watch?v=... | ffmpeg -i - ...
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from grabyt.archive import DownloadArchive
+from grabyt.bandwidth import PRIORITY_NORMAL, SHARING_MODES, BandwidthScheduler, RateWindow
+from grabyt.cache import MetadataCache
+from grabyt.core import (STATE_DONE, STATE_FAILED, STATE_CANCELLED, STATE_SKIPPED, DownloadTask,
+                         build_download_options, parse_url_list)
+from grabyt.formats import AUDIO_FORMATS
+from grabyt.journal import DownloadJournal, resume_options
+from grabyt.metrics import MetricsRegistry, serve_metrics
+from grabyt.postprocess import DEFAULT_WORKERS, PostProcessPool
+from grabyt.progress import StageMeter
+from grabyt.stream import STREAM_CONTAINERS, StreamTarget
+from grabyt.settings import EXTERNAL_DOWNLOADERS, PerformanceSettings, WatchSettings
+from grabyt.watch import QualityRule, WatchSession, parse_rules
+
+
+class BatchRunner:
+    """Runs download tasks on a bounded thread pool, queueing playlist entries as they are listed
+
+    With a `postprocess_pool`, a job frees its download thread as soon as its
+    streams are on disk and is recorded once the pool has finished it. Videos
+    already in `archive` are skipped unless `skip_archived` is False. Every
+    job's timings are collected in `metrics`, and `bandwidth` caps their
+    combined rate. Playlist entries already submitted, e.g. resumed from the
+    journal next to their half-listed playlist, are not queued again.
+    """
+    def __init__(self, download_options, jobs=3, metadata_cache=None, journal=None,
+                 postprocess_pool=None, archive=None, skip_archived=True, bandwidth=None):
+        self.download_options = download_options
+        self.metadata_cache = metadata_cache
+        self.journal = journal
+        self.postprocess_pool = postprocess_pool
+        self.archive = archive
+        self.skip_archived = skip_archived
+        self.bandwidth = bandwidth
+        self.executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='grabyt')
+        self.download_meter = StageMeter(jobs)
+        stages = {'download': self.download_meter}
+        if postprocess_pool:
+            stages['postprocess'] = postprocess_pool.meter
+        self.metrics = MetricsRegistry(stages)
+        self.results = []
+        self.tasks = set()
+        self._urls = set()
+        self._pending = 0
+        self._submitted = 0
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    def submit(self, url, download_options=None, journal_id=None, priority=PRIORITY_NORMAL):
+        """Queue a URL; `journal_id` continues a job journaled by an earlier run"""
+        download_options = download_options or self.download_options
+        with self._cond:
+            if self._cancelled:
+                return
+            self._pending += 1
+            self._submitted += 1
+            self._urls.add(url)
+        if self.journal and journal_id is None:
+            journal_id = self.journal.add(url, download_options)
+        metrics = self.metrics.new_job(url)
+        self.executor.submit(self._run, url, download_options, journal_id, metrics, priority)
+
+    def _run(self, url, download_options, journal_id, metrics, priority):
+        task = DownloadTask(url, download_options, metadata_cache=self.metadata_cache,
+                            on_entries=lambda entries: self._on_entries(entries, download_options),
+                            journal=self.journal, journal_id=journal_id,
+                            postprocess_pool=self.postprocess_pool,
+                            archive=self.archive, skip_archived=self.skip_archived,
+                            metrics=metrics,
+                            bandwidth=self.bandwidth.register(priority) if self.bandwidth else None)
+        with self._cond:
+            self.tasks.add(task)
+        self.download_meter.start()
+        try:
+            if self._cancelled:
+                # Never run, so release its bandwidth share here
+                task.cancel()
+                self._finish(task, journal_id, url, STATE_CANCELLED, url)
+                return
+            video_title = task.run()
+        except Exception as e:
+            # Checked on the task rather than catching yt-dlp's DownloadCancelled, which would import it here
+            if task.is_cancelled():
+                self._finish(task, journal_id, url, STATE_CANCELLED, url)
+            else:
+                self._finish(task, journal_id, url, STATE_FAILED, str(e))
+        else:
+            if task.archived:
+                self._finish(task, journal_id, url, STATE_SKIPPED, f"{video_title} (already archived)")
+            elif task.postprocess_future is None:
+                self._finish(task, journal_id, url, STATE_DONE, video_title)
+            else:
+                task.postprocess_future.add_done_callback(
+                    lambda future: self._on_postprocessed(future, task, journal_id, url, video_title))
+        finally:
+            self.download_meter.stop()
+
+    def _on_postprocessed(self, future, task, journal_id, url, video_title):
+        if future.cancelled():
+            self._finish(task, journal_id, url, STATE_CANCELLED, url)
+        elif future.exception():
+            self._finish(task, journal_id, url, STATE_FAILED, str(future.exception()))
+        else:
+            self._finish(task, journal_id, url, STATE_DONE, video_title)
+
+    def _finish(self, task, journal_id, url, state, detail):
+        task.metrics.finish(state)
+        self._record(url, state, detail)
+        # Jobs interrupted by Ctrl+C stay journaled for --resume
+        if self.journal and not self._cancelled:
+            self.journal.remove(journal_id)
+        with self._cond:
+            self.tasks.discard(task)
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def _on_entries(self, entries, download_options):
+        for entry in entries:
+            with self._cond:
+                queued = entry['url'] in self._urls
+                self._urls.add(entry['url'])
+            if not queued:
+                self.submit(entry['url'], download_options)
+
+    def _record(self, url, state, detail):
+        with self._cond:
+            self.results.append((url, state, detail))
+            print(f"[{len(self.results)}/{self._submitted}] {state}: {detail}", file=sys.stderr, flush=True)
+
+    def cancel(self):
+        """Stop queued work and cancel running downloads"""
+        with self._cond:
+            self._cancelled = True
+            for task in self.tasks:
+                task.cancel()
+
+    def utilization(self):
+        """Return `StageMeter` snapshots of the download and post-processing stages"""
+        postprocess = self.postprocess_pool.meter.snapshot() if self.postprocess_pool else None
+        return self.download_meter.snapshot(), postprocess
+
+    def wait(self):
+        """Block until every submitted download, including expanded playlists, has finished"""
+        with self._cond:
+            while self._pending:
+                # Wake up regularly so Ctrl+C is handled on the main thread
+                self._cond.wait(0.5)
+        self.executor.shutdown()
+
+
+def parse_size(value):
+    """argparse type for sizes like 512K or 10M"""
+    from yt_dlp.utils import parse_bytes
+
+    size = parse_bytes(value)
+    if size is None:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+    return size
+
+
+def parse_rate_window(value):
+    """argparse type for time-of-day limits like 09:00-18:00=2M"""
+    try:
+        RateWindow.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def parse_rule(value):
+    """argparse type for watch mode quality rules like music.youtube.com=audio:opus@high"""
+    try:
+        QualityRule.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='grabyt', description="Download videos without the GUI.")
+    parser.add_argument('urls', nargs='*', metavar='URL', help="video or playlist URLs")
+    parser.add_argument('-a', '--batch', metavar='FILE',
+                        help="file with one URL per line ('-' for stdin, '#' starts a comment)")
+    parser.add_argument('-j', '--jobs', type=int, default=3, help="parallel downloads (default: 3)")
+    parser.add_argument('-o', '--output', default='.', help="download folder (default: current directory)")
+    parser.add_argument('--audio-only', action='store_true', help="download audio only")
+    parser.add_argument('--audio-format', choices=AUDIO_FORMATS, default='best',
+                        help="audio container or codec; best, m4a, opus and ogg copy the stream, "
+                             "others re-encode it (default: best)")
+    parser.add_argument('--max-height', type=int, metavar='PX', help="highest video height, e.g. 1080")
+    parser.add_argument('--resume', action='store_true',
+                        help="also resume downloads left unfinished by an earlier run or the GUI")
+    parser.add_argument('--postprocess-jobs', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help=f"parallel merges and audio conversions (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--redownload', action='store_true',
+                        help="download videos even if the download archive has them")
+    parser.add_argument('--reconcile', action='store_true',
+                        help="first forget archived videos whose files were deleted from the output folder")
+    parser.add_argument('--no-cache', action='store_true', help="don't use the metadata cache")
+    parser.add_argument('--metrics-json', metavar='FILE', help="write per-job timings and throughput as JSON")
+    parser.add_argument('--metrics-csv', metavar='FILE', help="write per-job timings and throughput as CSV")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics while running")
+    parser.add_argument('-v', '--verbose', action='store_true', help="show yt-dlp output")
+
+    stream = parser.add_argument_group(
+        'streaming', "send each video to a reader while it downloads, one after the other")
+    stream.add_argument('--stream', metavar='TARGET',
+                        help="'-' for stdout, the path of a named pipe (created if missing), "
+                             "tcp://HOST:PORT to connect to a reader or tcp://HOST:PORT?listen to wait for one")
+    stream.add_argument('--stream-container', choices=STREAM_CONTAINERS, default='auto',
+                        help="auto passes single formats through and muxes merged ones as MPEG-TS; "
+                             "mpegts and fmp4 always remux with ffmpeg (default: auto)")
+    stream.add_argument('--keep-streamed', action='store_true',
+                        help="also save each streamed video in the output folder")
+
+    watch = parser.add_argument_group(
+        'watch mode', "keep running and download the URLs in text files dropped into a folder")
+    watch.add_argument('--watch', metavar='DIR',
+                       help="folder to watch for .txt/.url files; handled files move to DIR/processed")
+    watch.add_argument('--rule', action='append', type=parse_rule, metavar='RULE',
+                       help="quality for matching URLs, e.g. music.youtube.com=audio:opus or *.twitch.tv=720@low; "
+                            "repeatable, the first match wins (default: the rules saved in the GUI)")
+    watch.add_argument('--debounce', type=float, metavar='SECONDS',
+                       help="queue collected URLs once none arrived for this long (default: 2)")
+
+    performance = parser.add_argument_group(
+        'performance', "override the saved performance settings for this run")
+    performance.add_argument('-N', '--concurrent-fragments', type=int, metavar='N',
+                             help="DASH/HLS fragments downloaded at once per video")
+    performance.add_argument('--http-chunk-size', type=parse_size, metavar='SIZE',
+                             help="download in range requests of this size, e.g. 10M (0 disables)")
+    performance.add_argument('--buffer-size', type=parse_size, metavar='SIZE',
+                             help="fixed download buffer size, e.g. 64K (0 lets yt-dlp resize it)")
+    performance.add_argument('-r', '--limit-rate', type=parse_size, metavar='RATE',
+                             help="maximum rate per download in bytes/s, e.g. 2M (0 is unlimited)")
+    performance.add_argument('--external-downloader', choices=('native',) + EXTERNAL_DOWNLOADERS,
+                             help="use an external program for the transfer")
+    performance.add_argument('--connections', type=int, metavar='N',
+                             help="connections per file with aria2c")
+    performance.add_argument('--total-rate', type=parse_size, metavar='RATE',
+                             help="maximum combined rate of all downloads in bytes/s (0 is unlimited)")
+    performance.add_argument('--rate-window', action='append', type=parse_rate_window, metavar='WINDOW',
+                             help="total rate limit for a time of day, e.g. 09:00-18:00=2M; repeatable")
+    performance.add_argument('--bandwidth-sharing', choices=SHARING_MODES,
+                             help="split the total rate by priority (fair) or give it to the highest (strict)")
+    return parser.parse_args(argv)
+
+
+def performance_settings(args):
+    """Return the saved performance settings with command line overrides applied"""
+    settings = PerformanceSettings.load()
+    if args.concurrent_fragments is not None:
+        settings.concurrent_fragments = args.concurrent_fragments
+    if args.http_chunk_size is not None:
+        settings.http_chunk_size = args.http_chunk_size
+    if args.buffer_size is not None:
+        settings.buffer_size = args.buffer_size
+    if args.limit_rate is not None:
+        settings.rate_limit = args.limit_rate
+    if args.external_downloader is not None:
+        settings.external_downloader = None if args.external_downloader == 'native' else args.external_downloader
+    if args.connections is not None:
+        settings.connections = args.connections
+    if args.total_rate is not None:
+        settings.total_rate_limit = args.total_rate or None
+    if args.rate_window is not None:
+        settings.rate_schedule = args.rate_window
+    if args.bandwidth_sharing is not None:
+        settings.bandwidth_sharing = args.bandwidth_sharing
+    return settings
+
+
+def watch_folder(args, runner, output, performance, metadata_cache, stream=None):
+    """Queue the videos from files dropped into `args.watch` until Ctrl+C"""
+    settings = WatchSettings.load()
+    rules = parse_rules(args.rule if args.rule is not None else settings.rules)
+    # URLs no rule matches use the quality from the command line
+    default_rule = QualityRule(audio_only=args.audio_only, max_height=args.max_height,
+                               audio_format=args.audio_format)
+
+    def on_ready(url, rule, title):
+        rule = rule or default_rule
+        print(f"grabyt: queueing {title} ({rule.describe()})", file=sys.stderr, flush=True)
+        download_options = rule.download_options(output, performance, quiet=not args.verbose, stream=stream,
+                                                 keep_streamed=args.keep_streamed)
+        runner.submit(url, download_options, priority=rule.priority)
+
+    def on_ignored(url, reason):
+        print(f"grabyt: ignoring {url}: {reason}", file=sys.stderr, flush=True)
+
+    session = WatchSession(on_ready, on_ignored, rules=rules, metadata_cache=metadata_cache,
+                           debounce=args.debounce if args.debounce is not None else settings.debounce)
+    session.start()
+    session.watch_folder(args.watch)
+    print(f"grabyt: watching {os.path.abspath(args.watch)}, Ctrl+C to stop", file=sys.stderr, flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        # A second Ctrl+C while the queue drains cancels the downloads
+        print("grabyt: stopped watching, finishing queued downloads", file=sys.stderr, flush=True)
+    finally:
+        session.stop()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    urls = list(args.urls)
+    if args.batch:
+        if args.batch == '-':
+            urls.extend(parse_url_list(sys.stdin))
+        else:
+            with open(args.batch, encoding='utf-8') as f:
+                urls.extend(parse_url_list(f))
+
+    stream = None
+    if args.stream:
+        if args.resume:
+            print("grabyt: --resume can't be combined with --stream", file=sys.stderr)
+            return 2
+        try:
+            stream = StreamTarget.parse(args.stream, args.stream_container)
+        except ValueError as e:
+            print(f"grabyt: {e}", file=sys.stderr)
+            return 2
+
+    # Streams can't be resumed, so they aren't journaled
+    journal = DownloadJournal() if not stream else None
+    unfinished = journal.unfinished() if args.resume else []
+    if not urls and not unfinished and not args.watch:
+        if journal:
+            journal.close()
+        print("grabyt: no URLs given" if not args.resume else "grabyt: nothing to resume", file=sys.stderr)
+        return 2
+
+    # Journaled jobs keep their options, so they must not depend on the working directory
+    output = os.path.abspath(args.output)
+    os.makedirs(output, exist_ok=True)
+    performance = performance_settings(args)
+    download_options = build_download_options(
+        output, args.audio_only, args.max_height, quiet=not args.verbose,
+        performance=performance, audio_format=args.audio_format,
+        stream=stream, keep_streamed=args.keep_streamed)
+    metadata_cache = None if args.no_cache else MetadataCache()
+    postprocess_pool = PostProcessPool(max(1, args.postprocess_jobs))
+    archive = DownloadArchive()
+    if args.reconcile:
+        removed = archive.reconcile(output)
+        print(f"grabyt: {removed} archived video(s) no longer in {output}", file=sys.stderr)
+
+    # One video at a time owns the stream target, and a video streams even if it was downloaded before
+    jobs = 1 if stream else max(1, args.jobs)
+    runner = BatchRunner(download_options, jobs, metadata_cache, journal, postprocess_pool,
+                         archive, skip_archived=not args.redownload and not stream,
+                         bandwidth=BandwidthScheduler.from_settings(performance))
+    metrics_server = serve_metrics(runner.metrics, args.metrics_port) if args.metrics_port else None
+    try:
+        for entry in unfinished:
+            runner.submit(entry['url'], resume_options(entry), entry['journal_id'])
+        for url in urls:
+            runner.submit(url)
+        if args.watch:
+            watch_folder(args, runner, output, performance, metadata_cache, stream)
+        runner.wait()
+    except KeyboardInterrupt:
+        print("grabyt: cancelling...", file=sys.stderr)
+        runner.cancel()
+        runner.wait()
+        return 130
+    finally:
+        if metrics_server:
+            metrics_server.shutdown()
+        # Also written after Ctrl+C, to see where an aborted run spent its time
+        if args.metrics_json:
+            runner.metrics.export_json(args.metrics_json)
+        if args.metrics_csv:
+            runner.metrics.export_csv(args.metrics_csv)
+        postprocess_pool.shutdown()
+        archive.close()
+        if metadata_cache:
+            metadata_cache.close()
+        if stream:
+            stream.close()
+        if journal:
+            journal.close()
+
+    download, postprocess = runner.utilization()
+    print(f"grabyt: downloads {download['utilization']:.0%} busy, "
+          f"post-processing {postprocess['utilization']:.0%} busy", file=sys.stderr)
+
+    failed = sum(1 for _, state, _ in runner.results if state == STATE_FAILED)
+    return 1 if failed else 0
@@ -0,0 +1,483 @@
+"""Qt-free download engine: format selection, yt-dlp options, progress and jobs"""
+import os
+import threading
+import time
+
+from grabyt.bandwidth import THROTTLE_BLOCK_SIZE
+from grabyt.formats import (AUDIO_TRANSCODE_FORMATS, FormatIndex, audio_postprocessor, audio_selector,
+                            format_selector, height_choices)
+from grabyt.metrics import (PHASE_DISK_WRITE, PHASE_DOWNLOAD, PHASE_EXTRACT, PHASE_FORMAT_SELECTION,
+                            PHASE_POSTPROCESS, PHASE_POSTPROCESS_WAIT)
+from grabyt.postprocess import run_postprocessors
+from grabyt.ytdl import create_youtube_dl, load_yt_dlp, metadata_youtube_dl
+
+# Download job states
+STATE_QUEUED = 'queued'
+STATE_FETCHING = 'fetching'
+STATE_DOWNLOADING = 'downloading'
+STATE_POST_PROCESSING = 'post-processing'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+STATE_CANCELLED = 'cancelled'
+# Already in the download archive, nothing was fetched
+STATE_SKIPPED = 'skipped'
+
+ACTIVE_STATES = (STATE_FETCHING, STATE_DOWNLOADING, STATE_POST_PROCESSING)
+FINAL_STATES = (STATE_DONE, STATE_FAILED, STATE_CANCELLED, STATE_SKIPPED)
+
+PLAYLIST_TYPES = ('playlist', 'multi_video')
+# What a CDN answers for a signed format URL past its expiry
+EXPIRED_URL_STATUSES = (403, 410)
+# Offered for playlists, whose entries are only resolved when they download
+PLAYLIST_QUALITIES = [2160, 1440, 1080, 720, 480, 360]
+
+
+def __getattr__(name):
+    # yt-dlp's own exception, so it passes through yt-dlp untouched; resolved lazily
+    if name == 'DownloadCancelled':
+        return load_yt_dlp().utils.DownloadCancelled
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def urls_expired(error):
+    """Whether a yt-dlp error comes from stale format URLs, so extracting again can fix it
+
+    Any other error (a full disk, missing ffmpeg, a 404) would fail the same
+    way on a second attempt.
+    """
+    utils = load_yt_dlp().utils
+    if isinstance(error, utils.ReExtractInfo):
+        return True
+    cause = error.exc_info[1] if isinstance(error, utils.DownloadError) and error.exc_info else None
+    seen = set()
+    while cause is not None and id(cause) not in seen:
+        seen.add(id(cause))
+        # yt-dlp's own HTTPError has `status`, urllib's has `code`
+        if getattr(cause, 'status', None) in EXPIRED_URL_STATUSES or \
+                getattr(cause, 'code', None) in EXPIRED_URL_STATUSES:
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return False
+
+
+def format_size(size):
+    """Convert bytes to human-readable format"""
+    if size < 1024:
+        return f"{size} B"
+    elif size < 1024 ** 2:
+        return f"{size / 1024:.2f} KB"
+    elif size < 1024 ** 3:
+        return f"{size / (1024 ** 2):.2f} MB"
+    else:
+        return f"{size / (1024 ** 3):.2f} GB"
+
+
+def build_download_options(output_folder, audio_only=False, max_height=None, quiet=False,
+                           performance=None, format_spec=None, audio_format='best', stream=None,
+                           keep_streamed=False):
+    """Build the yt-dlp options for a download into `output_folder`
+
+    `format_spec` (e.g. from a `grabyt.formats.QualityChoice`) overrides the
+    height cap. `audio_format` is one of `grabyt.formats.AUDIO_FORMATS`: remux
+    formats copy the audio stream, transcode formats are re-encoded after the
+    download by `DownloadTask`. `performance` is a
+    `grabyt.settings.PerformanceSettings` to apply.
+
+    With a `stream` (`grabyt.stream.StreamTarget`) the download goes there
+    instead of into `output_folder`, with no post-processing; a copy is
+    saved in `output_folder` only if `keep_streamed` is set.
+    """
+    download_options = {
+        'outtmpl': f'{output_folder}/%(title)s.%(ext)s',
+        'format': format_selector(audio_only, max_height),
+        'quiet': quiet,
+        'no_warnings': quiet,
+    }
+    if format_spec and not audio_only:
+        download_options['format'] = format_spec
+    if quiet:
+        download_options['noprogress'] = True
+
+    if audio_only:
+        download_options['format'] = audio_selector(audio_format)
+        if audio_format in AUDIO_TRANSCODE_FORMATS:
+            # Not a yt-dlp option: DownloadTask runs these after yt-dlp's own post-processing
+            download_options['deferred_postprocessors'] = [audio_postprocessor(audio_format)]
+        else:
+            download_options['postprocessors'] = [audio_postprocessor(audio_format)]
+
+    if performance:
+        performance.apply(download_options)
+
+    if stream:
+        # Not yt-dlp options: DownloadTask streams to the target and saves the copy
+        download_options['stream'] = stream
+        if keep_streamed:
+            download_options['stream_copy'] = download_options['outtmpl']
+        download_options.pop('postprocessors', None)
+        download_options.pop('deferred_postprocessors', None)
+        stream.apply(download_options)
+
+    return download_options
+
+
+def progress_from_hook(d):
+    """Reduce a yt-dlp progress hook dict to the fields progress displays need"""
+    return {
+        'status': d.get('status'),
+        'downloaded_bytes': d.get('downloaded_bytes') or 0,
+        'total_bytes': d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+        'speed': d.get('speed'),
+    }
+
+
+def parse_url_list(lines):
+    """Return the URLs from lines of text, skipping blanks and '#' comments"""
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith('#')]
+
+
+def iter_playlist_entries(info_dict):
+    """Yield {'url', 'title'} for each video of a flat playlist, as it is listed"""
+    # Entries may be a generator or a paged list that fetches pages on demand
+    for entry in info_dict.get('entries') or []:
+        if not entry:
+            continue
+        if entry.get('_type') in PLAYLIST_TYPES:
+            yield from iter_playlist_entries(entry)
+            continue
+        url = entry.get('webpage_url') or entry.get('original_url') or entry.get('url')
+        if url:
+            yield {'url': url, 'title': entry.get('title') or url}
+
+
+def batched_entries(entries, size=25, interval=0.25):
+    """Group streamed entries so listeners get a few calls instead of hundreds"""
+    batch = []
+    last_flush = time.monotonic()
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size or time.monotonic() - last_flush >= interval:
+            yield batch
+            batch = []
+            last_flush = time.monotonic()
+    if batch:
+        yield batch
+
+
+def fetch_metadata(url, metadata_cache=None, on_playlist=None, on_entries=None):
+    """Fetch what the quality picker needs for a URL
+
+    Returns `(choices, info_dict)` with `grabyt.formats.QualityChoice` entries
+    for the picker. Playlists are listed flat: `on_playlist` gets the title,
+    `on_entries` gets batches of entries as they are listed, and the returned
+    info dict is a `{'_type': 'playlist', ...}` summary.
+    """
+    # A cache hit needs no YoutubeDL at all
+    info_dict = metadata_cache.get(url) if metadata_cache else None
+    if info_dict is None:
+        with metadata_youtube_dl() as ydl:
+            info_dict = ydl.extract_info(url, download=False, process=False)
+            if info_dict.get('_type') in ('url', 'url_transparent'):
+                info_dict = ydl.process_ie_result(info_dict, download=False)
+
+            if info_dict.get('_type') in PLAYLIST_TYPES:
+                title = info_dict.get('title') or url
+                if on_playlist:
+                    on_playlist(title)
+
+                count = 0
+                for batch in batched_entries(iter_playlist_entries(info_dict)):
+                    count += len(batch)
+                    if on_entries:
+                        on_entries(batch)
+                return height_choices(PLAYLIST_QUALITIES), {'_type': 'playlist', 'title': title, 'playlist_count': count}
+
+        if metadata_cache:
+            metadata_cache.put(url, info_dict)
+
+    return FormatIndex(info_dict).choices(), info_dict
+
+
+class DownloadTask:
+    """Download one URL with yt-dlp, reporting through optional callbacks
+
+    Callbacks run on the thread that calls `run()`. `cancel()`, `pause()` and
+    `resume()` may be called from any thread and take effect at the next
+    progress callback. With a `journal`, progress is recorded under
+    `journal_id` so the job can be resumed after a crash.
+
+    Merging, conversion and the transcodes from `deferred_postprocessors` run
+    after the download. With a `postprocess_pool` they are handed to it and
+    `run()` returns as soon as the network part is done; `postprocess_future`
+    then resolves once the file is finished.
+
+    Finished downloads are added to `archive` (`grabyt.archive.DownloadArchive`).
+    With `skip_archived`, videos it already has are skipped before any network
+    access: `run()` returns at once and `archived` holds the archive entry.
+
+    `metrics` is a `grabyt.metrics.JobMetrics` that is moved through the
+    phases as the job runs; the caller finishes it with the final state.
+    `bandwidth` is the job's `grabyt.bandwidth.BandwidthShare`; the progress
+    hook sleeps in it while the job is over its share, and it is released
+    once the streams are downloaded. Reads use small fixed blocks only if the
+    share can be throttled when the job starts.
+
+    Options built with a `stream` target send the download there as it
+    arrives instead of writing a file, see `grabyt.stream`.
+    """
+    def __init__(self, url, download_options, info_dict=None, metadata_cache=None,
+                 on_state=None, on_title=None, on_progress=None, on_entries=None,
+                 journal=None, journal_id=None, postprocess_pool=None, archive=None,
+                 skip_archived=True, metrics=None, bandwidth=None):
+        self.url = url
+        self.download_options = download_options
+        self.info_dict = info_dict
+        self.metadata_cache = metadata_cache
+        self.journal = journal
+        self.journal_id = journal_id
+        self.postprocess_pool = postprocess_pool
+        self.postprocess_future = None
+        self.archive = archive
+        self.skip_archived = skip_archived
+        self.archived = None
+        self.metrics = metrics
+        self.bandwidth = bandwidth
+        # Last reported size per file, to pass only new bytes to `bandwidth`
+        self._transferred = {}
+        self._downloaded = None
+        self.on_state = on_state
+        self.on_title = on_title
+        self.on_progress = on_progress
+        self.on_entries = on_entries
+        self._state = None
+        self._cancel_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+
+    def cancel(self):
+        """Request cancellation; takes effect at the next progress callback"""
+        self._cancel_event.set()
+        self._resume_event.set()
+        if self.bandwidth:
+            # Wakes the download if it is waiting for its share
+            self.bandwidth.release()
+        if self.postprocess_future:
+            # Only drops it if the post-processing stage hasn't started it yet
+            self.postprocess_future.cancel()
+
+    def pause(self):
+        """Hold the transfer at the next progress callback"""
+        self._resume_event.clear()
+
+    def resume(self):
+        """Continue a paused transfer"""
+        self._resume_event.set()
+
+    def is_paused(self):
+        return not self._resume_event.is_set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _notify(self, callback, *args):
+        if callback:
+            callback(*args)
+
+    def _enter(self, phase):
+        if self.metrics:
+            self.metrics.enter(phase)
+
+    def _set_state(self, state):
+        # Hooks fire per chunk, listeners only hear about actual changes
+        if state != self._state:
+            self._state = state
+            self._notify(self.on_state, state)
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise load_yt_dlp().utils.DownloadCancelled()
+
+    def _progress_hook(self, d):
+        """Forward yt-dlp progress and honour pause/cancel requests"""
+        # Block here while paused; yt-dlp simply stops reading from the socket
+        self._resume_event.wait()
+        self._check_cancelled()
+
+        if self.journal:
+            self.journal.record_progress(self.journal_id, d)
+        if self.metrics:
+            self._enter(PHASE_DOWNLOAD)
+            self.metrics.record_progress(d)
+
+        if d.get('status') == 'downloading':
+            self._set_state(STATE_DOWNLOADING)
+        self._notify(self.on_progress, progress_from_hook(d))
+
+        if self.bandwidth and d.get('status') == 'downloading':
+            self._throttle(d)
+
+    def _throttle(self, d):
+        """Hold the download thread until the bytes since the last report fit the job's share"""
+        filename = d.get('filename')
+        downloaded = d.get('downloaded_bytes') or 0
+        previous = self._transferred.get(filename)
+        self._transferred[filename] = downloaded
+        # A resumed file's first report includes what was already on disk
+        if previous is not None and downloaded > previous:
+            self.bandwidth.consume(downloaded - previous)
+            self._check_cancelled()
+
+    def _postprocessor_hook(self, d):
+        """Report merging/extraction as a separate state"""
+        if d.get('status') == 'started':
+            self._set_state(STATE_POST_PROCESSING)
+        if d.get('postprocessor') == 'MoveFiles':
+            # Moving the finished file into place is the only write not overlapped with the download
+            self._enter(PHASE_DISK_WRITE if d.get('status') == 'started' else PHASE_POSTPROCESS)
+
+    def _capture_post_process(self, filename, info, files_to_move=None):
+        """Stands in for `YoutubeDL.post_process`, keeping the download for the post-processing stage"""
+        info['filepath'] = filename
+        self._downloaded = (filename, dict(info), files_to_move)
+        return info
+
+    def _post_process(self, ydl, filename, info, files_to_move, deferred_postprocessors):
+        """Merge and convert a downloaded file as yt-dlp would have, then run the deferred transcodes"""
+        self._enter(PHASE_POSTPROCESS)
+        info = load_yt_dlp().YoutubeDL.post_process(ydl, filename, info, files_to_move)
+        if deferred_postprocessors:
+            info = run_postprocessors(ydl, deferred_postprocessors, info)
+        if self.archive:
+            self.archive.add(info, self.url)
+        return info
+
+    def run(self):
+        """Download the URL and return its title, or expand a playlist via `on_entries`"""
+        try:
+            return self._run()
+        finally:
+            # On every exit, archive skips included: a share left registered counts as a competing job
+            if self.bandwidth:
+                self.bandwidth.release()
+
+    def _run(self):
+        if self.archive and self.skip_archived:
+            self.archived = self.archive.lookup(self.url, self.info_dict)
+            if self.archived:
+                return self.archived['title'] or self.url
+
+        self._set_state(STATE_FETCHING)
+        self._enter(PHASE_EXTRACT)
+        download_options = dict(self.download_options)
+        deferred_postprocessors = download_options.pop('deferred_postprocessors', None)
+        stream = download_options.pop('stream', None)
+        stream_copy = download_options.pop('stream_copy', None)
+        download_options['progress_hooks'] = [self._progress_hook]
+        download_options['postprocessor_hooks'] = [self._postprocessor_hook]
+        if self.bandwidth and self.bandwidth.throttled() and 'buffersize' not in download_options:
+            download_options['buffersize'] = THROTTLE_BLOCK_SIZE
+            download_options['noresizebuffer'] = True
+
+        ydl = create_youtube_dl(download_options)
+        ydl.post_process = self._capture_post_process
+        if stream:
+            return self._stream(ydl, stream, stream_copy)
+        handed_off = False
+        try:
+            video_title = self._download(ydl)
+            if self._downloaded:
+                self._set_state(STATE_POST_PROCESSING)
+                filename, info, files_to_move = self._downloaded
+                args = (ydl, filename, info, files_to_move, deferred_postprocessors)
+                if self.postprocess_pool:
+                    # Free the download slot; the pool closes ydl when it is done with it
+                    self._enter(PHASE_POSTPROCESS_WAIT)
+                    self.postprocess_future = self.postprocess_pool.submit(self._post_process, *args)
+                    self.postprocess_future.add_done_callback(lambda future: ydl.close())
+                    handed_off = True
+                else:
+                    self._post_process(*args)
+        finally:
+            if not handed_off:
+                ydl.close()
+
+        return video_title
+
+    def _stream(self, ydl, target, copy_outtmpl=None):
+        """Download into `target` (`grabyt.stream.StreamTarget`) as it arrives, keeping a copy if asked"""
+        copy_path = None
+        if copy_outtmpl:
+            # Named once the title is known; written as the stream goes out
+            copy_path = f"{os.path.dirname(copy_outtmpl)}/.grabyt-stream-{id(self):x}.part"
+        # yt-dlp doesn't post-process streams, so the info to name the copy comes from the progress hooks
+        streamed = {}
+        ydl.add_progress_hook(lambda d: d.get('status') == 'finished' and streamed.update(d['info_dict']))
+        redirect = target.redirect(copy_path, on_error=self.cancel)
+        try:
+            try:
+                with redirect:
+                    video_title = self._download(ydl)
+            except Exception:
+                if not redirect.error:
+                    raise
+            if redirect.error:
+                # The reader went away and cancelled the download; report it as failed, not cancelled
+                self._cancel_event.clear()
+                raise OSError(f"stream to {target.describe()} closed: {redirect.error}")
+
+            if streamed and copy_path and os.path.exists(copy_path):
+                self._enter(PHASE_DISK_WRITE)
+                info = dict(streamed, ext=target.extension(streamed))
+                info['filepath'] = ydl.prepare_filename(info, outtmpl=copy_outtmpl)
+                os.replace(copy_path, info['filepath'])
+                if self.archive:
+                    self.archive.add(info, self.url)
+        finally:
+            if copy_path and os.path.exists(copy_path):
+                os.unlink(copy_path)
+            ydl.close()
+        return video_title
+
+    def _download(self, ydl):
+        """Resolve the URL and download its streams; post-processing is left to `run()`"""
+        if self.info_dict is None and self.metadata_cache:
+            # Only metadata whose format URLs still work is worth reusing here
+            self.info_dict = self.metadata_cache.get(self.url, require_fresh_urls=True)
+
+        if self.info_dict:
+            # Reuse the metadata from the quality fetch, like --load-info-json
+            info_dict = ydl.sanitize_info(self.info_dict, remove_private_keys=True)
+        else:
+            # Extract once without processing; processing below does the download
+            info_dict = ydl.extract_info(self.url, download=False, process=False)
+            if self.metadata_cache and info_dict.get('_type', 'video') == 'video':
+                self.metadata_cache.put(self.url, info_dict)
+        video_title = info_dict.get('title') or self.url
+        self._notify(self.on_title, video_title)
+        if self.metrics:
+            self.metrics.title = video_title
+
+        if info_dict.get('_type') in PLAYLIST_TYPES:
+            # Hand the videos back to the caller so they download in parallel
+            count = 0
+            for batch in batched_entries(iter_playlist_entries(info_dict)):
+                self._check_cancelled()
+                count += len(batch)
+                self._notify(self.on_entries, batch)
+            return f"{video_title} ({count} videos)"
+
+        self._check_cancelled()
+
+        utils = load_yt_dlp().utils
+        try:
+            # Format selection runs until the first progress hook moves on to the download
+            self._enter(PHASE_FORMAT_SELECTION)
+            ydl.process_ie_result(info_dict, download=True)
+        except (utils.DownloadError, utils.ReExtractInfo) as e:
+            if not self.info_dict or self._cancel_event.is_set() or not urls_expired(e):
+                raise
+            # Stored format URLs may have expired, extract again from the page
+            self.info_dict = None
+            ydl.extract_info(self.url, download=True)
+
+        return video_title
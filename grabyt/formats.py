@@ -0,0 +1,245 @@
+"""Structured index of a video's formats for choosing codec, fps, container and size"""
+
+# Protocols that download a stream as many small fragments
+FRAGMENTED_PROTOCOLS = ('http_dash_segments', 'm3u8', 'm3u8_native', 'ism', 'f4m')
+
+# Codec string prefixes, e.g. 'avc1.640028' or 'vp09.00.40.08', mapped to a family
+CODEC_FAMILIES = (
+    ('avc', 'h264'), ('h264', 'h264'),
+    ('hev', 'h265'), ('hvc', 'h265'), ('h265', 'h265'),
+    ('vp09', 'vp9'), ('vp9', 'vp9'), ('vp8', 'vp8'),
+    ('av01', 'av1'), ('av1', 'av1'),
+    ('mp4a', 'aac'), ('aac', 'aac'),
+    ('opus', 'opus'), ('vorbis', 'vorbis'), ('mp3', 'mp3'), ('flac', 'flac'),
+    ('ac-3', 'ac3'), ('ec-3', 'eac3'),
+)
+CODEC_NAMES = {'h264': 'H.264', 'h265': 'H.265', 'vp9': 'VP9', 'vp8': 'VP8', 'av1': 'AV1'}
+
+# Audio that merges into a video's container without falling back to mkv
+COMPATIBLE_AUDIO = {'mp4': ('m4a', 'mp4'), 'webm': ('webm',)}
+
+# Audio formats that only need the stream copied into a container. 'best'
+# keeps whatever the source codec is (AAC -> .m4a, Opus -> .opus, ...)
+AUDIO_REMUX_FORMATS = ('best', 'm4a', 'opus', 'ogg')
+# Audio formats that need an ffmpeg re-encode unless the source already matches
+AUDIO_TRANSCODE_FORMATS = ('mp3', 'aac', 'flac')
+AUDIO_FORMATS = AUDIO_REMUX_FORMATS + AUDIO_TRANSCODE_FORMATS
+
+# Source codecs to prefer per audio format, so no re-encode is needed
+AUDIO_SOURCE_CODECS = {
+    'm4a': ('mp4a',), 'aac': ('mp4a',),
+    'opus': ('opus',), 'ogg': ('opus', 'vorbis'),
+    'mp3': ('mp3',), 'flac': ('flac',),
+}
+# FFmpegVideoRemuxer mappings; sources in other containers are left as they are
+AUDIO_REMUX_MAPPINGS = {'m4a': 'mp4>m4a', 'opus': 'webm>opus', 'ogg': 'webm>ogg/opus>ogg'}
+
+
+def codec_family(codec):
+    """Return a codec family like 'av1' or 'aac', None for none/unknown"""
+    if not codec or codec == 'none':
+        return None
+    codec = codec.lower()
+    for prefix, family in CODEC_FAMILIES:
+        if codec.startswith(prefix):
+            return family
+    return codec.split('.')[0]
+
+
+def audio_selector(audio_format='best'):
+    """Return the yt-dlp format string for the best audio stream suited to `audio_format`"""
+    preferred = [f'bestaudio[acodec^={codec}]' for codec in AUDIO_SOURCE_CODECS.get(audio_format, ())]
+    return '/'.join(preferred + ['bestaudio/best'])
+
+
+def audio_postprocessor(audio_format='best'):
+    """Return the yt-dlp postprocessor that puts the audio into `audio_format`
+
+    Remux formats copy the stream; transcode formats only re-encode if the
+    source codec differs.
+    """
+    if audio_format in AUDIO_REMUX_MAPPINGS:
+        return {'key': 'FFmpegVideoRemuxer', 'preferedformat': AUDIO_REMUX_MAPPINGS[audio_format]}
+    return {'key': 'FFmpegExtractAudio', 'preferredcodec': audio_format}
+
+
+def format_selector(audio_only=False, max_height=None):
+    """Return the yt-dlp format string for a download type and height cap"""
+    if audio_only:
+        return audio_selector()
+    if max_height:
+        # `<=?` keeps streams whose height is unknown eligible
+        return f'bestvideo[height<=?{max_height}]+bestaudio/best[height<=?{max_height}]'
+    return 'bestvideo+bestaudio/best'
+
+
+class FormatRecord:
+    """The fields of one yt-dlp format that matter for choosing it"""
+    __slots__ = ('format_id', 'ext', 'height', 'fps', 'vcodec', 'acodec', 'tbr', 'abr',
+                 'filesize', 'filesize_approx', 'protocol', 'has_video', 'has_audio')
+
+    def __init__(self, f):
+        self.format_id = f.get('format_id')
+        self.ext = f.get('ext')
+        self.height = f.get('height')
+        self.fps = round(f['fps']) if f.get('fps') else None
+        self.vcodec = codec_family(f.get('vcodec'))
+        self.acodec = codec_family(f.get('acodec'))
+        self.tbr = f.get('tbr')
+        self.abr = f.get('abr')
+        self.filesize = f.get('filesize')
+        self.filesize_approx = f.get('filesize_approx')
+        self.protocol = f.get('protocol') or ''
+        # yt-dlp leaves codecs unset when it doesn't know them, 'none' means absent
+        self.has_video = f.get('vcodec') != 'none' and bool(self.height or f.get('vcodec'))
+        self.has_audio = f.get('acodec') != 'none' and (bool(f.get('acodec')) or f.get('vcodec') is None)
+
+    @property
+    def muxed(self):
+        """Video and audio in one file, so nothing needs merging"""
+        return self.has_video and self.has_audio
+
+    @property
+    def fragmented(self):
+        """Delivered as DASH/HLS fragments rather than one progressive file"""
+        return self.protocol.split('+')[0] in FRAGMENTED_PROTOCOLS
+
+    @property
+    def kind(self):
+        if self.muxed:
+            return 'muxed'
+        return 'video' if self.has_video else 'audio'
+
+    def estimated_size(self, duration=None):
+        """Return the file size in bytes, estimated from the bitrate if not given"""
+        if self.filesize or self.filesize_approx:
+            return self.filesize or self.filesize_approx
+        if self.tbr and duration:
+            # tbr is in kbit/s
+            return int(self.tbr * 125 * duration)
+        return None
+
+    def __repr__(self):
+        return f"<FormatRecord {self.format_id} {self.kind} {self.height}p {self.vcodec}/{self.acodec}>"
+
+
+class QualityChoice:
+    """One entry of the quality picker and the yt-dlp format string behind it"""
+    __slots__ = ('height', 'fps', 'codec', 'muxed', 'format_spec', 'size')
+
+    def __init__(self, height, format_spec, fps=None, codec=None, muxed=False, size=None):
+        self.height = height
+        self.format_spec = format_spec
+        self.fps = fps
+        self.codec = codec
+        self.muxed = muxed
+        self.size = size
+
+    def describe(self):
+        """Return e.g. '1080p60 · AV1' or '720p · H.264 · pre-muxed, no merge'"""
+        parts = [f"{self.height}p{self.fps if self.fps and self.fps > 30 else ''}"]
+        if self.codec:
+            parts.append(CODEC_NAMES.get(self.codec, self.codec.upper()))
+        if self.muxed:
+            parts.append("pre-muxed, no merge")
+        return " · ".join(parts)
+
+
+def height_choices(heights):
+    """Return height-only choices, for when the formats aren't known yet (playlists)"""
+    return [QualityChoice(height, format_selector(max_height=height)) for height in heights]
+
+
+class FormatIndex:
+    """The formats of one video, queryable by kind, codec, height, fps and size
+
+    For example `index.smallest('video', codec='av1', min_height=1080)` or
+    `index.best('muxed', max_height=720)`.
+    """
+    def __init__(self, info_dict):
+        self.duration = info_dict.get('duration')
+        self.records = [FormatRecord(f) for f in info_dict.get('formats') or []
+                        if f.get('format_id')]
+        self.records = [r for r in self.records if r.has_video or r.has_audio]
+        self.by_id = {r.format_id: r for r in self.records}
+
+    def size(self, record):
+        return record.estimated_size(self.duration)
+
+    def query(self, kind=None, codec=None, min_height=None, max_height=None, min_fps=None,
+              max_fps=None, ext=None, fragmented=None):
+        """Return the formats matching every given filter"""
+        matches = []
+        for r in self.records:
+            if kind and r.kind != kind:
+                continue
+            if codec and codec not in (r.vcodec, r.acodec):
+                continue
+            if min_height and (r.height or 0) < min_height:
+                continue
+            if max_height and r.height and r.height > max_height:
+                continue
+            if min_fps and (r.fps or 0) < min_fps:
+                continue
+            if max_fps and r.fps and r.fps > max_fps:
+                continue
+            if ext and r.ext != ext:
+                continue
+            if fragmented is not None and r.fragmented != fragmented:
+                continue
+            matches.append(r)
+        return matches
+
+    def smallest(self, kind=None, **filters):
+        """Return the matching format with the smallest known size, or None"""
+        sized = [(self.size(r), r) for r in self.query(kind, **filters)]
+        sized = [(size, r) for size, r in sized if size]
+        return min(sized, key=lambda item: item[0])[1] if sized else None
+
+    def best(self, kind=None, **filters):
+        """Return the highest quality matching format, or None"""
+        matches = self.query(kind, **filters)
+        return max(matches, key=lambda r: (r.height or 0, r.fps or 0, r.tbr or 0), default=None)
+
+    def best_audio(self, video=None):
+        """Return the best audio-only format, preferring one that fits the video's container"""
+        audio = self.query('audio')
+        if not audio:
+            return None
+        compatible = COMPATIBLE_AUDIO.get(video.ext, ()) if video else ()
+        return max(audio, key=lambda r: (r.ext in compatible, r.abr or r.tbr or 0))
+
+    def heights(self):
+        """Return the distinct video heights, highest first"""
+        return sorted({r.height for r in self.records if r.has_video and r.height}, reverse=True)
+
+    def choices(self):
+        """Return picker entries: the best video per height, fps and codec, plus pre-muxed files
+
+        Format IDs are pinned, with a height-capped fallback in case they
+        disappear before the download starts.
+        """
+        best = {}
+        for r in self.records:
+            if r.has_video and r.height:
+                key = (r.height, r.fps, r.vcodec, r.muxed)
+                if key not in best or (r.tbr or 0) > (best[key].tbr or 0):
+                    best[key] = r
+
+        choices = []
+        for (height, fps, codec, muxed), video in best.items():
+            fallback = format_selector(max_height=height)
+            if muxed:
+                format_spec, size = f"{video.format_id}/{fallback}", self.size(video)
+            else:
+                audio = self.best_audio(video)
+                if audio is None:
+                    format_spec, size = f"{video.format_id}/{fallback}", self.size(video)
+                else:
+                    format_spec = f"{video.format_id}+{audio.format_id}/{fallback}"
+                    sizes = (self.size(video), self.size(audio))
+                    size = sum(sizes) if all(sizes) else None
+            choices.append(QualityChoice(height, format_spec, fps, codec, muxed, size))
+
+        choices.sort(key=lambda c: (-c.height, -(c.fps or 0), c.muxed, c.size or float('inf')))
+        return choices
@@ -0,0 +1,138 @@
+"""Crash-safe journal of unfinished downloads so they can be resumed after a restart"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from grabyt.paths import user_data_dir
+
+# Byte progress is written at most this often per job; yt-dlp resumes from the
+# .part file itself, the journal only needs to know the job exists
+PROGRESS_INTERVAL = 2.0
+
+
+def format_id_from_hook(info_dict):
+    """Return the format actually being downloaded, e.g. '137+140' for merged streams"""
+    requested = info_dict.get('requested_formats')
+    if requested:
+        return '+'.join(f['format_id'] for f in requested if f.get('format_id'))
+    return info_dict.get('format_id')
+
+
+def resume_options(entry):
+    """Return download options that pick the same streams the interrupted job used
+
+    The original format string stays as a fallback in case the pinned format
+    IDs are no longer offered.
+    """
+    download_options = dict(entry['download_options'])
+    if entry['format_id']:
+        download_options['format'] = f"{entry['format_id']}/{download_options.get('format', 'best')}"
+    return download_options
+
+
+def partial_bytes(entry):
+    """Return how many bytes of an unfinished job are already on disk"""
+    filename = entry['filename']
+    if not filename:
+        return 0
+    for path in (filename + '.part', filename):
+        if os.path.exists(path):
+            return os.path.getsize(path)
+    return 0
+
+
+class DownloadJournal:
+    """SQLite record of every queued or running download
+
+    A job is added when it is queued and removed once it finishes, fails or
+    is cancelled by the user. Whatever is left after a crash or a close is
+    what can be resumed. SQLite commits are atomic, so a crash mid-write
+    leaves the previous state intact.
+    """
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(user_data_dir(), 'journal.sqlite3')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_write = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    journal_id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    title TEXT,
+                    download_options TEXT NOT NULL,
+                    format_id TEXT,
+                    filename TEXT,
+                    downloaded_bytes INTEGER NOT NULL DEFAULT 0,
+                    total_bytes INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+
+    def add(self, url, download_options, title=None):
+        """Record a newly queued job and return its journal ID"""
+        journal_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (journal_id, url, title, download_options, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (journal_id, url, title, json.dumps(download_options), now, now))
+        return journal_id
+
+    def record_progress(self, journal_id, d):
+        """Store the format, file and byte progress from a yt-dlp progress hook dict"""
+        now = time.monotonic()
+        if d.get('status') == 'downloading' and now - self._last_write.get(journal_id, 0) < PROGRESS_INTERVAL:
+            return
+        self._last_write[journal_id] = now
+
+        info_dict = d.get('info_dict') or {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET title = COALESCE(?, title), format_id = COALESCE(?, format_id), "
+                "filename = COALESCE(?, filename), downloaded_bytes = ?, total_bytes = ?, updated_at = ? "
+                "WHERE journal_id = ?",
+                (info_dict.get('title'), format_id_from_hook(info_dict), d.get('filename'),
+                 d.get('downloaded_bytes') or 0,
+                 d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+                 time.time(), journal_id))
+
+    def remove(self, journal_id):
+        self._last_write.pop(journal_id, None)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE journal_id = ?", (journal_id,))
+
+    def unfinished(self):
+        """Return the jobs left over from earlier runs, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT journal_id, url, title, download_options, format_id, filename, "
+                "downloaded_bytes, total_bytes FROM jobs ORDER BY created_at").fetchall()
+        return [{
+            'journal_id': journal_id,
+            'url': url,
+            'title': title,
+            'download_options': json.loads(download_options),
+            'format_id': format_id,
+            'filename': filename,
+            'downloaded_bytes': downloaded_bytes,
+            'total_bytes': total_bytes,
+        } for journal_id, url, title, download_options, format_id, filename, downloaded_bytes, total_bytes in rows]
+
+    def clear(self):
+        self._last_write.clear()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
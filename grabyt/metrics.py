@@ -0,0 +1,256 @@
+"""Per-job phase timings, bytes and throughput, exportable as JSON, CSV or Prometheus text"""
+import csv
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A job moves through these in order; any of them may be skipped
+PHASE_QUEUED = 'queued'
+PHASE_EXTRACT = 'extract'
+PHASE_FORMAT_SELECTION = 'format_selection'
+PHASE_DOWNLOAD = 'download'
+PHASE_POSTPROCESS_WAIT = 'postprocess_wait'
+PHASE_POSTPROCESS = 'postprocess'
+PHASE_DISK_WRITE = 'disk_write'
+
+PHASES = (PHASE_QUEUED, PHASE_EXTRACT, PHASE_FORMAT_SELECTION, PHASE_DOWNLOAD,
+          PHASE_POSTPROCESS_WAIT, PHASE_POSTPROCESS, PHASE_DISK_WRITE)
+PHASE_LABELS = {
+    PHASE_QUEUED: 'Queued', PHASE_EXTRACT: 'Extract', PHASE_FORMAT_SELECTION: 'Format selection',
+    PHASE_DOWNLOAD: 'Download', PHASE_POSTPROCESS_WAIT: 'Post-processing queue',
+    PHASE_POSTPROCESS: 'Post-processing', PHASE_DISK_WRITE: 'Disk write',
+}
+
+# Peak throughput is measured over windows of at least this many seconds
+PEAK_WINDOW = 1.0
+
+CSV_FIELDS = ('url', 'title', 'state', 'total_seconds') + tuple(f'{phase}_seconds' for phase in PHASES) + (
+    'bytes', 'avg_bytes_per_second', 'peak_bytes_per_second')
+
+
+class JobMetrics:
+    """Timeline of one job: time spent per phase, bytes transferred and throughput
+
+    `enter()` closes the current phase and opens the next, so each call is a
+    clock read and a dict update. Download threads, the post-processing pool
+    and the display may all touch a job, hence the lock.
+    """
+    def __init__(self, url, title=None):
+        self.url = url
+        self.title = title
+        self.state = None
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+        self._phase = PHASE_QUEUED
+        self._phase_started = time.monotonic()
+        self._started = self._phase_started
+        self._finished = None
+        self._file_bytes = {}
+        self._window_bytes = 0
+        self._window_started = None
+        self.peak_bytes_per_second = 0.0
+
+    @property
+    def phase(self):
+        return self._phase
+
+    def _close_phase(self, now):
+        if self._phase:
+            self.phases[self._phase] += now - self._phase_started
+        self._phase_started = now
+
+    def enter(self, phase):
+        """Start timing `phase`, ending whichever phase was running"""
+        with self._lock:
+            if phase == self._phase or self._finished is not None:
+                return
+            self._close_phase(time.monotonic())
+            self._phase = phase
+
+    def finish(self, state):
+        with self._lock:
+            if self._finished is not None:
+                return
+            now = time.monotonic()
+            self._close_phase(now)
+            self._phase = None
+            self._finished = now
+            self.state = state
+
+    def record_progress(self, d):
+        """Count bytes and peak throughput from a yt-dlp progress hook dict"""
+        now = time.monotonic()
+        with self._lock:
+            # Merged downloads report each stream under its own file name
+            self._file_bytes[d.get('filename')] = d.get('downloaded_bytes') or 0
+            total = sum(self._file_bytes.values())
+            if self._window_started is None:
+                self._window_started, self._window_bytes = now, total
+            elif now - self._window_started >= PEAK_WINDOW:
+                rate = (total - self._window_bytes) / (now - self._window_started)
+                self.peak_bytes_per_second = max(self.peak_bytes_per_second, rate)
+                self._window_started, self._window_bytes = now, total
+
+    @property
+    def bytes(self):
+        with self._lock:
+            return sum(self._file_bytes.values())
+
+    def snapshot(self):
+        """Return the metrics as a flat dict, counting the running phase up to now"""
+        with self._lock:
+            now = time.monotonic()
+            phases = dict(self.phases)
+            if self._phase:
+                phases[self._phase] += now - self._phase_started
+            total_bytes = sum(self._file_bytes.values())
+            total_seconds = (self._finished or now) - self._started
+            download_seconds = phases[PHASE_DOWNLOAD]
+            return {
+                'url': self.url,
+                'title': self.title,
+                'state': self.state,
+                'phase': self._phase,
+                'created_at': self.created_at,
+                'total_seconds': total_seconds,
+                'phases': phases,
+                'bytes': total_bytes,
+                'avg_bytes_per_second': total_bytes / download_seconds if download_seconds else 0.0,
+                # Short downloads never fill a window; their average is their peak
+                'peak_bytes_per_second': self.peak_bytes_per_second or (
+                    total_bytes / download_seconds if download_seconds else 0.0),
+            }
+
+
+class StartupTimer:
+    """Milestones of application start-up, in seconds since `started` (a `time.perf_counter()` value)"""
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.marks = {}
+
+    def mark(self, name):
+        """Record the first time `name` is reached"""
+        self.marks.setdefault(name, time.perf_counter() - self.started)
+
+    def report(self):
+        return ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.marks.items())
+
+
+class MetricsRegistry:
+    """Collects the `JobMetrics` of a session and exports them
+
+    `stages` maps a stage name to a `grabyt.progress.StageMeter` whose
+    utilization is included in the Prometheus output.
+    """
+    def __init__(self, stages=None):
+        self.stages = stages or {}
+        self._lock = threading.Lock()
+        self._jobs = []
+
+    def new_job(self, url, title=None):
+        job = JobMetrics(url, title)
+        with self._lock:
+            self._jobs.append(job)
+        return job
+
+    def snapshots(self):
+        with self._lock:
+            jobs = list(self._jobs)
+        return [job.snapshot() for job in jobs]
+
+    def to_json(self):
+        return json.dumps(self.snapshots(), indent=2)
+
+    def to_csv(self):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for snapshot in self.snapshots():
+            row = dict(snapshot)
+            for phase, seconds in snapshot['phases'].items():
+                row[f'{phase}_seconds'] = round(seconds, 3)
+            row['total_seconds'] = round(snapshot['total_seconds'], 3)
+            row['avg_bytes_per_second'] = round(snapshot['avg_bytes_per_second'])
+            row['peak_bytes_per_second'] = round(snapshot['peak_bytes_per_second'])
+            writer.writerow(row)
+        return out.getvalue()
+
+    def export(self, path):
+        """Write JSON or CSV, chosen by the file extension"""
+        if path.lower().endswith('.csv'):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+    def export_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(self.to_csv())
+
+    def to_prometheus(self):
+        """Return aggregate metrics in the Prometheus text exposition format"""
+        snapshots = self.snapshots()
+        states = {}
+        phase_seconds = dict.fromkeys(PHASES, 0.0)
+        total_bytes = 0
+        peak = 0.0
+        for snapshot in snapshots:
+            state = snapshot['state'] or 'active'
+            states[state] = states.get(state, 0) + 1
+            for phase, seconds in snapshot['phases'].items():
+                phase_seconds[phase] += seconds
+            total_bytes += snapshot['bytes']
+            peak = max(peak, snapshot['peak_bytes_per_second'])
+
+        lines = ['# HELP grabyt_jobs Jobs by state.', '# TYPE grabyt_jobs gauge']
+        lines += [f'grabyt_jobs{{state="{state}"}} {count}' for state, count in sorted(states.items())]
+        lines += ['# HELP grabyt_phase_seconds_total Time spent by all jobs in each phase.',
+                  '# TYPE grabyt_phase_seconds_total counter']
+        lines += [f'grabyt_phase_seconds_total{{phase="{phase}"}} {seconds:.3f}'
+                  for phase, seconds in phase_seconds.items()]
+        lines += ['# HELP grabyt_downloaded_bytes_total Bytes downloaded by all jobs.',
+                  '# TYPE grabyt_downloaded_bytes_total counter',
+                  f'grabyt_downloaded_bytes_total {total_bytes}',
+                  '# HELP grabyt_peak_bytes_per_second Highest throughput of any job.',
+                  '# TYPE grabyt_peak_bytes_per_second gauge',
+                  f'grabyt_peak_bytes_per_second {peak:.0f}']
+        if self.stages:
+            snapshots = {name: meter.snapshot() for name, meter in self.stages.items()}
+            for field, help_text in (('busy', 'Busy workers'), ('waiting', 'Jobs waiting'),
+                                     ('capacity', 'Worker limit'), ('utilization', 'Share of capacity used')):
+                lines += [f'# HELP grabyt_stage_{field} {help_text} per pipeline stage.',
+                          f'# TYPE grabyt_stage_{field} gauge']
+                lines += [f'grabyt_stage_{field}{{stage="{name}"}} {snapshot[field]:g}'
+                          for name, snapshot in snapshots.items()]
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(registry, port, host='127.0.0.1'):
+    """Serve `registry` at http://host:port/metrics from a background thread"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
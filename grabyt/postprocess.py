@@ -0,0 +1,57 @@
+"""Post-processing stage: merges and transcodes on a bounded pool, apart from the network downloads"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from grabyt.progress import StageMeter
+
+# ffmpeg is multi-threaded itself, so a few transcodes already fill the CPU
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+
+def run_postprocessors(ydl, postprocessors, info):
+    """Run yt-dlp postprocessor specs like `{'key': 'FFmpegExtractAudio', ...}` on a downloaded file"""
+    from yt_dlp.postprocessor import get_postprocessor
+
+    for spec in postprocessors:
+        spec = dict(spec)
+        pp = get_postprocessor(spec.pop('key'))(ydl, **spec)
+        files_to_delete, info = pp.run(info)
+        if not ydl.params.get('keepvideo'):
+            for path in files_to_delete:
+                if os.path.exists(path) and path != info.get('filepath'):
+                    os.remove(path)
+    return info
+
+
+class PostProcessPool:
+    """Runs post-processing on at most `max_workers` threads, whatever the download concurrency
+
+    Jobs wait in the pool's queue while every worker is busy; `meter` reports
+    how many are running and waiting.
+    """
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self.meter = StageMeter(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='grabyt-pp')
+
+    def _run(self, fn, args):
+        self.meter.start(was_waiting=True)
+        try:
+            return fn(*args)
+        finally:
+            self.meter.stop()
+
+    def _on_done(self, future):
+        if future.cancelled():
+            # Dropped from the queue before it started
+            self.meter.add_waiting(-1)
+
+    def submit(self, fn, *args):
+        """Queue `fn(*args)` and return its Future; cancelling it before it starts drops it"""
+        self.meter.add_waiting()
+        future = self._executor.submit(self._run, fn, args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
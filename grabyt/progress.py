@@ -0,0 +1,166 @@
+"""Progress aggregation between yt-dlp hooks and a display polling at a fixed rate"""
+import threading
+import time
+
+# How often a display should poll `ProgressTracker.changed()`
+UPDATE_INTERVAL = 1 / 15
+# Speed samples closer together than this are folded into the next one
+MIN_SAMPLE_INTERVAL = 0.2
+# Weight of the newest speed sample in the moving average
+SPEED_SMOOTHING = 0.3
+
+
+def format_eta(seconds):
+    """Format a number of seconds as m:ss or h:mm:ss"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class JobProgress:
+    """Latest progress of one job, with its own speed estimate"""
+    __slots__ = ('status', 'downloaded_bytes', 'total_bytes', 'percent', 'speed', 'eta',
+                 'dirty', '_sample_bytes', '_sample_time')
+
+    def __init__(self):
+        self.status = None
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.percent = 0
+        self.speed = None
+        self.eta = None
+        self.dirty = False
+        self._sample_bytes = 0
+        self._sample_time = None
+
+    def snapshot(self):
+        return {
+            'status': self.status,
+            'downloaded_bytes': self.downloaded_bytes,
+            'total_bytes': self.total_bytes,
+            'percent': self.percent,
+            'speed': self.speed,
+            'eta': self.eta,
+        }
+
+
+class ProgressTracker:
+    """Collects progress written by download threads for one reader to poll
+
+    `update()` is called from yt-dlp progress hooks and only touches a small
+    record under a lock, so it costs next to nothing per chunk. The display
+    calls `changed()` on a timer and redraws only the jobs that moved since the
+    previous call, however many chunks arrived in between.
+    """
+    def __init__(self, smoothing=SPEED_SMOOTHING):
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def update(self, key, d):
+        """Record a progress dict from `grabyt.core.progress_from_hook`"""
+        now = time.monotonic()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = JobProgress()
+
+            downloaded = d['downloaded_bytes']
+            job.status = d['status']
+            job.total_bytes = d['total_bytes']
+
+            if job._sample_time is None or downloaded < job._sample_bytes:
+                # First sample, or yt-dlp moved on to the next stream (e.g. audio after video)
+                job._sample_bytes = downloaded
+                job._sample_time = now
+            elif now - job._sample_time >= MIN_SAMPLE_INTERVAL:
+                rate = (downloaded - job._sample_bytes) / (now - job._sample_time)
+                job.speed = rate if job.speed is None else (
+                    self.smoothing * rate + (1 - self.smoothing) * job.speed)
+                job._sample_bytes = downloaded
+                job._sample_time = now
+
+            job.downloaded_bytes = downloaded
+            if job.status == 'finished':
+                job.percent = 100
+                job.eta = None
+            elif job.total_bytes > 0:
+                job.percent = min(100, int(downloaded * 100 / job.total_bytes))
+                remaining = max(0, job.total_bytes - downloaded)
+                job.eta = remaining / job.speed if job.speed else None
+            job.dirty = True
+
+    def remove(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def changed(self):
+        """Return `{key: snapshot}` for jobs updated since the last call"""
+        with self._lock:
+            changed = {}
+            for key, job in self._jobs.items():
+                if job.dirty:
+                    job.dirty = False
+                    changed[key] = job.snapshot()
+            return changed
+
+
+class StageMeter:
+    """Busy and waiting counts of one pipeline stage, and how much of its capacity was used
+
+    Utilization is busy worker-seconds over capacity-seconds since the last
+    `reset()`, so a stage that kept every worker busy reports 1.0.
+    """
+    def __init__(self, capacity):
+        self._lock = threading.Lock()
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.busy = 0
+            self.waiting = 0
+            self._busy_seconds = 0.0
+            self._capacity_seconds = 0.0
+            self._last = time.monotonic()
+
+    def _advance(self):
+        now = time.monotonic()
+        self._busy_seconds += self.busy * (now - self._last)
+        self._capacity_seconds += self.capacity * (now - self._last)
+        self._last = now
+
+    def set_capacity(self, capacity):
+        with self._lock:
+            self._advance()
+            self.capacity = capacity
+
+    def add_waiting(self, count=1):
+        with self._lock:
+            self.waiting = max(0, self.waiting + count)
+
+    def start(self, was_waiting=False):
+        """Mark one worker busy, taking the job off the waiting count if it was queued here"""
+        with self._lock:
+            self._advance()
+            self.busy += 1
+            if was_waiting:
+                self.waiting = max(0, self.waiting - 1)
+
+    def stop(self):
+        with self._lock:
+            self._advance()
+            self.busy = max(0, self.busy - 1)
+
+    def snapshot(self):
+        with self._lock:
+            self._advance()
+            return {
+                'capacity': self.capacity,
+                'busy': self.busy,
+                'waiting': self.waiting,
+                'utilization': self._busy_seconds / self._capacity_seconds if self._capacity_seconds else 0.0,
+            }
@@ -0,0 +1,144 @@
+"""Network performance and watch mode settings, saved between sessions"""
+import json
+import os
+import tempfile
+
+from grabyt.paths import user_config_dir
+
+# Defaults, tuned with benchmarks/bench_throughput.py
+DEFAULT_CONCURRENT_FRAGMENTS = 4
+# Chunked range requests sidestep per-connection throttling on YouTube
+DEFAULT_HTTP_CHUNK_SIZE = 10 * 1024 ** 2
+# None keeps yt-dlp's self-resizing buffer
+DEFAULT_BUFFER_SIZE = None
+DEFAULT_CONNECTIONS = 8
+# Seconds without new URLs before watch mode queues what it collected
+DEFAULT_DEBOUNCE = 2.0
+
+# External downloaders that can be chosen instead of yt-dlp's own
+EXTERNAL_DOWNLOADERS = ('aria2c', 'axel', 'curl', 'wget', 'ffmpeg')
+
+
+class PerformanceSettings:
+    """Fragment concurrency, chunking, buffering, rate limits and downloader choice
+
+    `rate_limit` caps each download; `total_rate_limit`, `rate_schedule`
+    (strings like '09:00-18:00=2M') and `bandwidth_sharing` configure the
+    `grabyt.bandwidth.BandwidthScheduler` shared by all of them.
+    """
+    FIELDS = ('concurrent_fragments', 'http_chunk_size', 'buffer_size', 'rate_limit',
+              'external_downloader', 'connections', 'total_rate_limit', 'rate_schedule',
+              'bandwidth_sharing')
+
+    def __init__(self, concurrent_fragments=DEFAULT_CONCURRENT_FRAGMENTS,
+                 http_chunk_size=DEFAULT_HTTP_CHUNK_SIZE, buffer_size=DEFAULT_BUFFER_SIZE,
+                 rate_limit=None, external_downloader=None, connections=DEFAULT_CONNECTIONS,
+                 total_rate_limit=None, rate_schedule=(), bandwidth_sharing='fair'):
+        self.concurrent_fragments = concurrent_fragments
+        self.http_chunk_size = http_chunk_size
+        self.buffer_size = buffer_size
+        self.rate_limit = rate_limit
+        self.external_downloader = external_downloader
+        self.connections = connections
+        self.total_rate_limit = total_rate_limit
+        self.rate_schedule = list(rate_schedule)
+        self.bandwidth_sharing = bandwidth_sharing
+
+    def apply(self, download_options):
+        """Add the per-download settings to a yt-dlp options dict"""
+        download_options['concurrent_fragment_downloads'] = max(1, self.concurrent_fragments)
+        if self.http_chunk_size:
+            download_options['http_chunk_size'] = self.http_chunk_size
+        if self.buffer_size:
+            download_options['buffersize'] = self.buffer_size
+            download_options['noresizebuffer'] = True
+        if self.rate_limit:
+            download_options['ratelimit'] = self.rate_limit
+        if self.external_downloader:
+            download_options['external_downloader'] = {'default': self.external_downloader}
+            if self.external_downloader == 'aria2c':
+                # Split each file across several connections
+                connections = str(max(1, self.connections))
+                download_options['external_downloader_args'] = {
+                    'aria2c': ['-x', connections, '-s', connections, '-k', '1M'],
+                }
+        return download_options
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+    @staticmethod
+    def default_path():
+        return os.path.join(user_config_dir(), 'settings.json')
+
+    @classmethod
+    def load(cls, path=None):
+        """Load saved settings, falling back to the defaults"""
+        return cls.from_dict(load_section(path or cls.default_path(), 'performance'))
+
+    def save(self, path=None):
+        """Write the settings atomically, keeping other sections of the file"""
+        save_section(path or self.default_path(), 'performance', self.to_dict())
+
+
+class WatchSettings:
+    """Last drop folder, debounce and quality rules of watch mode (`grabyt.watch`)
+
+    `rules` are strings like 'music.youtube.com=audio:opus' or '*=1080@low',
+    see `grabyt.watch.QualityRule`; the first one matching a URL picks its
+    quality and priority.
+    """
+    FIELDS = ('folder', 'debounce', 'rules')
+
+    def __init__(self, folder=None, debounce=DEFAULT_DEBOUNCE, rules=()):
+        self.folder = folder
+        self.debounce = debounce
+        self.rules = list(rules)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+    @classmethod
+    def load(cls, path=None):
+        return cls.from_dict(load_section(path or PerformanceSettings.default_path(), 'watch'))
+
+    def save(self, path=None):
+        save_section(path or PerformanceSettings.default_path(), 'watch', self.to_dict())
+
+
+def load_section(path, section):
+    """Return one section of the settings file, or {} if it can't be read"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get(section, {})
+
+
+def save_section(path, section, values):
+    """Replace one section of the settings file atomically, keeping the others"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data[section] = values
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
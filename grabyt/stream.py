@@ -0,0 +1,213 @@
+"""Streaming output: send downloads to stdout, a named pipe or a TCP socket while they download
+
+yt-dlp already writes a download to stdout when the output template is
+'-': single formats pass through as they arrive (HLS as MPEG-TS, DASH as
+fragmented MP4) and merged formats are muxed by ffmpeg on the fly. To send
+that anywhere else, `StdoutRedirect` points file descriptor 1 at a pipe for
+the length of one download and a pump thread copies what comes out of it
+to the target, and to a file on disk if a copy is kept.
+"""
+import io
+import os
+import socket
+import stat
+import sys
+import threading
+from urllib.parse import urlparse
+
+STDOUT = '-'
+# 'auto' passes single formats through untouched and lets ffmpeg mux merged ones as MPEG-TS
+STREAM_CONTAINERS = ('auto', 'mpegts', 'fmp4')
+# Fragmented MP4 that a reader can play without seeking back to the start
+FMP4_FLAGS = 'frag_keyframe+empty_moov+default_base_moof'
+PIPE_BLOCK_SIZE = 64 * 1024
+
+# Only one download at a time can own file descriptor 1
+_redirect_lock = threading.Lock()
+
+
+class StreamTarget:
+    """Where streamed downloads go: '-' for stdout, the path of a named pipe, or 'tcp://HOST:PORT'
+
+    A TCP target connects to a listening reader; 'tcp://HOST:PORT?listen'
+    waits for the reader to connect instead. Every video opens the target
+    anew, so a named pipe's reader sees end of file after each one and a
+    listening target accepts one connection per video. `container` is one
+    of `STREAM_CONTAINERS`.
+    """
+    def __init__(self, kind, address, container='auto'):
+        self.kind = kind
+        self.address = address
+        self.container = container
+        self._server = None
+        self._server_lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec, container='auto'):
+        if container not in STREAM_CONTAINERS:
+            raise ValueError(f"invalid stream container {container!r}")
+        if spec == STDOUT:
+            return cls('stdout', None, container)
+        if spec.startswith('tcp://'):
+            url = urlparse(spec)
+            if not url.hostname or not url.port:
+                raise ValueError(f"invalid stream address {spec!r}, expected e.g. tcp://127.0.0.1:9000")
+            return cls('listen' if url.query == 'listen' else 'tcp', (url.hostname, url.port), container)
+        if os.path.exists(spec) and not stat.S_ISFIFO(os.stat(spec).st_mode):
+            raise ValueError(f"{spec} exists and is not a named pipe")
+        return cls('fifo', os.path.abspath(spec), container)
+
+    def apply(self, download_options):
+        """Make yt-dlp options write to stdout, remuxing into the chosen container"""
+        download_options['outtmpl'] = STDOUT
+        # Keep yt-dlp's own messages out of the stream
+        download_options['logtostderr'] = True
+        # aria2c and the other external downloaders can't write to stdout
+        download_options.pop('external_downloader', None)
+        download_options.pop('external_downloader_args', None)
+        if self.container != 'auto':
+            output_args = ['-f', 'mpegts'] if self.container == 'mpegts' else ['-f', 'mp4', '-movflags', FMP4_FLAGS]
+            download_options['external_downloader'] = {'default': 'ffmpeg'}
+            download_options['external_downloader_args'] = {'ffmpeg_o': output_args}
+        return download_options
+
+    def extension(self, info_dict):
+        """File extension of what was streamed for `info_dict`, for a kept copy"""
+        if self.container == 'fmp4':
+            return 'mp4'
+        if self.container == 'mpegts' or info_dict.get('requested_formats'):
+            return 'ts'
+        if (info_dict.get('protocol') or '').startswith('m3u8'):
+            return 'ts'
+        return info_dict.get('ext') or 'bin'
+
+    def describe(self):
+        if self.kind == 'stdout':
+            return "stdout"
+        if self.kind == 'fifo':
+            return self.address
+        return f"tcp://{self.address[0]}:{self.address[1]}"
+
+    def open(self):
+        """Return a binary file for one video; blocks until a named pipe or socket reader is there"""
+        if self.kind == 'stdout':
+            return os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+        if self.kind == 'fifo':
+            if not os.path.exists(self.address):
+                os.mkfifo(self.address)
+            return open(self.address, 'wb')
+        if self.kind == 'tcp':
+            # The file keeps the connection open until it is closed
+            with socket.create_connection(self.address) as connection:
+                return connection.makefile('wb')
+
+        with self._server_lock:
+            if self._server is None:
+                self._server = socket.create_server(self.address)
+        print(f"grabyt: waiting for a reader on {self.describe()}", file=sys.stderr, flush=True)
+        connection, _ = self._server.accept()
+        with connection:
+            return connection.makefile('wb')
+
+    def redirect(self, copy_path=None, on_error=None):
+        """Context manager sending the stdout output of one download here, and to `copy_path` if given"""
+        return StdoutRedirect(self, copy_path, on_error)
+
+    def close(self):
+        with self._server_lock:
+            if self._server:
+                self._server.close()
+                self._server = None
+
+
+class _KeepOpenWriter(io.BufferedWriter):
+    """Binary stdout while streaming; yt-dlp closes it after every fragmented download"""
+    def close(self):
+        self.flush()
+
+
+class StdoutRedirect:
+    """Points file descriptor 1 at a pipe, copying what arrives to a `StreamTarget` and an optional file
+
+    The target is opened when the first bytes arrive, so a playlist that
+    only lists its videos never opens it. If the reader goes away, `error`
+    is set and `on_error()` is called; the pipe keeps being drained so the
+    download can't block on it.
+    """
+    def __init__(self, target, copy_path=None, on_error=None):
+        self.target = target
+        self.copy_path = copy_path
+        self.on_error = on_error
+        self.error = None
+        self.streamed_bytes = 0
+        self._saved_stdout = None
+        self._saved_sys_stdout = None
+        self._thread = None
+
+    def __enter__(self):
+        _redirect_lock.acquire()
+        try:
+            sys.stdout.flush()
+            read_fd, write_fd = os.pipe()
+            self._saved_stdout = os.dup(1)
+            os.dup2(write_fd, 1)
+            os.close(write_fd)
+            # yt-dlp writes to sys.stdout.buffer, ffmpeg to the inherited fd 1
+            self._saved_sys_stdout = sys.stdout
+            sys.stdout = io.TextIOWrapper(_KeepOpenWriter(io.FileIO(1, 'wb', closefd=False)), write_through=True)
+            self._thread = threading.Thread(target=self._pump, args=(read_fd,), name='grabyt-stream', daemon=True)
+            self._thread.start()
+        except BaseException:
+            _redirect_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            sys.stdout.flush()
+            sys.stdout = self._saved_sys_stdout
+            # Closing the last write end lets the pump see end of file
+            os.dup2(self._saved_stdout, 1)
+            self._thread.join()
+            os.close(self._saved_stdout)
+        finally:
+            _redirect_lock.release()
+        return False
+
+    def _open_sink(self):
+        if self.target.kind == 'stdout':
+            # The real stdout, now that fd 1 is the pipe
+            return os.fdopen(os.dup(self._saved_stdout), 'wb')
+        return self.target.open()
+
+    def _pump(self, read_fd):
+        sink = copy = None
+        try:
+            while True:
+                data = os.read(read_fd, PIPE_BLOCK_SIZE)
+                if not data:
+                    break
+                if self.error:
+                    continue
+                try:
+                    if sink is None:
+                        sink = self._open_sink()
+                        copy = open(self.copy_path, 'wb') if self.copy_path else None
+                    sink.write(data)
+                    if copy:
+                        copy.write(data)
+                    self.streamed_bytes += len(data)
+                except OSError as e:
+                    self.error = e
+                    if self.on_error:
+                        self.on_error()
+        finally:
+            os.close(read_fd)
+            for f in (sink, copy):
+                if f is None:
+                    continue
+                try:
+                    f.close()
+                except OSError as e:
+                    self.error = self.error or e
+
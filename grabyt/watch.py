@@ -0,0 +1,430 @@
+"""Watch mode: pick up video URLs from the clipboard or a drop folder and queue them unattended
+
+Text from any source goes through a `WatchSession`, which drops URLs it has
+already seen, waits until no new ones arrived for the debounce window, then
+fetches each batch's metadata on a few background threads (into the
+metadata cache, so the downloads skip extraction) and hands every new video
+to its owner with the `QualityRule` that matches it.
+"""
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from grabyt.bandwidth import PRIORITIES, PRIORITY_NAMES, PRIORITY_NORMAL
+from grabyt.cache import canonical_key
+from grabyt.core import build_download_options, fetch_metadata
+from grabyt.formats import AUDIO_FORMATS
+from grabyt.settings import DEFAULT_DEBOUNCE
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"\'`]+')
+# Punctuation that ends a sentence rather than the URL
+URL_TRAILING = '.,;:!?)]}'
+# Queue a batch after this long even if URLs keep arriving
+MAX_BATCH_DELAY = 10.0
+PREFETCH_WORKERS = 4
+
+# Drop files are text files with URLs; handled ones are moved into PROCESSED_DIR
+DROP_SUFFIXES = ('.txt', '.url')
+PROCESSED_DIR = 'processed'
+# How often the polling fallback scans the folder, and the inotify loop checks for stop()
+FOLDER_POLL_INTERVAL = 1.0
+
+# inotify(7) events for a file finished writing or moved into the folder
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def extract_urls(text):
+    """Return the http(s) URLs in a piece of text, in order and without repeats"""
+    urls = []
+    for match in URL_PATTERN.finditer(text or ''):
+        url = match.group().rstrip(URL_TRAILING)
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def supported_url(url):
+    """Whether a site-specific extractor handles the URL, so random links aren't fetched"""
+    from yt_dlp.extractor import gen_extractor_classes
+
+    return any(ie.ie_key() != 'Generic' and ie.suitable(url) for ie in gen_extractor_classes())
+
+
+class QualityRule:
+    """Quality and priority for URLs matching a pattern, written as 'PATTERN=QUALITY[@PRIORITY]'
+
+    PATTERN is a glob on the host ('music.youtube.com', '*.twitch.tv', '*'),
+    or on the URL without its scheme if it contains a '/'
+    ('*youtube.com/shorts/*'). QUALITY is 'best', a height like '1080',
+    'audio' or 'audio:FORMAT'. PRIORITY is low, normal or high.
+    """
+    def __init__(self, pattern='*', audio_only=False, max_height=None, audio_format='best',
+                 priority=PRIORITY_NORMAL):
+        self.pattern = pattern
+        self.audio_only = audio_only
+        self.max_height = max_height
+        self.audio_format = audio_format
+        self.priority = priority
+
+    @classmethod
+    def parse(cls, text):
+        match = re.fullmatch(r'\s*([^=\s]+)\s*=\s*([\w:]+)\s*(?:@\s*(\w+))?\s*', text)
+        if not match:
+            raise ValueError(f"invalid rule {text!r}, expected e.g. music.youtube.com=audio:opus@high")
+        pattern, quality, priority = match.groups()
+        rule = cls(pattern.lower())
+        if priority:
+            if priority.lower() not in PRIORITIES:
+                raise ValueError(f"invalid priority {priority!r} in {text!r}, expected low, normal or high")
+            rule.priority = PRIORITIES[priority.lower()]
+
+        quality = quality.lower()
+        if quality == 'audio' or quality.startswith('audio:'):
+            rule.audio_only = True
+            rule.audio_format = quality.partition(':')[2] or 'best'
+            if rule.audio_format not in AUDIO_FORMATS:
+                raise ValueError(f"invalid audio format {rule.audio_format!r} in {text!r}")
+        elif quality.rstrip('p').isdigit():
+            rule.max_height = int(quality.rstrip('p'))
+        elif quality != 'best':
+            raise ValueError(f"invalid quality {quality!r} in {text!r}, expected best, a height or audio")
+        return rule
+
+    def matches(self, url):
+        if '/' in self.pattern:
+            return fnmatch.fnmatch(url.lower().partition('://')[2], self.pattern)
+        return fnmatch.fnmatch((urlparse(url).hostname or '').lower(), self.pattern)
+
+    def download_options(self, output_folder, performance=None, quiet=True, stream=None, keep_streamed=False):
+        """Build the yt-dlp options for a download this rule applies to"""
+        return build_download_options(output_folder, self.audio_only, self.max_height, quiet=quiet,
+                                      performance=performance, audio_format=self.audio_format,
+                                      stream=stream, keep_streamed=keep_streamed)
+
+    def describe(self):
+        if self.audio_only:
+            return "audio" if self.audio_format == 'best' else f"audio ({self.audio_format})"
+        return f"≤{self.max_height}p" if self.max_height else "best"
+
+    def __str__(self):
+        if self.audio_only:
+            quality = 'audio' if self.audio_format == 'best' else f"audio:{self.audio_format}"
+        else:
+            quality = str(self.max_height) if self.max_height else 'best'
+        priority = f"@{PRIORITY_NAMES[self.priority]}" if self.priority != PRIORITY_NORMAL else ''
+        return f"{self.pattern}={quality}{priority}"
+
+
+def parse_rules(rules):
+    """Parse a list of 'PATTERN=QUALITY[@PRIORITY]' strings into `QualityRule`s"""
+    return [QualityRule.parse(rule) for rule in rules if rule.strip()]
+
+
+def match_rule(rules, url):
+    """Return the first rule matching the URL, or None"""
+    return next((rule for rule in rules if rule.matches(url)), None)
+
+
+class UrlBatcher:
+    """Collects URLs, dropping ones seen before, and releases them once they stop arriving
+
+    A batch is due `debounce` seconds after the last new URL, or at most
+    `max_delay` seconds after its first, so a steady trickle still moves.
+    """
+    def __init__(self, debounce=DEFAULT_DEBOUNCE, max_delay=MAX_BATCH_DELAY):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._seen = set()
+        self._pending = []
+        self._first_at = None
+        self._last_at = None
+        self._lock = threading.Lock()
+
+    def add(self, urls, now=None):
+        """Collect the URLs not seen before and return how many there were"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            new = [url for url in dict.fromkeys(urls) if url not in self._seen]
+            if new:
+                self._seen.update(new)
+                self._pending.extend(new)
+                if self._first_at is None:
+                    self._first_at = now
+                self._last_at = now
+            return len(new)
+
+    def claim(self, url):
+        """Mark a URL as seen without batching it; False if it was seen already"""
+        with self._lock:
+            if url in self._seen:
+                return False
+            self._seen.add(url)
+            return True
+
+    def next_delay(self, now=None):
+        """Seconds until the pending batch is due, or None if nothing is pending"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._pending:
+                return None
+            due = min(self._last_at + self.debounce, self._first_at + self.max_delay)
+            return max(0.0, due - now)
+
+    def take(self, now=None):
+        """Return the pending batch if it is due, else []"""
+        delay = self.next_delay(now)
+        if delay is None or delay > 0:
+            return []
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._first_at = self._last_at = None
+            return batch
+
+
+def _load_inotify():
+    """Return libc with inotify, or None where it isn't available"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FolderWatcher:
+    """Reads URLs from text files dropped into a folder and moves them to its `processed` subfolder
+
+    Uses inotify on Linux, so a file is read as soon as its writer closes
+    it; elsewhere the folder is scanned every `interval` seconds and a file
+    is read once its size and modification time stopped changing. Files
+    already there when watching starts are read too. `on_urls(urls, path)`
+    is called on the watcher's thread.
+    """
+    def __init__(self, folder, on_urls, interval=FOLDER_POLL_INTERVAL):
+        self.folder = os.path.abspath(folder)
+        self.on_urls = on_urls
+        self.interval = interval
+        self.uses_inotify = False
+        # Files that couldn't be moved away, so they aren't read again
+        self._handled = set()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.folder, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='grabyt-watch-folder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        libc = _load_inotify()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC) if libc else -1
+        if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(self.folder), IN_CLOSE_WRITE | IN_MOVED_TO) >= 0:
+            self.uses_inotify = True
+            try:
+                self._watch_inotify(fd)
+            finally:
+                os.close(fd)
+        else:
+            if fd >= 0:
+                os.close(fd)
+            self._watch_polling()
+
+    def _watch_inotify(self, fd):
+        for name in sorted(os.listdir(self.folder)):
+            self._handle(name)
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([fd], [], [], self.interval)
+            if not readable:
+                continue
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if name:
+                    self._handle(os.fsdecode(name))
+
+    def _watch_polling(self):
+        # name -> (size, mtime) at the previous scan; a file is read once it is unchanged
+        previous = {}
+        while True:
+            current = {}
+            for entry in os.scandir(self.folder):
+                if self._is_drop_file(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    current[entry.name] = (stat.st_size, stat.st_mtime)
+            for name, signature in current.items():
+                if previous.get(name) == signature:
+                    self._handle(name)
+            previous = current
+            if self._stop_event.wait(self.interval):
+                return
+
+    def _is_drop_file(self, name):
+        return name.lower().endswith(DROP_SUFFIXES) and not name.startswith('.') and name not in self._handled
+
+    def _handle(self, name):
+        path = os.path.join(self.folder, name)
+        if not self._is_drop_file(name) or not os.path.isfile(path):
+            return
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                urls = extract_urls(f.read())
+        except OSError:
+            return
+
+        processed = os.path.join(self.folder, PROCESSED_DIR)
+        try:
+            os.makedirs(processed, exist_ok=True)
+            target = os.path.join(processed, name)
+            if os.path.exists(target):
+                stem, ext = os.path.splitext(name)
+                target = os.path.join(processed, f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}{ext}")
+            os.replace(path, target)
+        except OSError:
+            self._handled.add(name)
+        if urls:
+            self.on_urls(urls, path)
+
+
+class WatchSession:
+    """Dedupes, batches and prefetches watched URLs, then hands each new video to `on_ready`
+
+    Feed it with `add_text()` from any thread, or let it watch a folder with
+    `watch_folder()`. Callbacks run on the session's own threads:
+    `on_batch(urls)` when a batch is released, `on_ready(url, rule, title)`
+    for every video to queue (each entry of a playlist separately) with the
+    first of `rules` matching the watched URL, or None, and
+    `on_ignored(url, reason)` for unsupported links, failed fetches and
+    videos already queued under another URL.
+    """
+    def __init__(self, on_ready, on_ignored=None, on_batch=None, rules=(), metadata_cache=None,
+                 debounce=DEFAULT_DEBOUNCE, workers=PREFETCH_WORKERS):
+        self.on_ready = on_ready
+        self.on_ignored = on_ignored
+        self.on_batch = on_batch
+        self.rules = list(rules)
+        self.metadata_cache = metadata_cache
+        self.batcher = UrlBatcher(debounce)
+        self.folder_watcher = None
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='grabyt-prefetch')
+        # Canonical keys of the videos handed out, e.g. a youtu.be link of one already queued
+        self._keys = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='grabyt-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching; URLs not yet released are dropped, and prefetches still running hand nothing out"""
+        with self._lock:
+            self._stopped.set()
+        self._wake.set()
+        self.watch_folder(None)
+        if self._thread:
+            self._thread.join()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def watch_folder(self, folder):
+        """Start watching `folder` for drop files instead of the current one; None stops"""
+        if self.folder_watcher:
+            self.folder_watcher.stop()
+            self.folder_watcher = None
+        if folder:
+            self.folder_watcher = FolderWatcher(folder, lambda urls, path: self.add_urls(urls))
+            self.folder_watcher.start()
+
+    def add_text(self, text):
+        """Collect the URLs in a piece of text, e.g. the clipboard; returns how many were new"""
+        return self.add_urls(extract_urls(text))
+
+    def add_urls(self, urls):
+        added = self.batcher.add(urls)
+        if added:
+            self._wake.set()
+        return added
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.batcher.next_delay())
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            batch = self.batcher.take()
+            if not batch:
+                continue
+            if self.on_batch:
+                self.on_batch(batch)
+            for url in batch:
+                if not supported_url(url):
+                    self._ignore(url, "no extractor for this site")
+                    continue
+                future = self.executor.submit(fetch_metadata, url, self.metadata_cache,
+                                              on_entries=lambda entries, url=url: self._on_entries(url, entries))
+                future.add_done_callback(lambda future, url=url: self._on_prefetched(url, future))
+
+    def _ignore(self, url, reason):
+        if self.on_ignored:
+            self.on_ignored(url, reason)
+
+    def _on_entries(self, url, entries):
+        """Hand out the videos of a playlist as they are listed, with the playlist's rule"""
+        rule = match_rule(self.rules, url)
+        for entry in entries:
+            if self.batcher.claim(entry['url']):
+                self._hand_out(entry['url'], rule, entry['title'])
+
+    def _hand_out(self, url, rule, title):
+        # Under the lock, so nothing reaches `on_ready` once stop() has returned
+        with self._lock:
+            if not self._stopped.is_set():
+                self.on_ready(url, rule, title)
+
+    def _on_prefetched(self, url, future):
+        if future.cancelled():
+            return
+        if future.exception():
+            self._ignore(url, str(future.exception()))
+            return
+        _, info_dict = future.result()
+        if info_dict.get('_type') == 'playlist':
+            return
+
+        key = canonical_key(info_dict)
+        with self._lock:
+            duplicate = key in self._keys
+            self._keys.add(key)
+        if key and duplicate:
+            self._ignore(url, "already queued")
+            return
+        self._hand_out(url, match_rule(self.rules, url), info_dict.get('title') or url)
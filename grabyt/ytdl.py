@@ -0,0 +1,83 @@
+"""Lazy yt-dlp loading and cheap YoutubeDL instances
+
+Importing yt_dlp and resolving its ~1800 extractors takes a good part of a
+second, so no grabyt module imports it at load time. `warm_up()` does both
+ahead of time, e.g. on a background thread once the window is up; after that
+`create_youtube_dl()` copies the resolved extractor table instead of
+rebuilding it for every download.
+"""
+import threading
+from contextlib import contextmanager
+
+METADATA_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    # Playlists are only listed; their videos are resolved when downloaded
+    'extract_flat': 'in_playlist',
+}
+
+_extractors_lock = threading.Lock()
+_extractors = None
+# Long-lived instance for metadata fetches, reusing its extractors and HTTP connections
+_metadata_lock = threading.Lock()
+_metadata_ydl = None
+
+
+def load_yt_dlp():
+    """Return the yt_dlp module, importing it on first use"""
+    import yt_dlp
+
+    return yt_dlp
+
+
+def _extractor_table():
+    global _extractors
+    with _extractors_lock:
+        if _extractors is None:
+            template = load_yt_dlp().YoutubeDL({'quiet': True, 'no_warnings': True})
+            _extractors = dict(template._ies)
+            template.close()
+        return _extractors
+
+
+def create_youtube_dl(params):
+    """Return `YoutubeDL(params)` without resolving the default extractors again"""
+    yt_dlp = load_yt_dlp()
+    if params.get('verbose') or params.get('allowed_extractors'):
+        # The debug header and extractor filtering need the normal setup
+        return yt_dlp.YoutubeDL(params)
+    extractors = _extractor_table()
+    ydl = yt_dlp.YoutubeDL(params, auto_init=False)
+    for ie in extractors.values():
+        if isinstance(ie, type):
+            # YoutubeDL keeps classes here and instantiates them per instance on first use
+            ydl._ies[ie.ie_key()] = ie
+        else:
+            ydl.add_info_extractor(type(ie)())
+    return ydl
+
+
+@contextmanager
+def metadata_youtube_dl():
+    """Yield the shared metadata YoutubeDL, or a new one while another fetch is using it"""
+    global _metadata_ydl
+    if not _metadata_lock.acquire(blocking=False):
+        ydl = create_youtube_dl(dict(METADATA_OPTIONS))
+        try:
+            yield ydl
+        finally:
+            ydl.close()
+        return
+
+    try:
+        if _metadata_ydl is None:
+            _metadata_ydl = create_youtube_dl(dict(METADATA_OPTIONS))
+        yield _metadata_ydl
+    finally:
+        _metadata_lock.release()
+
+
+def warm_up():
+    """Import yt_dlp and prepare the extractor table and metadata instance"""
+    with metadata_youtube_dl():
+        pass
@@ -0,0 +1,71 @@
+"""Download archive: key and alias lookups, persistence and folder reconciliation"""
+from grabyt.archive import DownloadArchive
+
+
+def finished(video_id, filepath=None, **extra):
+    return dict({'id': video_id, 'extractor_key': 'Youtube', 'title': f'Video {video_id}',
+                 'webpage_url': f'https://www.youtube.com/watch?v={video_id}', 'filepath': filepath}, **extra)
+
+
+def test_lookup_by_alias_and_key():
+    archive = DownloadArchive(':memory:')
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ') is None
+    archive.add(finished('dQw4w9WgXcQ', '/videos/a.mp4'), url='https://example.com/share/abc')
+
+    hit = archive.lookup('https://example.com/share/abc')
+    assert hit == {'key': 'Youtube:dQw4w9WgXcQ', 'title': 'Video dQw4w9WgXcQ', 'filepath': '/videos/a.mp4'}
+    assert archive.lookup('https://www.youtube.com/watch?v=dQw4w9WgXcQ')['key'] == 'Youtube:dQw4w9WgXcQ'
+    # A URL never seen resolves to the same key through the extractor alone
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ')['key'] == 'Youtube:dQw4w9WgXcQ'
+    # An info dict's own key wins over the URL
+    assert archive.lookup('https://example.com/other', finished('dQw4w9WgXcQ')) is not None
+    assert archive.lookup('https://example.com/other', finished('zzzzzzzzzzz')) is None
+
+
+def test_info_without_key_is_not_archived():
+    archive = DownloadArchive(':memory:')
+    archive.add({'title': 'No ID'}, url='https://example.com/x')
+    assert archive.lookup('https://example.com/x') is None
+
+
+def test_remove_and_clear():
+    archive = DownloadArchive(':memory:')
+    archive.add(finished('aaaaaaaaaaa'))
+    archive.add(finished('bbbbbbbbbbb'))
+    archive.remove('Youtube:aaaaaaaaaaa')
+    assert archive.lookup('https://www.youtube.com/watch?v=aaaaaaaaaaa') is None
+    assert archive.lookup('https://www.youtube.com/watch?v=bbbbbbbbbbb') is not None
+    archive.clear()
+    assert archive.lookup('https://www.youtube.com/watch?v=bbbbbbbbbbb') is None
+
+
+def test_survives_reopening(tmp_path):
+    path = str(tmp_path / 'archive.sqlite3')
+    archive = DownloadArchive(path)
+    archive.add(finished('aaaaaaaaaaa'), url='https://example.com/share/a')
+    archive.close()
+
+    reopened = DownloadArchive(path)
+    assert reopened.lookup('https://example.com/share/a')['key'] == 'Youtube:aaaaaaaaaaa'
+
+
+def test_reconcile_forgets_missing_files_in_folder(tmp_path):
+    folder, elsewhere = tmp_path / 'videos', tmp_path / 'other'
+    folder.mkdir()
+    elsewhere.mkdir()
+    kept = folder / 'kept.mp4'
+    kept.write_bytes(b'x')
+
+    archive = DownloadArchive(':memory:')
+    archive.add(finished('aaaaaaaaaaa', str(kept)))
+    archive.add(finished('bbbbbbbbbbb', str(folder / 'deleted.mp4')))
+    # Missing too, but not in the folder being reconciled
+    archive.add(finished('ccccccccccc', str(elsewhere / 'moved.mp4')))
+    archive.add(finished('ddddddddddd'))
+
+    assert archive.reconcile(str(folder)) == 1
+    assert archive.lookup('https://www.youtube.com/watch?v=aaaaaaaaaaa') is not None
+    assert archive.lookup('https://www.youtube.com/watch?v=bbbbbbbbbbb') is None
+    assert archive.lookup('https://www.youtube.com/watch?v=ccccccccccc') is not None
+    assert archive.lookup('https://www.youtube.com/watch?v=ddddddddddd') is not None
+    assert archive.reconcile(str(folder)) == 0
@@ -0,0 +1,122 @@
+"""Bandwidth sharing between jobs: shares, weights, strict ranking and time windows"""
+import time
+
+import pytest
+
+from grabyt.bandwidth import (ACTIVE_WINDOW, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, SHARING_STRICT,
+                              BandwidthScheduler, RateWindow, parse_schedule)
+from grabyt.core import DownloadTask
+
+
+class ArchiveHit:
+    """Stands in for `grabyt.archive.DownloadArchive` with every URL already downloaded"""
+    def lookup(self, url, info_dict=None):
+        return {'title': 'Archived'}
+
+
+def test_archived_skip_releases_share():
+    scheduler = BandwidthScheduler(sharing=SHARING_STRICT)
+    for n in range(3):
+        task = DownloadTask(f'https://example.com/{n}', {}, archive=ArchiveHit(),
+                            bandwidth=scheduler.register())
+        assert task.run() == 'Archived'
+    assert scheduler.snapshot()['jobs'] == 0
+    # A lone job has nothing to be ranked against, so it keeps yt-dlp's resizing buffer
+    assert not scheduler.register().throttled()
+
+
+def active_shares(scheduler, *priorities):
+    """Register shares that have just transferred, so they count towards the split"""
+    shares = [scheduler.register(priority) for priority in priorities]
+    for share in shares:
+        share.last_active = time.monotonic()
+    return shares
+
+
+def test_fair_sharing_splits_limit_by_priority():
+    scheduler = BandwidthScheduler(rate_limit=6000)
+    low, normal, high = active_shares(scheduler, PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH)
+    now = time.monotonic()
+    assert scheduler._share_rate(low, now) == 6000 * 1 / 7
+    assert scheduler._share_rate(normal, now) == 6000 * 2 / 7
+    assert scheduler._share_rate(high, now) == 6000 * 4 / 7
+
+
+def test_idle_jobs_get_no_share():
+    scheduler = BandwidthScheduler(rate_limit=6000)
+    busy, = active_shares(scheduler, PRIORITY_NORMAL)
+    scheduler.register(PRIORITY_HIGH).last_active = time.monotonic() - ACTIVE_WINDOW - 1
+    assert scheduler._share_rate(busy, time.monotonic()) == 6000
+
+
+def test_strict_sharing_ranks_by_priority():
+    scheduler = BandwidthScheduler(rate_limit=6000, sharing=SHARING_STRICT)
+    low, high, other_high = active_shares(scheduler, PRIORITY_LOW, PRIORITY_HIGH, PRIORITY_HIGH)
+    now = time.monotonic()
+    assert scheduler._share_rate(low, now) == 0
+    assert scheduler._share_rate(high, now) == 3000
+    assert scheduler._share_rate(other_high, now) == 3000
+
+    # Without a limit the top jobs are unlimited, the others still wait
+    scheduler.configure(sharing=SHARING_STRICT)
+    assert scheduler._share_rate(high, now) is None
+    assert scheduler._share_rate(low, now) == 0
+
+
+def test_released_share_stops_counting():
+    scheduler = BandwidthScheduler(rate_limit=6000)
+    first, second = active_shares(scheduler, PRIORITY_NORMAL, PRIORITY_NORMAL)
+    second.release()
+    assert scheduler._share_rate(first, time.monotonic()) == 6000
+
+
+def test_rate_window_wraps_around_midnight():
+    window = RateWindow.parse('22:00-06:00=10M')
+    assert window.rate == 10 * 1024 ** 2
+    assert window.contains(23 * 60)
+    assert window.contains(0)
+    assert window.contains(5 * 60 + 59)
+    assert not window.contains(6 * 60)
+    assert not window.contains(12 * 60)
+
+    daytime = RateWindow.parse('09:00-18:00=2M')
+    assert daytime.contains(9 * 60)
+    assert not daytime.contains(18 * 60)
+    assert not daytime.contains(23 * 60)
+
+
+@pytest.mark.parametrize('text', ['24:30-06:00=1M', '09:60-10:00=1M', '25:00-01:00=1M', '9-18=1M'])
+def test_rate_window_rejects_invalid_times(text):
+    with pytest.raises(ValueError):
+        RateWindow.parse(text)
+
+
+def test_rate_window_accepts_end_of_day():
+    assert RateWindow.parse('18:00-24:00=1M').end == 24 * 60
+
+
+def test_current_limit_takes_lowest_of_limit_and_windows():
+    noon = time.mktime(time.strptime('2024-01-01 12:00', '%Y-%m-%d %H:%M'))
+    scheduler = BandwidthScheduler(rate_limit=8000, schedule=parse_schedule(['09:00-18:00=2000', '22:00-06:00=500']))
+    assert scheduler.current_limit(noon) == 2000
+    assert scheduler.current_limit(noon + 8 * 3600) == 8000
+    assert scheduler.current_limit(noon + 12 * 3600) == 500
+    assert BandwidthScheduler().current_limit(noon) is None
+
+
+def test_throttles_lone_and_competing_shares():
+    fair = BandwidthScheduler()
+    share = fair.register()
+    fair.register()
+    assert not share.throttled()
+
+    strict = BandwidthScheduler(sharing=SHARING_STRICT)
+    lone = strict.register()
+    assert not lone.throttled()
+    strict.register(PRIORITY_LOW)
+    assert lone.throttled()
+
+    limited = BandwidthScheduler(rate_limit=1000)
+    assert limited.register().throttled()
+    windowed = BandwidthScheduler(schedule=parse_schedule(['01:00-02:00=1M']))
+    assert windowed.register().throttled()
@@ -0,0 +1,117 @@
+"""Metadata cache: aliases, TTL, LRU eviction and format URL expiry"""
+import types
+
+import pytest
+
+from grabyt import cache
+from grabyt.cache import (DEFAULT_URL_LIFETIME, URL_EXPIRY_MARGIN, MetadataCache, canonical_key,
+                          formats_expire_at)
+
+START = 1_700_000_000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's clock with one the test moves by hand"""
+    clock = types.SimpleNamespace(now=START)
+    monkeypatch.setattr(cache, 'time', types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def video(video_id, expire=None, **extra):
+    url = f'https://cdn.example.com/{video_id}.mp4'
+    if expire is not None:
+        url += f'?expire={expire}'
+    return dict({'id': video_id, 'extractor_key': 'Youtube', 'title': f'Video {video_id}',
+                 'webpage_url': f'https://www.youtube.com/watch?v={video_id}',
+                 'formats': [{'format_id': '18', 'url': url, 'ext': 'mp4'}]}, **extra)
+
+
+def watch_url(video_id):
+    return f'https://www.youtube.com/watch?v={video_id}'
+
+
+def test_canonical_key():
+    assert canonical_key(video('abc')) == 'Youtube:abc'
+    assert canonical_key({'id': 'abc', 'ie_key': 'Vimeo'}) == 'Vimeo:abc'
+    assert canonical_key({'id': 'abc'}) is None
+
+
+def test_formats_expire_at():
+    assert formats_expire_at(video('a', expire=START + 100), START) == START + 100
+    assert formats_expire_at(video('a'), START) == START + DEFAULT_URL_LIFETIME
+    info = video('a', expire=START + 500)
+    info['formats'].append({'url': f'https://cdn.example.com/b.mp4?expire={START + 200}'})
+    assert formats_expire_at(info, START) == START + 200
+
+
+def test_put_and_get_by_alias(clock):
+    metadata_cache = MetadataCache(':memory:')
+    metadata_cache.put('https://youtu.be/abc', video('abc'))
+    assert metadata_cache.get('https://youtu.be/abc')['title'] == 'Video abc'
+    # The webpage URL is an alias too
+    assert metadata_cache.get(watch_url('abc'))['id'] == 'abc'
+
+
+def test_info_without_key_is_not_stored(clock):
+    metadata_cache = MetadataCache(':memory:')
+    metadata_cache.put('https://example.com/x', {'title': 'No ID'})
+    assert metadata_cache._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0
+
+
+def test_entries_expire_after_ttl(clock):
+    metadata_cache = MetadataCache(':memory:', ttl=3600)
+    metadata_cache.put(watch_url('abc'), video('abc'))
+    clock.now += 3599
+    assert metadata_cache.get(watch_url('abc')) is not None
+    clock.now += 2
+    assert metadata_cache.get(watch_url('abc')) is None
+    # Dropped, not just hidden
+    assert metadata_cache._conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0] == 0
+
+
+def test_require_fresh_urls(clock):
+    metadata_cache = MetadataCache(':memory:')
+    metadata_cache.put(watch_url('abc'), video('abc', expire=START + 3600))
+    assert metadata_cache.get(watch_url('abc'), require_fresh_urls=True) is not None
+    # Within the safety margin of the expiry counts as expired
+    clock.now = START + 3600 - URL_EXPIRY_MARGIN
+    assert metadata_cache.get(watch_url('abc'), require_fresh_urls=True) is None
+    # The metadata itself is still good
+    assert metadata_cache.get(watch_url('abc'))['title'] == 'Video abc'
+
+
+def test_urls_without_expiry_use_default_lifetime(clock):
+    metadata_cache = MetadataCache(':memory:')
+    metadata_cache.put(watch_url('abc'), video('abc'))
+    clock.now = START + DEFAULT_URL_LIFETIME - URL_EXPIRY_MARGIN - 1
+    assert metadata_cache.get(watch_url('abc'), require_fresh_urls=True) is not None
+    clock.now += 2
+    assert metadata_cache.get(watch_url('abc'), require_fresh_urls=True) is None
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    metadata_cache = MetadataCache(':memory:', max_entries=2)
+    metadata_cache.put(watch_url('a'), video('a'))
+    clock.now += 1
+    metadata_cache.put(watch_url('b'), video('b'))
+    clock.now += 1
+    # Reading 'a' makes 'b' the least recently used
+    assert metadata_cache.get(watch_url('a')) is not None
+    clock.now += 1
+    metadata_cache.put(watch_url('c'), video('c'))
+
+    assert metadata_cache.get(watch_url('a')) is not None
+    assert metadata_cache.get(watch_url('c')) is not None
+    keys = {row[0] for row in metadata_cache._conn.execute("SELECT key FROM entries")}
+    assert keys == {'Youtube:a', 'Youtube:c'}
+    # Its aliases go with it
+    assert metadata_cache._conn.execute(
+        "SELECT COUNT(*) FROM aliases WHERE key = 'Youtube:b'").fetchone()[0] == 0
+
+
+def test_clear(clock):
+    metadata_cache = MetadataCache(':memory:')
+    metadata_cache.put(watch_url('abc'), video('abc'))
+    metadata_cache.clear()
+    assert metadata_cache._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0
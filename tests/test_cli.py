@@ -0,0 +1,25 @@
+"""Batch runner queueing, without running any downloads"""
+from grabyt.cli import BatchRunner
+
+
+class RecordingExecutor:
+    """Stands in for the download thread pool, keeping what was submitted"""
+    def __init__(self):
+        self.urls = []
+
+    def submit(self, fn, url, *args):
+        self.urls.append(url)
+
+
+def test_resumed_entries_are_not_queued_again_by_their_playlist():
+    runner = BatchRunner({})
+    runner.executor = RecordingExecutor()
+    # The journal held the half-listed playlist and the entries it had queued
+    runner.submit('https://example.com/playlist')
+    runner.submit('https://example.com/v/1')
+    runner.submit('https://example.com/v/2')
+
+    runner._on_entries([{'url': f'https://example.com/v/{n}', 'title': str(n)} for n in (1, 2, 3)], {})
+    runner._on_entries([{'url': 'https://example.com/v/3', 'title': '3'}], {})
+    assert runner.executor.urls == ['https://example.com/playlist', 'https://example.com/v/1',
+                                    'https://example.com/v/2', 'https://example.com/v/3']
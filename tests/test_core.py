@@ -0,0 +1,54 @@
+"""When a failed download is worth a re-extraction"""
+import errno
+import io
+import sys
+
+import pytest
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError
+from yt_dlp.utils import DownloadError, ReExtractInfo
+
+from grabyt.core import urls_expired
+
+
+def download_error(cause):
+    """A DownloadError the way YoutubeDL.report_error raises it while handling `cause`"""
+    try:
+        raise cause
+    except Exception:
+        return DownloadError(f"ERROR: {cause}", sys.exc_info())
+
+
+def http_error(status):
+    return HTTPError(Response(io.BytesIO(), 'https://cdn.example.com/v.mp4', {}, status=status))
+
+
+@pytest.mark.parametrize('status', [403, 410])
+def test_expired_format_urls(status):
+    assert urls_expired(download_error(http_error(status)))
+
+
+def test_reextract_requested_by_yt_dlp():
+    assert urls_expired(ReExtractInfo('formats expired'))
+
+
+def test_expiry_found_in_exception_chain():
+    try:
+        raise http_error(403)
+    except HTTPError as e:
+        wrapped = OSError('fragment failed')
+        wrapped.__cause__ = e
+    assert urls_expired(download_error(wrapped))
+
+
+@pytest.mark.parametrize('cause', [
+    http_error(404),
+    OSError(errno.ENOSPC, 'No space left on device'),
+    FileNotFoundError('ffmpeg not found'),
+])
+def test_other_errors_are_not_retried(cause):
+    assert not urls_expired(download_error(cause))
+
+
+def test_error_without_cause():
+    assert not urls_expired(DownloadError('ERROR: something'))
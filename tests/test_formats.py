@@ -0,0 +1,139 @@
+"""Format index queries and quality picker choices, on synthetic yt-dlp format lists"""
+from grabyt.formats import (FormatIndex, FormatRecord, audio_postprocessor, audio_selector, codec_family,
+                            format_selector, height_choices)
+
+INFO = {
+    'duration': 100,
+    'formats': [
+        # Muxed progressive
+        {'format_id': '18', 'ext': 'mp4', 'height': 360, 'fps': 30, 'vcodec': 'avc1.42001E',
+         'acodec': 'mp4a.40.2', 'tbr': 500, 'protocol': 'https'},
+        # Video-only DASH
+        {'format_id': '137', 'ext': 'mp4', 'height': 1080, 'fps': 30, 'vcodec': 'avc1.640028',
+         'acodec': 'none', 'tbr': 4000, 'filesize': 50_000_000, 'protocol': 'http_dash_segments'},
+        {'format_id': '399', 'ext': 'mp4', 'height': 1080, 'fps': 30, 'vcodec': 'av01.0.08M.08',
+         'acodec': 'none', 'tbr': 2500, 'filesize': 30_000_000, 'protocol': 'https'},
+        {'format_id': '303', 'ext': 'webm', 'height': 1080, 'fps': 59.94, 'vcodec': 'vp09.00.41.08',
+         'acodec': 'none', 'tbr': 6000, 'protocol': 'https'},
+        {'format_id': '136', 'ext': 'mp4', 'height': 720, 'fps': 30, 'vcodec': 'avc1.4d401f',
+         'acodec': 'none', 'tbr': 2000, 'filesize_approx': 20_000_000, 'protocol': 'https'},
+        # Audio-only
+        {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128,
+         'tbr': 128, 'filesize': 1_600_000, 'protocol': 'https'},
+        {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 160,
+         'tbr': 160, 'filesize': 2_000_000, 'protocol': 'https'},
+        # Storyboards and formats without an ID are ignored
+        {'format_id': 'sb0', 'ext': 'mhtml', 'vcodec': 'none', 'acodec': 'none'},
+        {'ext': 'mp4', 'height': 240, 'vcodec': 'avc1'},
+    ],
+}
+
+
+def ids(records):
+    return sorted(r.format_id for r in records)
+
+
+def test_codec_family():
+    assert codec_family('avc1.640028') == 'h264'
+    assert codec_family('vp09.00.41.08') == 'vp9'
+    assert codec_family('av01.0.08M.08') == 'av1'
+    assert codec_family('mp4a.40.2') == 'aac'
+    assert codec_family('none') is None
+    assert codec_family('theora.1') == 'theora'
+
+
+def test_record_kinds():
+    index = FormatIndex(INFO)
+    assert ids(index.records) == ['136', '137', '140', '18', '251', '303', '399']
+    assert index.by_id['18'].kind == 'muxed'
+    assert index.by_id['137'].kind == 'video'
+    assert index.by_id['140'].kind == 'audio'
+    assert index.by_id['303'].fps == 60
+    # With no codecs given, a height means a plain muxed file and no height an audio file
+    assert FormatRecord({'format_id': 'x', 'height': 480}).kind == 'muxed'
+    assert FormatRecord({'format_id': 'x'}).kind == 'audio'
+
+
+def test_query_filters():
+    index = FormatIndex(INFO)
+    assert ids(index.query('video')) == ['136', '137', '303', '399']
+    assert ids(index.query('muxed')) == ['18']
+    assert ids(index.query('audio')) == ['140', '251']
+    assert ids(index.query(codec='h264')) == ['136', '137', '18']
+    assert ids(index.query(codec='opus')) == ['251']
+    assert ids(index.query('video', min_height=1080, max_fps=30)) == ['137', '399']
+    assert ids(index.query('video', max_height=720)) == ['136']
+    assert ids(index.query('video', min_fps=50)) == ['303']
+    assert ids(index.query(ext='webm')) == ['251', '303']
+    assert ids(index.query('video', fragmented=True)) == ['137']
+
+
+def test_estimated_sizes():
+    index = FormatIndex(INFO)
+    assert index.size(index.by_id['137']) == 50_000_000
+    assert index.size(index.by_id['136']) == 20_000_000
+    # From the bitrate: 500 kbit/s for 100 s
+    assert index.size(index.by_id['18']) == 500 * 125 * 100
+    assert FormatIndex(dict(INFO, duration=None)).size(FormatRecord(INFO['formats'][0])) is None
+
+
+def test_smallest_and_best():
+    index = FormatIndex(INFO)
+    assert index.smallest('video', min_height=1080).format_id == '399'
+    assert index.smallest('video', codec='h265') is None
+    # Without a duration only formats with a known file size count
+    assert FormatIndex(dict(INFO, duration=None)).smallest('video', codec='vp9') is None
+    assert index.best('video').format_id == '303'
+    assert index.best('video', max_fps=30, codec='h264').format_id == '137'
+    assert index.best('muxed', max_height=240) is None
+
+
+def test_best_audio_prefers_matching_container():
+    index = FormatIndex(INFO)
+    assert index.best_audio(index.by_id['137']).format_id == '140'
+    assert index.best_audio(index.by_id['303']).format_id == '251'
+    assert index.best_audio().format_id == '251'
+    assert FormatIndex({'formats': INFO['formats'][:1]}).best_audio() is None
+
+
+def test_heights():
+    assert FormatIndex(INFO).heights() == [1080, 720, 360]
+
+
+def test_choices():
+    choices = FormatIndex(INFO).choices()
+    summary = [(c.height, c.fps, c.codec, c.muxed, c.format_spec.split('/')[0], c.size) for c in choices]
+    assert summary == [
+        (1080, 60, 'vp9', False, '303+251', 6000 * 125 * 100 + 2_000_000),
+        (1080, 30, 'av1', False, '399+140', 30_000_000 + 1_600_000),
+        (1080, 30, 'h264', False, '137+140', 50_000_000 + 1_600_000),
+        (720, 30, 'h264', False, '136+140', 20_000_000 + 1_600_000),
+        (360, 30, 'h264', True, '18', 500 * 125 * 100),
+    ]
+    # Pinned IDs fall back to a height cap
+    assert choices[1].format_spec == f"399+140/{format_selector(max_height=1080)}"
+    assert choices[0].describe() == '1080p60 · VP9'
+    assert choices[-1].describe() == '360p · H.264 · pre-muxed, no merge'
+
+
+def test_choices_without_audio():
+    video_only = {'formats': [f for f in INFO['formats'] if f.get('format_id') == '136']}
+    choice, = FormatIndex(video_only).choices()
+    assert choice.format_spec.split('/')[0] == '136'
+    assert choice.size == 20_000_000
+
+
+def test_height_choices():
+    choices = height_choices([1080, 480])
+    assert [c.height for c in choices] == [1080, 480]
+    assert choices[0].format_spec == format_selector(max_height=1080)
+    assert choices[0].size is None
+
+
+def test_selectors_and_postprocessors():
+    assert format_selector() == 'bestvideo+bestaudio/best'
+    assert format_selector(max_height=720) == 'bestvideo[height<=?720]+bestaudio/best[height<=?720]'
+    assert format_selector(audio_only=True) == 'bestaudio/best'
+    assert audio_selector('ogg') == 'bestaudio[acodec^=opus]/bestaudio[acodec^=vorbis]/bestaudio/best'
+    assert audio_postprocessor('m4a') == {'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mp4>m4a'}
+    assert audio_postprocessor('mp3') == {'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3'}
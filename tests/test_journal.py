@@ -0,0 +1,68 @@
+"""Download journal: recording, progress throttling and resume options"""
+from grabyt.journal import DownloadJournal, format_id_from_hook, partial_bytes, resume_options
+
+
+def progress(status='downloading', downloaded=0, total=100, **info):
+    return {'status': status, 'filename': '/videos/clip.mp4', 'downloaded_bytes': downloaded,
+            'total_bytes': total, 'info_dict': dict({'title': 'Clip', 'format_id': '22'}, **info)}
+
+
+def test_add_and_remove():
+    journal = DownloadJournal(':memory:')
+    first = journal.add('https://example.com/1', {'format': 'best'})
+    second = journal.add('https://example.com/2', {'format': 'bestaudio'}, title='Second')
+    entries = journal.unfinished()
+    assert [entry['journal_id'] for entry in entries] == [first, second]
+    assert entries[0]['download_options'] == {'format': 'best'}
+    assert entries[1]['title'] == 'Second'
+
+    journal.remove(first)
+    assert [entry['url'] for entry in journal.unfinished()] == ['https://example.com/2']
+    journal.clear()
+    assert journal.unfinished() == []
+
+
+def test_record_progress():
+    journal = DownloadJournal(':memory:')
+    journal_id = journal.add('https://example.com/1', {})
+    journal.record_progress(journal_id, progress(downloaded=10))
+    entry, = journal.unfinished()
+    assert (entry['title'], entry['format_id'], entry['filename']) == ('Clip', '22', '/videos/clip.mp4')
+    assert (entry['downloaded_bytes'], entry['total_bytes']) == (10, 100)
+
+
+def test_progress_writes_are_throttled_but_finishes_are_not():
+    journal = DownloadJournal(':memory:')
+    journal_id = journal.add('https://example.com/1', {})
+    journal.record_progress(journal_id, progress(downloaded=10))
+    journal.record_progress(journal_id, progress(downloaded=50))
+    assert journal.unfinished()[0]['downloaded_bytes'] == 10
+    journal.record_progress(journal_id, progress('finished', downloaded=100))
+    assert journal.unfinished()[0]['downloaded_bytes'] == 100
+
+
+def test_format_id_from_hook():
+    assert format_id_from_hook({'format_id': '22'}) == '22'
+    merged = {'format_id': '137+140', 'requested_formats': [{'format_id': '137'}, {'format_id': '140'}]}
+    assert format_id_from_hook(merged) == '137+140'
+    assert format_id_from_hook({}) is None
+
+
+def test_resume_pins_format_with_fallback():
+    entry = {'download_options': {'format': 'bv*[height<=1080]+ba/b'}, 'format_id': '137+140'}
+    assert resume_options(entry)['format'] == '137+140/bv*[height<=1080]+ba/b'
+    # The journaled options themselves are left alone
+    assert entry['download_options']['format'] == 'bv*[height<=1080]+ba/b'
+
+
+def test_resume_without_format_id_or_format():
+    assert resume_options({'download_options': {'format': 'b'}, 'format_id': None})['format'] == 'b'
+    assert resume_options({'download_options': {}, 'format_id': '18'})['format'] == '18/best'
+
+
+def test_partial_bytes(tmp_path):
+    filename = str(tmp_path / 'clip.mp4')
+    assert partial_bytes({'filename': None}) == 0
+    assert partial_bytes({'filename': filename}) == 0
+    (tmp_path / 'clip.mp4.part').write_bytes(b'x' * 5)
+    assert partial_bytes({'filename': filename}) == 5
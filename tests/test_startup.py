@@ -0,0 +1,10 @@
+"""The CLI and the engine modules must not import yt-dlp until a download needs it"""
+import os
+import subprocess
+import sys
+
+
+def test_cli_import_does_not_load_yt_dlp():
+    # A fresh interpreter, since another test may already have imported yt-dlp
+    check = "import sys, grabyt.cli; assert 'yt_dlp' not in sys.modules, 'yt_dlp was imported'"
+    subprocess.run([sys.executable, '-c', check], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
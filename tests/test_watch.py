@@ -0,0 +1,101 @@
+"""Watch mode: URL extraction, debounced batching and quality rules"""
+import pytest
+
+from grabyt.bandwidth import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from grabyt.watch import QualityRule, UrlBatcher, extract_urls, match_rule, parse_rules
+
+
+def test_extract_urls():
+    text = ("Watch https://youtu.be/abc. Also (https://example.com/v?id=1), "
+            "https://youtu.be/abc again and <https://vimeo.com/123>")
+    assert extract_urls(text) == ['https://youtu.be/abc', 'https://example.com/v?id=1', 'https://vimeo.com/123']
+    assert extract_urls(None) == []
+
+
+def test_batch_waits_for_debounce():
+    batcher = UrlBatcher(debounce=2, max_delay=10)
+    assert batcher.next_delay(0) is None
+    assert batcher.add(['https://a', 'https://b'], now=0) == 2
+    assert batcher.take(now=1) == []
+    # A new URL restarts the wait
+    assert batcher.add(['https://c'], now=1.5) == 1
+    assert batcher.next_delay(2) == 1.5
+    assert batcher.take(now=3) == []
+    assert batcher.take(now=3.5) == ['https://a', 'https://b', 'https://c']
+    assert batcher.next_delay(4) is None
+
+
+def test_batch_is_released_after_max_delay():
+    batcher = UrlBatcher(debounce=2, max_delay=5)
+    for n in range(6):
+        batcher.add([f'https://v/{n}'], now=n)
+    assert batcher.next_delay(4.5) == 0.5
+    assert batcher.take(now=5) == [f'https://v/{n}' for n in range(6)]
+
+
+def test_batcher_drops_repeats():
+    batcher = UrlBatcher(debounce=1)
+    assert batcher.add(['https://a', 'https://a'], now=0) == 1
+    assert batcher.take(now=1) == ['https://a']
+    # Seen in an earlier batch
+    assert batcher.add(['https://a'], now=2) == 0
+    assert batcher.next_delay(2) is None
+    assert batcher.claim('https://b')
+    assert not batcher.claim('https://b')
+    assert batcher.add(['https://b'], now=3) == 0
+
+
+def test_batcher_starts_at_time_zero():
+    batcher = UrlBatcher(debounce=1, max_delay=3)
+    batcher.add(['https://a'], now=0)
+    batcher.add(['https://b'], now=0.9)
+    batcher.add(['https://c'], now=1.8)
+    batcher.add(['https://d'], now=2.7)
+    assert batcher.next_delay(2.7) == pytest.approx(0.3)
+
+
+@pytest.mark.parametrize('text, audio_only, max_height, audio_format, priority', [
+    ('*=best', False, None, 'best', PRIORITY_NORMAL),
+    ('music.youtube.com=audio:opus@high', True, None, 'opus', PRIORITY_HIGH),
+    ('*.twitch.tv = 720p @ low', False, 720, 'best', PRIORITY_LOW),
+    ('Example.COM=AUDIO', True, None, 'best', PRIORITY_NORMAL),
+])
+def test_parse_rule(text, audio_only, max_height, audio_format, priority):
+    rule = QualityRule.parse(text)
+    assert (rule.audio_only, rule.max_height, rule.audio_format, rule.priority) == \
+        (audio_only, max_height, audio_format, priority)
+
+
+@pytest.mark.parametrize('text', ['youtube.com', '=720', 'a=worst', 'a=audio:wav', 'a=720@urgent', 'a b=720'])
+def test_parse_rule_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        QualityRule.parse(text)
+
+
+def test_rule_round_trips_as_text():
+    for text in ('*=best', 'music.youtube.com=audio:opus@high', '*youtube.com/shorts/*=480@low', 'a.com=audio'):
+        assert str(QualityRule.parse(text)) == text
+
+
+def test_rule_matching():
+    host = QualityRule.parse('*.twitch.tv=720')
+    assert host.matches('https://www.twitch.tv/videos/1')
+    assert not host.matches('https://twitch.tv.example.com/1')
+    path = QualityRule.parse('*youtube.com/shorts/*=480')
+    assert path.matches('https://www.YouTube.com/shorts/abc')
+    assert not path.matches('https://www.youtube.com/watch?v=abc')
+
+
+def test_first_matching_rule_wins():
+    rules = parse_rules(['music.youtube.com=audio', '', '*.youtube.com=1080', '*=720'])
+    assert len(rules) == 3
+    assert match_rule(rules, 'https://music.youtube.com/watch?v=a').audio_only
+    assert match_rule(rules, 'https://www.youtube.com/watch?v=a').max_height == 1080
+    assert match_rule(rules, 'https://vimeo.com/1').max_height == 720
+    assert match_rule(rules[:1], 'https://vimeo.com/1') is None
+
+
+def test_rule_describe():
+    assert QualityRule.parse('*=audio:mp3').describe() == 'audio (mp3)'
+    assert QualityRule.parse('*=1080').describe() == '≤1080p'
+    assert QualityRule.parse('*=best').describe() == 'best'